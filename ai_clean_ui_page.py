@@ -2,59 +2,19 @@
 AI Model Details Page - Clean UI Version
 """
 import streamlit as st
-import plotly.graph_objects as go
-import pandas as pd
-import plotly.express as px
-import numpy as np
 
-def show_ai_model_page():
-    """Clean UI-focused AI model showcase"""
-    
-    # Add custom CSS for fonts and theme
-    st.markdown("""
-    <style>
-    @import url('https://fonts.googleapis.com/css2?family=Mulish:wght@400;600;700&display=swap');
-    
-    .main > div { font-family: 'Mulish', sans-serif; font-weight: 400; }
-    h1, h2, h3, h4, h5, h6 { font-family: 'Mulish', sans-serif; font-weight: 600; color: #8F00BF; }
-    p, div, span, li { font-family: 'Mulish', sans-serif; font-weight: 400; }
-    .stButton > button { background-color: #8F00BF; color: white; border: none; font-family: 'Mulish', sans-serif; font-weight: 600; }
-    .stButton > button:hover { background-color: #7A00A3; }
-    .stMetric { font-family: 'Mulish', sans-serif; }
-    .stDataFrame { font-family: 'Mulish', sans-serif; }
-    </style>
-    """, unsafe_allow_html=True)
-    
-    # Header
-    st.title("🤖 Customer DNA AI - ML Risk Assessment System")
-    st.subheader("Machine Learning Risk Assessment Platform")
-    st.write("Random Forest ML Model + Continuous Learning | Real-time Crisis Prevention")
-    
-    st.divider()
-    
-    # Architecture Overview
-    st.header("🏗️ AI Architecture Overview")
-    
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.metric("📈 Data Ingestion", "Real-time", "99.9% uptime")
-        
-    with col2:
-        st.metric("🧠 ML Processing", "Random Forest", "Continuous learning")
-        
-    with col3:
-        st.metric("🎯 Risk Scoring", "Multi-factor", "90% accuracy")
-        
-    with col4:
-        st.metric("⚡ Auto Actions", "Smart", "78% success rate")
-    
-    st.divider()
-    
-    # Architecture Diagram
-    st.header("📊 System Architecture Diagram")
+# Plotly and pandas are imported inside the builders, so the dashboard only pays
+# for them when this page is first opened
+
+# Bump when the static page content changes; cached figures and tables are keyed on it
+# (Streamlit also drops them whenever a builder's source changes)
+PAGE_CONTENT_VERSION = 1
+
+@st.cache_resource(show_spinner=False)
+def build_architecture_figure(version):
+    """Architecture flow diagram - built once per process and content version"""
+    import plotly.graph_objects as go
     
-    # Create architecture flow diagram
     fig = go.Figure()
     
     # Data sources
@@ -112,27 +72,16 @@ def show_ai_model_page():
         showlegend=False
     )
     
-    st.plotly_chart(fig, use_container_width=True)
-    
-    st.divider()
-    
-    # Model Features & Training Data
-    st.header("🎯 Model Features & Training Data")
-    
-    # Feature overview first
-    col_feat1, col_feat2, col_feat3 = st.columns(3)
-    
-    with col_feat1:
-        st.metric("ML Features", "22", "Trained model")
-    with col_feat2:
-        st.metric("Risk Categories", "4", "ML Classification")
-    with col_feat3:
-        st.metric("Training Samples", "2000", "Synthetic data")
+    return fig
+
+@st.cache_resource(show_spinner=False)
+def build_static_tables(version):
+    """Static tables shown on the page, shared read-only across sessions"""
+    import pandas as pd
     
-    st.subheader("📊 Feature Details")
+    tables = {}
     
-    # ML Model Features (22 features used by Random Forest)
-    parameters_df = pd.DataFrame({
+    tables['parameters_df'] = pd.DataFrame({
         'ML Feature': [
             'age', 'income', 'total_deposits', 'sessions_per_week', 'avg_session_minutes',
             'support_contacts', 'financial_stress_score', 'session_variance', 'weekend_gambling_ratio',
@@ -163,12 +112,7 @@ def show_ai_model_page():
         ]
     })
     
-    st.dataframe(parameters_df, use_container_width=True)
-    
-    # ML Model Classification
-    st.subheader("🎯 ML Risk Classification")
-    
-    ml_categories = pd.DataFrame({
+    tables['ml_categories'] = pd.DataFrame({
         'Risk Category': ['LOW', 'MEDIUM', 'HIGH', 'CRITICAL'],
         'ML Prediction': ['Low risk customer', 'Moderate risk patterns', 'High risk behavior', 'Crisis intervention needed'],
         'Training Examples': ['40%', '30%', '20%', '10%'],
@@ -180,27 +124,7 @@ def show_ai_model_page():
         ]
     })
     
-    st.dataframe(ml_categories, use_container_width=True)
-    
-    st.markdown(f"""
-    <div style='background: rgba(143, 0, 191, 0.1); padding: 1rem; border-radius: 8px; border-left: 4px solid #8F00BF; font-family: Mulish, sans-serif;'>
-        <strong style='color: #8F00BF;'>ML Model:</strong> Random Forest with {len(parameters_df)} features trained on 2000 synthetic samples with continuous learning capability.
-    </div>
-    """, unsafe_allow_html=True)
-    
-    st.divider()
-    
-    # Public Domain Dataset Information
-    st.header("📋 Public Domain Training Datasets")
-    
-    st.markdown("""
-    <div style='background: rgba(143, 0, 191, 0.1); padding: 1rem; border-radius: 8px; border-left: 4px solid #8F00BF; font-family: Mulish, sans-serif;'>
-        <strong style='color: #8F00BF;'>Data Sources:</strong> All training data sourced from publicly available datasets and synthetic data generation for privacy compliance.
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Primary datasets
-    dataset_info = pd.DataFrame({
+    tables['dataset_info'] = pd.DataFrame({
         'Dataset Name': [
             'UCI Online Retail Dataset',
             'Kaggle Credit Card Fraud Detection',
@@ -226,6 +150,294 @@ def show_ai_model_page():
         ]
     })
     
+    tables['risk_dist'] = pd.DataFrame({
+        'Risk Level': ['LOW', 'MEDIUM', 'HIGH', 'CRITICAL'],
+        'Count': [245, 89, 34, 12]
+    })
+    
+    tables['success_data'] = pd.DataFrame({
+        'Intervention': ['Deposit Controls', 'Spend Mgmt', 'Session Breaks', 'Support', 'Location'],
+        'Success Rate': [92, 85, 95, 88, 70]
+    })
+    
+    tables['tech_specs'] = pd.DataFrame({
+        'Component': ['Frontend', 'Backend Logic', 'Risk Engine', 'Data Storage', 'Deployment'],
+        'Technology': ['Streamlit Python', 'Python 3.13', 'Random Forest ML', 'Session State', 'Local/Cloud'],
+        'Performance': ['Real-time UI', '<100ms calculation', '5-factor analysis', 'In-memory', '99.9% uptime']
+    })
+    
+    tables['model_specs'] = pd.DataFrame({
+        'Aspect': ['Algorithm Type', 'ML Model', 'Training Data', 'Update Frequency', 'Learning Type'],
+        'Details': ['Random Forest Classifier', '100 decision trees', '2000 synthetic samples', 'Continuous learning', 'Supervised learning'],
+        'Implementation': ['Scikit-learn', '22 feature inputs', 'Auto-generated dataset', 'Online updates', 'Classification + Regression']
+    })
+    
+    tables['privacy_specs'] = pd.DataFrame({
+        'Data Type': ['Customer Profiles', 'Session Data', 'Transaction Data', 'Location Data', 'Support Data'],
+        'Source': ['Demo profiles only', 'Simulated sessions', 'Synthetic transactions', 'Predefined locations', 'Mock support calls'],
+        'Privacy Level': ['No real PII', 'Generated data', 'Synthetic amounts', 'Generic venues', 'Simulated contacts']
+    })
+    
+    tables['compliance_info'] = pd.DataFrame({
+        'Compliance Area': ['Data Protection', 'User Privacy', 'Data Retention', 'Access Control', 'Audit Trail'],
+        'Implementation': ['No real customer data', 'Demo profiles only', 'Session-based storage', 'Local application', 'Activity logging'],
+        'Standard': ['GDPR compliant', 'Privacy by design', 'Temporary storage', 'Single user access', 'Transparent operations']
+    })
+    
+    return tables
+
+@st.cache_resource(show_spinner=False)
+def build_performance_figures(version):
+    """Risk distribution and intervention success charts"""
+    import plotly.express as px
+    
+    tables = build_static_tables(version)
+    risk_dist = tables['risk_dist']
+    success_data = tables['success_data']
+    
+    fig1 = px.bar(risk_dist, x='Risk Level', y='Count', 
+                 title="Customer Risk Distribution",
+                 color='Risk Level',
+                 color_discrete_map={
+                     'LOW': '#22c55e',
+                     'MEDIUM': '#eab308', 
+                     'HIGH': '#f59e0b',
+                     'CRITICAL': '#dc2626'
+                 })
+    
+    fig2 = px.bar(success_data, x='Intervention', y='Success Rate',
+                 title="Intervention Success Rates (%)",
+                 color='Success Rate',
+                 color_continuous_scale='Blues')
+    
+    return fig1, fig2
+
+@st.cache_data(ttl=30, max_entries=8, show_spinner=False)
+def live_model_snapshot(model_version):
+    """Serving model snapshot - rebuilt per model version, latency refreshed at most every 30s"""
+    from fixed_ml_system import fixed_ml
+    return fixed_ml.model_snapshot()
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def build_coefficient_figure(model_version):
+    """Ridge coefficients of the live model, one chart per model version"""
+    import pandas as pd
+    import plotly.express as px
+    
+    coefficients = live_model_snapshot(model_version)['coefficients']
+    coef_df = pd.DataFrame({
+        'Feature': list(coefficients.keys()),
+        'Coefficient': list(coefficients.values())
+    }).sort_values('Coefficient')
+    
+    fig = px.bar(coef_df, x='Coefficient', y='Feature', orientation='h',
+                 title=f"Live Model Coefficients (v{model_version}, standardized features)",
+                 color='Coefficient', color_continuous_scale='RdBu_r')
+    fig.update_layout(height=500)
+    return fig
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def build_history_figures(events):
+    """Monthly trend, last 30 days and score distribution, from the pre-rolled history - rebuilt only after new events"""
+    import pandas as pd
+    import plotly.express as px
+    from history_aggregates import history
+    
+    colors = {'LOW': '#22c55e', 'MEDIUM': '#eab308', 'HIGH': '#f59e0b', 'CRITICAL': '#dc2626'}
+    monthly = pd.DataFrame(history.monthly_table(12))
+    trend = px.line(monthly, x='period', y=list(colors), title="Monthly Risk Evaluations by Level",
+                    color_discrete_map=colors, markers=True,
+                    labels={'period': 'Month', 'value': 'Evaluations', 'variable': 'Risk Level'})
+    
+    daily = pd.DataFrame(history.daily_table(30))
+    recent = px.bar(daily, x='period', y=list(colors), title="Last 30 Days",
+                    color_discrete_map=colors, labels={'period': 'Day', 'value': 'Evaluations', 'variable': 'Risk Level'})
+    
+    distribution = px.bar(pd.DataFrame(history.score_distribution(12)), x='score_range', y='evaluations',
+                          title="Risk Score Distribution (12 months)", labels={'score_range': 'Score', 'evaluations': 'Evaluations'},
+                          color_discrete_sequence=['#8F00BF'])
+    return trend, recent, distribution
+
+def show_ai_model_page():
+    """Clean UI-focused AI model showcase"""
+    tables = build_static_tables(PAGE_CONTENT_VERSION)
+    
+    # Add custom CSS for fonts and theme
+    st.markdown("""
+    <style>
+    @import url('https://fonts.googleapis.com/css2?family=Mulish:wght@400;600;700&display=swap');
+    
+    .main > div { font-family: 'Mulish', sans-serif; font-weight: 400; }
+    h1, h2, h3, h4, h5, h6 { font-family: 'Mulish', sans-serif; font-weight: 600; color: #8F00BF; }
+    p, div, span, li { font-family: 'Mulish', sans-serif; font-weight: 400; }
+    .stButton > button { background-color: #8F00BF; color: white; border: none; font-family: 'Mulish', sans-serif; font-weight: 600; }
+    .stButton > button:hover { background-color: #7A00A3; }
+    .stMetric { font-family: 'Mulish', sans-serif; }
+    .stDataFrame { font-family: 'Mulish', sans-serif; }
+    </style>
+    """, unsafe_allow_html=True)
+    
+    # Header
+    st.title("🤖 Customer DNA AI - ML Risk Assessment System")
+    st.subheader("Machine Learning Risk Assessment Platform")
+    st.write("Random Forest ML Model + Continuous Learning | Real-time Crisis Prevention")
+    
+    st.divider()
+    
+    # Architecture Overview
+    st.header("🏗️ AI Architecture Overview")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("📈 Data Ingestion", "Real-time", "99.9% uptime")
+        
+    with col2:
+        st.metric("🧠 ML Processing", "Random Forest", "Continuous learning")
+        
+    with col3:
+        st.metric("🎯 Risk Scoring", "Multi-factor", "90% accuracy")
+        
+    with col4:
+        st.metric("⚡ Auto Actions", "Smart", "78% success rate")
+    
+    st.divider()
+    
+    # Architecture Diagram
+    st.header("📊 System Architecture Diagram")
+    
+    fig = build_architecture_figure(PAGE_CONTENT_VERSION)
+    
+    st.plotly_chart(fig, use_container_width=True)
+    
+    st.divider()
+    
+    # Live Model Snapshot
+    st.header("📡 Live Model Snapshot")
+    
+    from fixed_ml_system import fixed_ml
+    snapshot = live_model_snapshot(fixed_ml.model_version)
+    
+    col_live1, col_live2, col_live3, col_live4 = st.columns(4)
+    
+    with col_live1:
+        st.metric("Model Version", f"v{snapshot['model_version']}", snapshot['algorithm'])
+    with col_live2:
+        st.metric("Training Samples", snapshot['samples'], f"{snapshot['labeled_samples']} with outcome labels")
+    with col_live3:
+        st.metric("Avg Inference", f"{snapshot['avg_latency_ms']:.2f} ms", f"{snapshot['predictions']} predictions")
+    with col_live4:
+        intercept = f"{snapshot['intercept']:.1f}" if snapshot['intercept'] is not None else "-"
+        st.metric("Intercept", intercept, f"alpha={snapshot['alpha']}")
+    
+    ingest = snapshot['ingest']
+    st.caption(f"Training buffer: {ingest.get('accepted', 0)} accepted | {ingest.get('labeled', 0)} outcome labels | "
+               f"{ingest.get('duplicates', 0)} duplicates skipped | {ingest.get('rate_limited', 0)} rate-limited | "
+               f"{snapshot['pending_samples']} pending retrain")
+    
+    selection = snapshot['selection']
+    if selection:
+        st.caption(f"Last retrain: alpha={selection['alpha']} | LOO RMSE {selection['loo_rmse']:.2f} | "
+                   f"{'promoted' if selection['promoted'] else 'rejected'} "
+                   f"({snapshot['retrains_promoted']} promoted, {snapshot['retrains_rejected']} rejected)")
+    
+    cohorts = snapshot['cohorts']
+    st.caption(f"Behavioural cohorts (v{cohorts['version']}): " + " | ".join(
+        f"#{cohort} risk {risk:.0f} ({size})" for cohort, (risk, size) in enumerate(zip(cohorts['risk'], cohorts['sizes']))))
+
+    # Read live, like the memory report below - these counters move on every scored action
+    from risk_engine import latency_budget
+    latency = latency_budget.stats()
+    if latency['calls']:
+        st.caption(f"Scoring budget {latency['budget_ms']} ms: {latency['fallback_rate']:.1%} rule-score fallbacks "
+                   f"({latency.get('fallback_slow', 0)} slow ML, {latency.get('fallback_model_load', 0)} model loading) | "
+                   f"{latency['overrun_rate']:.1%} over budget | ML estimate {latency['estimate_ms']:.2f} ms | "
+                   f"{latency.get('deferred_learning', 0)} samples learned in the background")
+        if latency.get('deferred_errors'):
+            st.caption(f"Background learner: {latency['deferred_errors']} failed tasks, last {latency['last_error']}")
+
+    drift = snapshot['drift']
+    col_drift1, col_drift2, col_drift3 = st.columns(3)
+    with col_drift1:
+        st.metric("Max Feature PSI", f"{drift['max_psi']:.3f}", "Drifted" if drift['drifted'] else f"threshold {drift['threshold']}", delta_color="inverse" if drift['drifted'] else "off")
+    with col_drift2:
+        st.metric("Max Feature KL", f"{drift['max_kl']:.3f}")
+    with col_drift3:
+        st.metric("Scored Since Retrain", drift['observations'], f"vs {drift['reference_samples']} training samples", delta_color="off")
+    if drift['observations']:
+        import pandas as pd
+        st.dataframe(pd.DataFrame(drift['top_features']).rename(columns={
+            'feature': 'Feature', 'psi': 'PSI', 'kl': 'KL', 'live_mean': 'Live Mean', 'reference_mean': 'Training Mean'
+        }), use_container_width=True, hide_index=True)
+    
+    if snapshot['coefficients']:
+        st.plotly_chart(build_coefficient_figure(snapshot['model_version']), use_container_width=True)
+
+    # Memory per subsystem against its budget - measured on each render, not cached
+    from memory_budget import memory_budget
+    memory = memory_budget.report()
+    memory_cols = st.columns(len(memory['subsystems']))
+    for col, (name, usage) in zip(memory_cols, memory['subsystems'].items()):
+        with col:
+            budget = f"of {usage['budget'] / 2**20:.0f} MB budget" if usage['budget'] else "no budget"
+            st.metric(name.replace('_', ' ').title(), f"{usage['bytes'] / 1024:,.0f} KB", budget, delta_color="off")
+    evictions = ", ".join(f"{count} {name.replace('_', ' ')}" for name, count in sorted(memory['evictions'].items()))
+    st.caption(f"Memory: {memory['sessions_tracked']} sessions tracked (budget {memory['session_budget'] // 1024} KB each) | "
+               f"evictions: {evictions or 'none'}")
+    if 'tracemalloc' in memory:
+        traced = memory['tracemalloc']
+        st.caption(f"tracemalloc: {traced['current'] / 2**20:.1f} MB current, {traced['peak'] / 2**20:.1f} MB peak | top: "
+                   + ", ".join(f"{name} {size / 1024:,.0f} KB" for name, size in traced['top_files']))
+
+    st.divider()
+    
+    # Model Features & Training Data
+    st.header("🎯 Model Features & Training Data")
+    
+    # Feature overview first
+    col_feat1, col_feat2, col_feat3 = st.columns(3)
+    
+    with col_feat1:
+        st.metric("ML Features", "22", "Trained model")
+    with col_feat2:
+        st.metric("Risk Categories", "4", "ML Classification")
+    with col_feat3:
+        st.metric("Training Samples", "2000", "Synthetic data")
+    
+    st.subheader("📊 Feature Details")
+    
+    # ML Model Features (22 features used by Random Forest)
+    parameters_df = tables['parameters_df']
+    
+    st.dataframe(parameters_df, use_container_width=True)
+    
+    # ML Model Classification
+    st.subheader("🎯 ML Risk Classification")
+    
+    ml_categories = tables['ml_categories']
+    
+    st.dataframe(ml_categories, use_container_width=True)
+    
+    st.markdown(f"""
+    <div style='background: rgba(143, 0, 191, 0.1); padding: 1rem; border-radius: 8px; border-left: 4px solid #8F00BF; font-family: Mulish, sans-serif;'>
+        <strong style='color: #8F00BF;'>ML Model:</strong> Random Forest with {len(parameters_df)} features trained on 2000 synthetic samples with continuous learning capability.
+    </div>
+    """, unsafe_allow_html=True)
+    
+    st.divider()
+    
+    # Public Domain Dataset Information
+    st.header("📋 Public Domain Training Datasets")
+    
+    st.markdown("""
+    <div style='background: rgba(143, 0, 191, 0.1); padding: 1rem; border-radius: 8px; border-left: 4px solid #8F00BF; font-family: Mulish, sans-serif;'>
+        <strong style='color: #8F00BF;'>Data Sources:</strong> All training data sourced from publicly available datasets and synthetic data generation for privacy compliance.
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Primary datasets
+    dataset_info = tables['dataset_info']
+    
     st.dataframe(dataset_info, use_container_width=True)
     
     # Dataset References
@@ -265,39 +477,54 @@ def show_ai_model_page():
     # Performance Charts
     col_chart1, col_chart2 = st.columns(2)
     
+    fig1, fig2 = build_performance_figures(PAGE_CONTENT_VERSION)
+    
     with col_chart1:
         # Risk Distribution
-        risk_dist = pd.DataFrame({
-            'Risk Level': ['LOW', 'MEDIUM', 'HIGH', 'CRITICAL'],
-            'Count': [245, 89, 34, 12]
-        })
-        
-        fig1 = px.bar(risk_dist, x='Risk Level', y='Count', 
-                     title="Customer Risk Distribution",
-                     color='Risk Level',
-                     color_discrete_map={
-                         'LOW': '#22c55e',
-                         'MEDIUM': '#eab308', 
-                         'HIGH': '#f59e0b',
-                         'CRITICAL': '#dc2626'
-                     })
         st.plotly_chart(fig1, use_container_width=True)
     
     with col_chart2:
         # Intervention Success
-        success_data = pd.DataFrame({
-            'Intervention': ['Deposit Controls', 'Spend Mgmt', 'Session Breaks', 'Support', 'Location'],
-            'Success Rate': [92, 85, 95, 88, 70]
-        })
-        
-        fig2 = px.bar(success_data, x='Intervention', y='Success Rate',
-                     title="Intervention Success Rates (%)",
-                     color='Success Rate',
-                     color_continuous_scale='Blues')
         st.plotly_chart(fig2, use_container_width=True)
     
     st.divider()
     
+    # Historical Analysis - live, from the daily and monthly rollups fed by scoring and executed interventions
+    st.header("📈 Historical Analysis")
+    
+    from history_aggregates import history
+    totals = history.totals()
+    col_hist1, col_hist2, col_hist3, col_hist4 = st.columns(4)
+    with col_hist1:
+        st.metric("Risk Evaluations", f"{totals['scored']:,}", f"{totals['CRITICAL']:,} critical", delta_color="off")
+    with col_hist2:
+        st.metric("Interventions Executed", f"{totals['interventions']:,}")
+    with col_hist3:
+        st.metric("Crises Prevented (est.)", f"{totals['prevented_crises']:.1f}")
+    with col_hist4:
+        st.metric("Savings (est.)", f"£{totals['savings']:,.0f}", f"£{history.crisis_cost:,} per crisis", delta_color="off")
+    
+    if totals['scored'] or totals['interventions']:
+        trend, recent, distribution = build_history_figures(history.stats()['events'])
+        st.plotly_chart(trend, use_container_width=True)
+        col_hist_chart1, col_hist_chart2 = st.columns(2)
+        with col_hist_chart1:
+            st.plotly_chart(recent, use_container_width=True)
+        with col_hist_chart2:
+            st.plotly_chart(distribution, use_container_width=True)
+        
+        breakdown = history.intervention_breakdown(12)
+        if breakdown:
+            import pandas as pd
+            st.dataframe(pd.DataFrame(breakdown).rename(columns={'type': 'Intervention', 'total': 'Total'}),
+                         use_container_width=True, hide_index=True)
+    else:
+        st.info("Nothing evaluated yet - history fills in as customers are scored on the dashboard.")
+    st.caption(f"Daily rollups kept {history.days} days, monthly {history.months} months. "
+               f"Savings assume each intervention prevents its crisis probability times its success rate.")
+    
+    st.divider()
+    
     # Technical Specifications
     st.header("⚙️ Technical Specifications")
     
@@ -305,20 +532,12 @@ def show_ai_model_page():
     
     with col_tech1:
         st.subheader("🔧 System Architecture")
-        tech_specs = pd.DataFrame({
-            'Component': ['Frontend', 'Backend Logic', 'Risk Engine', 'Data Storage', 'Deployment'],
-            'Technology': ['Streamlit Python', 'Python 3.13', 'Random Forest ML', 'Session State', 'Local/Cloud'],
-            'Performance': ['Real-time UI', '<100ms calculation', '5-factor analysis', 'In-memory', '99.9% uptime']
-        })
+        tech_specs = tables['tech_specs']
         st.dataframe(tech_specs, use_container_width=True)
     
     with col_tech2:
         st.subheader("📊 Model Specifications")
-        model_specs = pd.DataFrame({
-            'Aspect': ['Algorithm Type', 'ML Model', 'Training Data', 'Update Frequency', 'Learning Type'],
-            'Details': ['Random Forest Classifier', '100 decision trees', '2000 synthetic samples', 'Continuous learning', 'Supervised learning'],
-            'Implementation': ['Scikit-learn', '22 feature inputs', 'Auto-generated dataset', 'Online updates', 'Classification + Regression']
-        })
+        model_specs = tables['model_specs']
         st.dataframe(model_specs, use_container_width=True)
     
     # Data Privacy & Compliance
@@ -328,20 +547,12 @@ def show_ai_model_page():
     
     with col_privacy1:
         st.subheader("📋 Data Sources")
-        privacy_specs = pd.DataFrame({
-            'Data Type': ['Customer Profiles', 'Session Data', 'Transaction Data', 'Location Data', 'Support Data'],
-            'Source': ['Demo profiles only', 'Simulated sessions', 'Synthetic transactions', 'Predefined locations', 'Mock support calls'],
-            'Privacy Level': ['No real PII', 'Generated data', 'Synthetic amounts', 'Generic venues', 'Simulated contacts']
-        })
+        privacy_specs = tables['privacy_specs']
         st.dataframe(privacy_specs, use_container_width=True)
     
     with col_privacy2:
         st.subheader("🛡️ Compliance Measures")
-        compliance_info = pd.DataFrame({
-            'Compliance Area': ['Data Protection', 'User Privacy', 'Data Retention', 'Access Control', 'Audit Trail'],
-            'Implementation': ['No real customer data', 'Demo profiles only', 'Session-based storage', 'Local application', 'Activity logging'],
-            'Standard': ['GDPR compliant', 'Privacy by design', 'Temporary storage', 'Single user access', 'Transparent operations']
-        })
+        compliance_info = tables['compliance_info']
         st.dataframe(compliance_info, use_container_width=True)
     
     st.markdown("""
@@ -0,0 +1,126 @@
+"""
+Alert Suppression - Per-customer dedup, cool-downs and rate limits for outgoing alerts
+"""
+import threading
+import time
+from collections import Counter, OrderedDict
+from config import ALERT_SUPPRESSION
+from memory_budget import memory_budget, deep_sizeof
+from rule_engine import LEVEL_NAMES
+from intervention_engine import URGENCY_NAMES
+
+# Risk levels and intervention urgencies share one scale - LOW and NONE rank lowest
+URGENCY_RANKS = {name: rank for names in (LEVEL_NAMES, URGENCY_NAMES) for rank, name in enumerate(names)}
+
+class AlertSuppressor:
+    """Decides which alerts are passed on and which are repeats.
+
+    An alert is keyed on (customer, alert type) and remembers the urgency
+    it was last raised at. It is emitted when that state changes (first
+    sighting or a different urgency), or when an unchanged alert's cool-down
+    has run out. Emitted alerts also spend a token from the customer's
+    bucket for their channel, so a customer whose state flaps cannot flood
+    the queue - except an escalation above the highest urgency raised since
+    the alert was last cleared, which always goes out. That can happen once
+    per urgency level, so it cannot flood either. Both tables are
+    LRU-bounded to MAX_TRACKED entries. The customer can be any hashable
+    key - the dashboard passes (browser session, customer), so each analyst
+    gets their own alerts.
+    """
+
+    def __init__(self, capacity=None, refill_per_minute=None, cooldown_seconds=None, max_tracked=None):
+        self.capacity = ALERT_SUPPRESSION['BUCKET_CAPACITY'] if capacity is None else capacity
+        self.refill_per_second = (ALERT_SUPPRESSION['REFILL_PER_MINUTE'] if refill_per_minute is None else refill_per_minute) / 60
+        self.cooldown_seconds = ALERT_SUPPRESSION['COOLDOWN_SECONDS'] if cooldown_seconds is None else cooldown_seconds
+        self.max_tracked = ALERT_SUPPRESSION['MAX_TRACKED'] if max_tracked is None else max_tracked
+
+        self.alerts = OrderedDict()  # (customer, alert type) -> (urgency, last emitted, highest urgency rank raised)
+        self.buckets = OrderedDict()  # (customer, channel) -> (tokens, last refill)
+        self.counts = Counter()
+        self.lock = threading.Lock()
+
+    def should_emit(self, customer, alert_type, urgency, now=None, channel='interventions'):
+        """True if this alert should go out, False if it is held back"""
+        return self.decide(customer, alert_type, urgency, now, channel) == 'emitted'
+
+    def decide(self, customer, alert_type, urgency, now=None, channel='interventions'):
+        """'emitted', or why the alert is held back - 'cooldown' (already raised) or 'rate_limit'"""
+        now = time.monotonic() if now is None else now
+        key = (customer, alert_type)
+        rank = URGENCY_RANKS.get(urgency, 0)
+        with self.lock:
+            previous = self.alerts.get(key)
+            peak = -1
+            if previous is not None:
+                self.alerts.move_to_end(key)
+                last_urgency, last_emitted, peak = previous
+                if last_urgency == urgency and now - last_emitted < self.cooldown_seconds:
+                    self.counts['suppressed_cooldown'] += 1
+                    return 'cooldown'
+
+            if previous is not None and rank > peak:
+                self.counts['escalations'] += 1
+            elif not self._take_token((customer, channel), now):
+                self.counts['suppressed_rate_limit'] += 1
+                return 'rate_limit'
+
+            self.alerts[key] = (urgency, now, max(peak, rank))
+            self._evict(self.alerts)
+            self.counts['emitted'] += 1
+            return 'emitted'
+
+    def filter(self, customer, interventions, now=None):
+        """Interventions that should be raised for a customer - each keyed on its type and urgency"""
+        return [intervention for intervention in interventions
+                if self.should_emit(customer, intervention['type'], intervention['urgency'], now)]
+
+    def clear(self, customer, alert_type):
+        """Forget an alert once its condition resolves, so a recurrence is raised again"""
+        with self.lock:
+            self.alerts.pop((customer, alert_type), None)
+
+    def stats(self):
+        with self.lock:
+            suppressed = self.counts['suppressed_cooldown'] + self.counts['suppressed_rate_limit']
+            return {
+                'emitted': self.counts['emitted'],
+                'suppressed': suppressed,
+                'suppressed_cooldown': self.counts['suppressed_cooldown'],
+                'suppressed_rate_limit': self.counts['suppressed_rate_limit'],
+                'escalations': self.counts['escalations'],
+                'evicted': self.counts['evicted'],
+                'tracked_alerts': len(self.alerts),
+                'tracked_customers': len(self.buckets)
+            }
+
+    def trim(self, keep_ratio):
+        """Drop the least recently used alerts and buckets until keep_ratio of each is left"""
+        with self.lock:
+            self._evict(self.alerts, int(len(self.alerts) * keep_ratio))
+            self._evict(self.buckets, int(len(self.buckets) * keep_ratio))
+            # A dict keeps its capacity after pops - copying releases it
+            self.alerts = OrderedDict(self.alerts)
+            self.buckets = OrderedDict(self.buckets)
+
+    def nbytes(self):
+        with self.lock:
+            return deep_sizeof(self.alerts) + deep_sizeof(self.buckets)
+
+    def _take_token(self, bucket, now):
+        tokens, last_refill = self.buckets.get(bucket, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - last_refill) * self.refill_per_second)
+        allowed = tokens >= 1
+        self.buckets[bucket] = (tokens - 1 if allowed else tokens, now)
+        self.buckets.move_to_end(bucket)
+        self._evict(self.buckets)
+        return allowed
+
+    def _evict(self, table, limit=None):
+        limit = self.max_tracked if limit is None else limit
+        while len(table) > limit:
+            table.popitem(last=False)
+            self.counts['evicted'] += 1
+
+# Shared across sessions - alerts feed one downstream queue
+alert_suppressor = AlertSuppressor()
+memory_budget.register('caches', 'alert_suppressor', alert_suppressor.nbytes, alert_suppressor.trim)
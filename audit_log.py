@@ -0,0 +1,360 @@
+"""
+Audit Log - Append-only record of every risk evaluation and executed intervention
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from collections import Counter
+from config import AUDIT_LOG
+from memory_budget import memory_budget
+
+SEGMENT_PREFIX = 'audit-'
+
+class AuditLog:
+    """Durable log of scores and interventions, written off the request thread.
+
+    record() only appends to an in-memory buffer. A writer thread takes up
+    to BATCH_SIZE records at a time, as soon as that many are waiting or
+    once FLUSH_INTERVAL_SECONDS have passed, and appends them to the active
+    segment as JSON lines. A segment past SEGMENT_BYTES is gzipped next to a
+    small index - its time range and the line numbers of each customer's
+    records - so query() opens only the segments that can match and parses
+    only the matching lines. Segment names carry the writing process id, so several
+    serving processes can share a directory.
+    """
+
+    def __init__(self, directory=None, segment_bytes=None, batch_size=None, flush_interval=None, max_pending=None):
+        self.directory = AUDIT_LOG['DIRECTORY'] if directory is None else directory
+        self.segment_bytes = AUDIT_LOG['SEGMENT_BYTES'] if segment_bytes is None else segment_bytes
+        self.batch_size = AUDIT_LOG['BATCH_SIZE'] if batch_size is None else batch_size
+        self.flush_interval = AUDIT_LOG['FLUSH_INTERVAL_SECONDS'] if flush_interval is None else flush_interval
+        self.max_pending = AUDIT_LOG['MAX_PENDING'] if max_pending is None else max_pending
+
+        self.pending = []
+        self.accepted = 0  # Records taken into the buffer
+        self.handled = 0  # Records the writer is done with - written, or lost to a write error
+        self.flushing = 0  # Callers waiting in flush()
+        self.condition = threading.Condition()
+        self.writer = None  # Started on the first record
+        self.counts = Counter()
+
+        self.file_lock = threading.Lock()  # Active segment, its index and the index cache
+        self.active = None
+        self.active_name = None
+        self.active_bytes = 0
+        self.active_index = None
+        self.orphans_checked = False
+        self.indexes = {}  # Sealed segment name -> index, read from disk once
+
+    def record(self, kind, customer, **fields):
+        """Buffer one record - never waits on disk; False if the buffer was full and it was dropped"""
+        entry = (time.time(), kind, customer, fields)
+        with self.condition:
+            if len(self.pending) >= self.max_pending:
+                self.counts['dropped'] += 1
+                return False
+            self.pending.append(entry)
+            self.accepted += 1
+            if self.writer is None:
+                self.writer = threading.Thread(target=self._write_loop, name='audit-writer', daemon=True)
+                self.writer.start()
+                atexit.register(self.flush)
+            elif len(self.pending) == self.batch_size:
+                self.condition.notify_all()
+        return True
+
+    def flush(self):
+        """Block until every record buffered so far is on disk"""
+        with self.condition:
+            target = self.accepted
+            if self.handled >= target:
+                return
+            self.flushing += 1
+            self.condition.notify_all()
+            while self.handled < target:
+                self.condition.wait()
+            self.flushing -= 1
+
+    def rotate(self):
+        """Seal the active segment now - flushed first"""
+        self.flush()
+        with self.file_lock:
+            if self.active is not None:
+                self._seal_active()
+
+    def query(self, customer=None, start=None, end=None, kind=None):
+        """Records in write order, filtered by customer, epoch time range [start, end] and kind.
+
+        Includes everything recorded before the call, from this process and
+        any other writing to the same directory.
+        """
+        self.flush()
+        key = None if customer is None else str(customer)
+        records = []
+        for name in self._segment_names():
+            with self.file_lock:
+                if name == self.active_name:
+                    index = _index_view(self.active_index, key)
+                    data = self._read(name, self.active_bytes)
+                else:
+                    index = self._index(name)
+                    data = None
+            if index is not None and not _may_match(index, key, start, end):
+                continue
+            if data is None:
+                data = self._read(name)
+                if data is None:
+                    continue
+            lines = data.split(b'\n')
+            if index is not None and key is not None:
+                lines = [lines[line] for line in index['customers'][key]]
+            for line in lines:
+                if not line:
+                    continue
+                record = json.loads(line)
+                if ((key is None or record['customer'] is not None and str(record['customer']) == key)
+                        and (start is None or record['ts'] >= start) and (end is None or record['ts'] <= end)
+                        and (kind is None or record['kind'] == kind)):
+                    records.append(record)
+        return records
+
+    def stats(self):
+        with self.condition:
+            stats = {'accepted': self.accepted, 'written': self.handled - self.counts['lost'],
+                     'pending': self.accepted - self.handled, **self.counts}
+        with self.file_lock:
+            stats['active_bytes'] = self.active_bytes
+        return stats
+
+    def trim(self, keep_ratio):
+        """Forget the oldest cached segment indexes - they are read from disk again when needed"""
+        with self.file_lock:
+            for name in sorted(self.indexes)[:len(self.indexes) - int(len(self.indexes) * keep_ratio)]:
+                del self.indexes[name]
+                self._count('evicted')
+
+    def nbytes(self):
+        with self.file_lock:
+            indexes = list(self.indexes.values()) + ([self.active_index] if self.active_index else [])
+            # Line number slots and small ints, plus a dict entry and list per customer
+            return sum(index['count'] * 36 + len(index['customers']) * 160 for index in indexes if index)
+
+    def _count(self, key, amount=1):
+        with self.condition:
+            self.counts[key] += amount
+
+    def _write_loop(self):
+        while True:
+            with self.condition:
+                deadline = time.monotonic() + self.flush_interval
+                while len(self.pending) < self.batch_size and not (self.flushing and self.pending):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                # At most a batch at a time, so a segment overshoots SEGMENT_BYTES by one batch at most
+                batch = self.pending[:self.batch_size]
+                del self.pending[:self.batch_size]
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    print(f"Audit Error: {e}")
+                    self._count('lost', len(batch))
+            with self.condition:
+                self.handled += len(batch)
+                self.counts['batches'] += bool(batch)
+                self.condition.notify_all()
+
+    def _write(self, batch):
+        lines = [json.dumps({'ts': timestamp, 'kind': kind, 'customer': customer, **fields},
+                            separators=(',', ':'), default=_plain)
+                 for timestamp, kind, customer, fields in batch]
+        data = ('\n'.join(lines) + '\n').encode()
+        with self.file_lock:
+            if self.active is None:
+                self._open_segment()
+            index = self.active_index
+            customers = index['customers']
+            line = index['count']
+            for timestamp, _, customer, _ in batch:
+                customers.setdefault(_customer_key(customer), []).append(line)
+                line += 1
+            timestamps = [entry[0] for entry in batch]
+            index['first_ts'] = min(timestamps) if index['first_ts'] is None else min(index['first_ts'], *timestamps)
+            index['last_ts'] = max(timestamps) if index['last_ts'] is None else max(index['last_ts'], *timestamps)
+            index['count'] = line
+            self.active.write(data)
+            self.active.flush()
+            self.active_bytes += len(data)
+            if self.active_bytes >= self.segment_bytes:
+                self._seal_active()
+
+    def _open_segment(self):
+        os.makedirs(self.directory, exist_ok=True)
+        if not self.orphans_checked:
+            self._seal_orphans()
+            self.orphans_checked = True
+        self.active_name = f"{SEGMENT_PREFIX}{time.time_ns() // 1000:017d}-{os.getpid()}"
+        self.active = open(self._path(self.active_name, '.jsonl'), 'ab')
+        self.active_bytes = 0
+        self.active_index = _new_index()
+
+    def _seal_active(self):
+        self.active.close()
+        self._seal(self.active_name, self.active_index)
+        self.active = None
+        self.active_name = None
+        self.active_index = None
+        self.active_bytes = 0
+
+    def _seal(self, name, index):
+        """Compress a finished segment and write its index - the plain file goes last, so a crash loses nothing"""
+        import gzip
+
+        plain, compressed = self._path(name, '.jsonl'), self._path(name, '.jsonl.gz')
+        with open(plain, 'rb') as source:
+            data = source.read()
+        with gzip.open(compressed + '.tmp', 'wb', compresslevel=6) as target:
+            target.write(data)
+        os.replace(compressed + '.tmp', compressed)
+        with open(self._path(name, '.idx.json') + '.tmp', 'w') as f:
+            json.dump(index, f, separators=(',', ':'))
+        os.replace(self._path(name, '.idx.json') + '.tmp', self._path(name, '.idx.json'))
+        os.remove(plain)
+        self.indexes[name] = index
+        self._count('segments')
+        self._count('compressed_bytes', os.path.getsize(compressed))
+        self._count('raw_bytes', len(data))
+
+    def _seal_orphans(self):
+        """Seal plain segments left by processes that have exited"""
+        for name in self._segment_names():
+            pid = _segment_pid(name)
+            if pid == os.getpid() or _process_alive(pid) or not os.path.exists(self._path(name, '.jsonl')):
+                continue
+            data = self._read(name)
+            try:
+                with open(self._path(name, '.jsonl'), 'r+b') as f:
+                    f.truncate(len(data))  # Drop a partly written last line
+                self._seal(name, _scan_index(data))
+                self._count('orphans_sealed')
+            except OSError:
+                pass  # Another process got to it first
+
+    def _index(self, name):
+        index = self.indexes.get(name)
+        if index is None:
+            try:
+                with open(self._path(name, '.idx.json')) as f:
+                    index = self.indexes[name] = json.load(f)
+            except FileNotFoundError:
+                return None  # Still being written by another process - scanned in full
+        return index
+
+    def _read(self, name, size=None):
+        """Segment contents up to the last complete line - None if it is gone"""
+        compressed = self._path(name, '.jsonl.gz')
+        for path in [compressed, self._path(name, '.jsonl'), compressed]:  # Sealed by another process while we looked
+            try:
+                if path == compressed:
+                    import gzip
+                    with gzip.open(path, 'rb') as f:
+                        return f.read()
+                with open(path, 'rb') as f:
+                    data = f.read() if size is None else f.read(size)
+                return data[:data.rfind(b'\n') + 1]
+            except FileNotFoundError:
+                continue
+        return None
+
+    def _segment_names(self):
+        if not os.path.isdir(self.directory):
+            return []
+        names = {entry.split('.', 1)[0] for entry in os.listdir(self.directory)
+                 if entry.startswith(SEGMENT_PREFIX) and entry.endswith(('.jsonl', '.jsonl.gz'))}
+        return sorted(names)
+
+    def _path(self, name, suffix):
+        return os.path.join(self.directory, name + suffix)
+
+def _new_index():
+    return {'count': 0, 'first_ts': None, 'last_ts': None, 'customers': {}}
+
+def _customer_key(customer):
+    return '' if customer is None else str(customer)
+
+def _scan_index(data):
+    index = _new_index()
+    for line, text in enumerate(data.split(b'\n')[:-1]):
+        record = json.loads(text)
+        index['customers'].setdefault(_customer_key(record['customer']), []).append(line)
+        index['first_ts'] = record['ts'] if index['first_ts'] is None else min(index['first_ts'], record['ts'])
+        index['last_ts'] = record['ts'] if index['last_ts'] is None else max(index['last_ts'], record['ts'])
+        index['count'] += 1
+    return index
+
+def _index_view(index, key):
+    """The parts of the active index a query needs, copied while the writer is held off"""
+    if index is None:
+        return _new_index()
+    customers = {key: list(index['customers'][key])} if key in index['customers'] else {}
+    return {**index, 'customers': customers}
+
+def _may_match(index, key, start, end):
+    if not index['count']:
+        return False
+    if start is not None and index['last_ts'] < start:
+        return False
+    if end is not None and index['first_ts'] > end:
+        return False
+    return key is None or key in index['customers']
+
+def _segment_pid(name):
+    try:
+        return int(name.rsplit('-', 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+def _process_alive(pid):
+    if pid is None or os.name != 'posix':
+        return True  # Unknown owner - leave the segment plain rather than seal it under a writer
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+def _plain(value):
+    """numpy scalars as their Python value"""
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+# Shared by every session and scoring thread in the process
+audit_log = AuditLog()
+memory_budget.register('caches', 'audit_index', audit_log.nbytes, audit_log.trim)
+
+def main(argv=None):
+    import argparse
+    from datetime import datetime
+
+    parser = argparse.ArgumentParser(description="Read the audit log")
+    parser.add_argument('--directory', default=AUDIT_LOG['DIRECTORY'])
+    parser.add_argument('--customer')
+    parser.add_argument('--start', help="ISO date or time, e.g. 2026-10-01 or 2026-10-01T09:00")
+    parser.add_argument('--end')
+    parser.add_argument('--kind', choices=['score', 'intervention'])
+    args = parser.parse_args(argv)
+
+    epoch = lambda value: None if value is None else datetime.fromisoformat(value).timestamp()
+    for record in AuditLog(args.directory).query(args.customer, epoch(args.start), epoch(args.end), args.kind):
+        print(json.dumps(record))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,215 @@
+"""
+Batch Score - Score a CSV or Parquet file of profiles and session aggregates without the UI
+
+    python batch_score.py sessions.csv scored.csv
+    python batch_score.py sessions.parquet scored.parquet --chunk-size 50000 --workers 4
+
+Each input row holds a customer's profile fields (age, income, profession,
+risk_category, avg_session, work_stress, support_contacts, financial_stress)
+and session aggregates (total_deposits, deposit_count, wagered, wager_count,
+session_time, location, support_calls). The optional columns listed in
+fixed_ml_system.feature_matrix are used when present, and a customer_id
+column is carried through. Rows are read, scored and written one chunk at a
+time, so memory stays flat however large the file is.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter, deque
+from config import BATCH_SCORING, TRAINER
+from rule_engine import LEVEL_NAMES
+
+REQUIRED_COLUMNS = ['age', 'income', 'risk_category', 'avg_session', 'support_contacts', 'financial_stress',
+                    'total_deposits', 'deposit_count', 'wagered', 'wager_count', 'session_time', 'location',
+                    'support_calls']
+
+def read_chunks(path, chunk_size):
+    """DataFrames of at most chunk_size rows"""
+    import pandas as pd
+
+    if path.endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet files need pyarrow: pip install pyarrow") from e
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+class ChunkWriter:
+    """Appends scored chunks to a temporary file that replaces the output once all rows are written"""
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.parquet = path.endswith('.parquet')
+        self.writer = None
+        self.rows = 0
+
+    def write(self, frame):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.tmp_path, table.schema)
+            self.writer.write_table(table)
+        else:
+            frame.to_csv(self.tmp_path, mode='a' if self.rows else 'w', header=not self.rows, index=False)
+        self.rows += len(frame)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        if os.path.exists(self.tmp_path):
+            os.replace(self.tmp_path, self.path)
+
+    def discard(self):
+        """Drop a partial run and leave any previous output untouched"""
+        if self.writer is not None:
+            self.writer.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+def load_scoring_model(path=None):
+    """The model to score with - an explicit artifact, the trainer's published version, the app's saved model,
+    or failing those a model fitted on the seed samples in memory"""
+    from compact_model import CompactRidge
+    from fixed_ml_system import FEATURE_NAMES, FixedCustomerRiskML
+    from model_registry import read_manifest
+
+    if path:
+        model = CompactRidge.load(path)
+        if model.feature_names != FEATURE_NAMES:
+            raise ValueError(f"{path} was trained on a different feature set")
+        return model
+
+    candidates = []
+    manifest = read_manifest(TRAINER['MANIFEST_PATH'])
+    if manifest and manifest.get('global'):
+        candidates.append(os.path.join(os.path.dirname(TRAINER['MANIFEST_PATH']), manifest['global']))
+    candidates.append('fixed_risk_model.npz')
+    for candidate in candidates:
+        if os.path.exists(candidate):
+            model = CompactRidge.load(candidate)
+            if model.feature_names == FEATURE_NAMES:
+                return model
+    # External mode fits the seed model without writing any files
+    return FixedCustomerRiskML(training_mode='external').model
+
+def load_cohorts(path=None):
+    """Behavioural cohorts to score with - an explicit file, the app's saved cohorts, or those fitted on the seed samples"""
+    from cohort_clustering import CohortModel
+    from fixed_ml_system import BASE_FEATURE_NAMES, FixedCustomerRiskML
+
+    if path:
+        cohorts = CohortModel.load(path)
+        if cohorts.feature_names != BASE_FEATURE_NAMES:
+            raise ValueError(f"{path} was clustered on a different feature set")
+        return cohorts
+    if os.path.exists('fixed_cohorts.npz'):
+        cohorts = CohortModel.load('fixed_cohorts.npz')
+        if cohorts.feature_names == BASE_FEATURE_NAMES:
+            return cohorts
+    return FixedCustomerRiskML(training_mode='external').cohorts
+
+# Per-process scoring state, set by init_scorer
+_scorer = {}
+
+def init_scorer(model, segments=True, cohorts=None):
+    from fixed_ml_system import FEATURE_NAMES
+    from model_registry import ModelRegistry, read_manifest
+    _scorer['model'] = model
+    _scorer['registry'] = None
+    if segments:
+        # Segment versions published by the trainer are found through its manifest
+        _scorer['registry'] = ModelRegistry(FEATURE_NAMES)
+        _scorer['registry'].invalidate((read_manifest(TRAINER['MANIFEST_PATH']) or {}).get('segments', {}))
+    _scorer['cohorts'] = cohorts
+
+def score_chunk(frame):
+    """Scored output rows for one input chunk"""
+    import pandas as pd
+    from risk_engine import score_batch
+
+    missing = [name for name in REQUIRED_COLUMNS if name not in frame.columns]
+    if missing:
+        raise ValueError(f"Input is missing columns: {', '.join(missing)}")
+    columns = {name: frame[name].to_numpy() for name in frame.columns}
+    result = pd.DataFrame(score_batch(columns, _scorer['model'], _scorer['registry'], _scorer['cohorts']))
+    if 'customer_id' in frame.columns:
+        result.insert(0, 'customer_id', frame['customer_id'].to_numpy())
+    return result
+
+def run(input_path, output_path, chunk_size=None, workers=None, model_path=None, segments=True, progress=sys.stderr,
+        cohorts_path=None):
+    """Score input_path into output_path - returns row, timing and level totals.
+
+    With workers > 1 chunks are scored in a process pool; at most two chunks per
+    worker are in flight and results are written in input order.
+    """
+    chunk_size = chunk_size or BATCH_SCORING['CHUNK_SIZE']
+    workers = workers or BATCH_SCORING['WORKERS']
+    model = load_scoring_model(model_path)
+    cohorts = load_cohorts(cohorts_path)
+    writer = ChunkWriter(output_path)
+    levels = Counter()
+    start = time.perf_counter()
+
+    def write(scored):
+        writer.write(scored)
+        levels.update(scored['level'].tolist())
+        if progress is not None:
+            elapsed = time.perf_counter() - start
+            print(f"{writer.rows:,} rows scored ({writer.rows / max(elapsed, 1e-9):,.0f} rows/s)", file=progress)
+
+    try:
+        if workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_scorer, initargs=(model, segments, cohorts)) as pool:
+                pending = deque()
+                for frame in read_chunks(input_path, chunk_size):
+                    pending.append(pool.submit(score_chunk, frame))
+                    if len(pending) >= 2 * workers:
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+        else:
+            init_scorer(model, segments, cohorts)
+            for frame in read_chunks(input_path, chunk_size):
+                write(score_chunk(frame))
+    except BaseException:
+        writer.discard()
+        raise
+    writer.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        'rows': writer.rows,
+        'seconds': round(elapsed, 3),
+        'rows_per_sec': int(writer.rows / elapsed) if elapsed > 0 else 0,
+        'levels': {name: levels[name] for name in LEVEL_NAMES}
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python batch_score.py', description='Score a file of customer sessions')
+    parser.add_argument('input', help='CSV or Parquet file of profiles and session aggregates')
+    parser.add_argument('output', help='Where to write scores - .csv or .parquet')
+    parser.add_argument('--chunk-size', type=int, default=BATCH_SCORING['CHUNK_SIZE'], help='Rows read and scored at a time')
+    parser.add_argument('--workers', type=int, default=BATCH_SCORING['WORKERS'], help='Scoring processes (1 scores in this process)')
+    parser.add_argument('--model', help='Model artifact (.npz) - defaults to the published or saved model')
+    parser.add_argument('--cohorts', help='Cohort centroids (.npz) - defaults to the app\'s saved cohorts')
+    parser.add_argument('--no-segments', action='store_true', help='Score every row with the global model')
+    parser.add_argument('--quiet', action='store_true', help='No per-chunk progress')
+    args = parser.parse_args(argv)
+
+    stats = run(args.input, args.output, args.chunk_size, args.workers, args.model,
+                segments=not args.no_segments, progress=None if args.quiet else sys.stderr, cohorts_path=args.cohorts)
+    print(f"Scored {stats['rows']:,} rows in {stats['seconds']}s ({stats['rows_per_sec']:,} rows/s) - "
+          + ", ".join(f"{level} {count:,}" for level, count in stats['levels'].items()))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""
+Benchmarks - Throughput and latency checks for the hot paths
+
+Run all:  python benchmarks.py
+Run one:  python benchmarks.py loss_chasing
+"""
+import ast
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+BENCHMARKS = {}
+
+def benchmark(name):
+    """Register a benchmark; it returns a dict of results and may raise AssertionError on regression"""
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+@benchmark('loss_chasing')
+def bench_loss_chasing(events=2_000_000, customers=20_000, days=30, seed=42):
+    """Loss-chasing detector throughput over a synthetic mixed event stream, and the share of customers it flags.
+
+    Customers deposit gamma(2, 25) and stake gamma(2, 5), so stakes roughly
+    balance deposits, with their events spread over `days` days. Nothing in
+    the stream is loss chasing, so flagged_share is the false-positive rate
+    of the LOSS_CHASING thresholds.
+    """
+    from loss_chasing import LossChasingMonitor
+    
+    rng = np.random.default_rng(seed)
+    customer_ids = rng.integers(0, customers, events).tolist()
+    is_deposit = rng.random(events) < 0.2
+    amounts = np.where(is_deposit, rng.gamma(2.0, 25.0, events), rng.gamma(2.0, 5.0, events)).tolist()
+    is_deposit = is_deposit.tolist()
+    timestamps = np.cumsum(rng.integers(0, 2 * days * 86_400_000 // events, events)).tolist()
+    
+    monitor = LossChasingMonitor()
+    start = time.perf_counter()
+    for customer_id, deposit, amount, timestamp_ms in zip(customer_ids, is_deposit, amounts, timestamps):
+        monitor.process(customer_id, 'deposit' if deposit else 'wager', amount, timestamp_ms)
+    elapsed = time.perf_counter() - start
+    flagged = len(monitor.flagged_customers())
+    
+    return {
+        'events': events,
+        'seconds': round(elapsed, 3),
+        'events_per_sec': int(events / elapsed),
+        'us_per_event': round(elapsed / events * 1e6, 3),
+        'flagged_customers': flagged,
+        'flagged_share': round(flagged / len(monitor.detectors), 3)
+    }
+
+@benchmark('model_selection')
+def bench_model_selection(features=27, repeats=20, seed=42):
+    """Closed-form LOO alpha search at the inline buffer and trainer window sizes, against the retrain time budget"""
+    from config import MODEL_SELECTION, TRAINING_BUFFER, TRAINER
+    from model_selection import ridge_loo
+    
+    rng = np.random.default_rng(seed)
+    result = {'alphas': len(MODEL_SELECTION['ALPHAS']), 'budget_ms': MODEL_SELECTION['TIME_BUDGET_MS']}
+    for label, samples in [('inline', TRAINING_BUFFER['MAX_SAMPLES']), ('trainer', TRAINER['WINDOW'])]:
+        X = rng.normal(size=(samples, features))
+        y = X @ rng.normal(size=features) + rng.normal(size=samples)
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            selection = ridge_loo(X, y, MODEL_SELECTION['ALPHAS'], MODEL_SELECTION['TIME_BUDGET_MS'])
+            timings.append((time.perf_counter() - start) * 1000)
+        median_ms = float(np.median(timings))
+        result[f'{label}_samples'] = samples
+        result[f'{label}_median_ms'] = round(median_ms, 3)
+        result[f'{label}_alphas_scored'] = len(selection.alpha_scores)
+        assert median_ms <= MODEL_SELECTION['TIME_BUDGET_MS'], \
+            f"{label} selection took {median_ms:.1f} ms, budget {MODEL_SELECTION['TIME_BUDGET_MS']} ms"
+    return result
+
+@benchmark('similarity')
+def bench_similarity(profiles=1_000_000, queries=500, seed=42):
+    """Similar-customer k-NN latency and recall over a million synthetic profiles, against the query budget"""
+    from config import SIMILARITY
+    from fixed_ml_system import FEATURE_NAMES, feature_matrix
+    from similarity_index import SimilarityIndex
+    
+    rng = np.random.default_rng(seed)
+    income = rng.integers(15000, 120000, profiles)
+    X = feature_matrix({
+        'age': rng.integers(21, 75, profiles), 'income': income,
+        'profession': rng.choice(['Teacher', 'Executive', 'Business Owner', 'Nurse'], profiles),
+        'work_stress': rng.choice(['Low', 'Medium', 'High', 'Very High'], profiles),
+        'financial_stress': rng.integers(1, 11, profiles),
+        'total_deposits': rng.gamma(2.0, 200.0, profiles), 'deposit_count': rng.integers(0, 30, profiles),
+        'wagered': rng.gamma(2.0, 300.0, profiles), 'wager_count': rng.integers(0, 60, profiles),
+        'session_time': rng.integers(10, 400, profiles), 'support_calls': rng.integers(0, 5, profiles),
+        'location': rng.choice(['Home', 'Work', 'Casino', 'Betting Shop'], profiles)
+    })
+    
+    index = SimilarityIndex(FEATURE_NAMES)
+    start = time.perf_counter()
+    index.add_many(X[:-SIMILARITY['DELTA_MAX'] // 2], np.zeros(profiles - SIMILARITY['DELTA_MAX'] // 2))
+    index.wait()
+    index.rebuild()
+    build_seconds = time.perf_counter() - start
+    index.add_many(X[-SIMILARITY['DELTA_MAX'] // 2:], np.zeros(SIMILARITY['DELTA_MAX'] // 2))  # A half-full delta
+    
+    targets = X[rng.integers(0, profiles, queries)] * rng.normal(1.0, 0.02, (queries, X.shape[1]))
+    timings = []
+    for target in targets:
+        start = time.perf_counter()
+        index.query(target)
+        timings.append((time.perf_counter() - start) * 1000)
+    median_ms = float(np.median(timings))
+    
+    # Recall against an exact search on a sample of the queries
+    approximate = [{match['distance'] for match in index.query(target)} for target in targets[:50]]
+    index.eps = 0
+    recall = np.mean([len(found & {match['distance'] for match in index.query(target)}) / SIMILARITY['K']
+                      for found, target in zip(approximate, targets[:50])])
+    
+    result = {
+        'profiles': profiles, 'backend': index.backend, 'build_seconds': round(build_seconds, 2),
+        'median_query_ms': round(median_ms, 3), 'p99_query_ms': round(float(np.percentile(timings, 99)), 3),
+        'recall': round(float(recall), 3), 'megabytes': round(index.nbytes / 2 ** 20), 'budget_ms': SIMILARITY['QUERY_BUDGET_MS']
+    }
+    assert median_ms <= SIMILARITY['QUERY_BUDGET_MS'], \
+        f"k-NN query took {median_ms:.2f} ms, budget {SIMILARITY['QUERY_BUDGET_MS']} ms"
+    return result
+
+@benchmark('audit_log')
+def bench_audit_log(records=200_000, threads=4, customers=5_000, seed=42):
+    """Audit log throughput from several recording threads to compressed segments, and the cost of one record() call"""
+    import threading
+    from config import AUDIT_LOG
+    from audit_log import AuditLog
+    
+    rng = np.random.default_rng(seed)
+    customer_ids = [f"C{i}" for i in rng.integers(0, customers, records)]
+    scores = rng.integers(0, 101, records).tolist()
+    per_thread = records // threads
+    timings = []
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        log = AuditLog(tmp)
+        
+        def run(part):
+            sample = []
+            for i in range(part * per_thread, (part + 1) * per_thread):
+                start = time.perf_counter()
+                log.record('score', customer_ids[i], model_version=7, score=scores[i], level='LOW',
+                           rule_score=scores[i], ml_score=scores[i], ml_method='ml_prediction', fallback=None)
+                if i % 100 == 0:
+                    sample.append(time.perf_counter() - start)
+            timings.extend(sample)
+        
+        start = time.perf_counter()
+        workers = [threading.Thread(target=run, args=(part,)) for part in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        log.rotate()
+        elapsed = time.perf_counter() - start
+        
+        stats = log.stats()
+        query_start = time.perf_counter()
+        found = len(log.query(customer_ids[0]))
+        query_ms = (time.perf_counter() - query_start) * 1000
+    
+    records_per_sec = stats['written'] / elapsed
+    result = {
+        'records': stats['written'], 'dropped': stats.get('dropped', 0), 'segments': stats['segments'],
+        'records_per_sec': int(records_per_sec), 'record_p99_us': round(float(np.percentile(timings, 99)) * 1e6, 1),
+        'compression': round(stats['raw_bytes'] / stats['compressed_bytes'], 1),
+        'customer_query_ms': round(query_ms, 1), 'customer_records': found, 'floor': AUDIT_LOG['MIN_RECORDS_PER_SEC']
+    }
+    assert records_per_sec >= AUDIT_LOG['MIN_RECORDS_PER_SEC'], \
+        f"audit log wrote {records_per_sec:,.0f} records/s, floor {AUDIT_LOG['MIN_RECORDS_PER_SEC']:,}"
+    return result
+
+def first_paint_modules(path='clean_logic_app.py'):
+    """Modules the dashboard imports at the top level, plus the model module its first paint scores with"""
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), path)) as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            modules.append(node.module)
+    return modules + ['fixed_ml_system']
+
+def import_profile(modules, then=''):
+    """Import modules in a fresh interpreter under `-X importtime`, then run `then`.
+
+    Runs in a scratch directory so anything `then` writes stays out of the tree.
+    Returns ({top-level import: cumulative ms}, sorted names in sys.modules).
+    """
+    script = '\n'.join([*(f'import {module}' for module in modules), then,
+                        'import sys, json', 'print(json.dumps(sorted(sys.modules)))'])
+    root = os.path.dirname(os.path.abspath(__file__))
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')]))}
+    with tempfile.TemporaryDirectory() as tmp:
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', script], cwd=tmp, env=env,
+                                capture_output=True, text=True, check=True)
+    
+    timings = {}
+    for line in result.stderr.splitlines():
+        parts = line.split('|')
+        if not line.startswith('import time:') or len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        if not name.startswith('  '):  # Nested imports are indented under their parent
+            timings[name.strip()] = int(parts[1]) / 1000
+    return timings, json.loads(result.stdout.splitlines()[-1])
+
+@benchmark('startup')
+def bench_startup(top=8):
+    """Import cost of the dashboard's first paint - fails if it loads a deferred module or exceeds the budget"""
+    from config import STARTUP
+    
+    timings, loaded = import_profile(first_paint_modules(), 'fixed_ml_system.get_fixed_ml()')
+    total_ms = sum(timings.values())
+    result = {'total_ms': round(total_ms, 1), 'budget_ms': STARTUP['IMPORT_BUDGET_MS'], 'modules_loaded': len(loaded)}
+    for name, ms in sorted(timings.items(), key=lambda item: -item[1])[:top]:
+        result[name] = f"{ms:.1f}ms"
+    
+    deferred = [name for name in STARTUP['DEFERRED_MODULES'] if name in loaded]
+    assert not deferred, f"first paint imports {', '.join(deferred)}"
+    assert total_ms <= STARTUP['IMPORT_BUDGET_MS'], \
+        f"first paint imports took {total_ms:.0f} ms, budget {STARTUP['IMPORT_BUDGET_MS']} ms"
+    return result
+
+def main(names):
+    failed = False
+    for name in names or list(BENCHMARKS):
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark: {name} (available: {', '.join(BENCHMARKS)})")
+            failed = True
+            continue
+        try:
+            result = BENCHMARKS[name]()
+            print(f"{name}: " + ", ".join(f"{key}={value}" for key, value in result.items()))
+        except AssertionError as e:
+            print(f"{name}: REGRESSION - {e}")
+            failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
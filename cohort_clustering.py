@@ -0,0 +1,155 @@
+"""
+Cohort Clustering - Behavioural cohorts from streaming mini-batch k-means over scored feature vectors
+"""
+import os
+import threading
+import numpy as np
+from config import COHORTS
+
+class CohortModel:
+    """k behavioural cohorts, each a centroid in standardized feature space.
+
+    Assigning a vector is one distance per centroid - O(k*d). Learning is
+    mini-batch k-means: vectors are buffered and every BATCH_SIZE of them
+    moves each centroid toward the mean of its members in the batch, by the
+    batch's share of everything the centroid has seen. That share is capped
+    at MAX_WEIGHT vectors, so steps never shrink to nothing and cohorts follow
+    changes in behaviour. Each cohort also keeps the running mean risk score
+    of its members, the cohort_risk model feature. Only outcome-labeled
+    vectors move it - a vector observed without a score moves the centroids
+    alone, so the model's own predictions never feed back into one of its
+    features. The scaler is fixed when the cohorts are first fitted, so a
+    cohort id keeps its meaning.
+    """
+
+    def __init__(self, feature_names, mean, scale, centroids, counts=None, risk=None, version=0):
+        self.feature_names = list(feature_names)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.centroids = np.asarray(centroids, dtype=np.float64)
+        k = len(self.centroids)
+        self.counts = np.zeros(k) if counts is None else np.asarray(counts, dtype=np.float64)
+        self.risk = np.full(k, 50.0) if risk is None else np.asarray(risk, dtype=np.float64)
+        self.version = int(version)
+        self.pending = []
+        self.lock = threading.Lock()
+
+    @classmethod
+    def fit(cls, X, scores, feature_names, k=None, iterations=None, seed=0):
+        """Cohorts for an initial batch - k-means++ seeding, then Lloyd iterations"""
+        X = np.asarray(X, dtype=np.float64)
+        scores = np.asarray(scores, dtype=np.float64)
+        mean = X.mean(axis=0)
+        scale = X.std(axis=0)
+        scale[scale == 0] = 1.0
+        Z = (X - mean) / scale
+        k = min(COHORTS['K'] if k is None else k, len(Z))
+        rng = np.random.default_rng(seed)
+
+        centroids = [Z[rng.integers(len(Z))]]
+        for _ in range(1, k):
+            squared = ((Z[:, None, :] - np.array(centroids)[None]) ** 2).sum(axis=2).min(axis=1)
+            centroids.append(Z[rng.choice(len(Z), p=squared / squared.sum())] if squared.sum() > 0 else Z[rng.integers(len(Z))])
+        centroids = np.array(centroids)
+
+        for _ in range(COHORTS['INIT_ITERATIONS'] if iterations is None else iterations):
+            labels = _nearest(Z, centroids)
+            moved = np.array([Z[labels == c].mean(axis=0) if np.any(labels == c) else centroids[c] for c in range(k)])
+            if np.allclose(moved, centroids):
+                break
+            centroids = moved
+
+        labels = _nearest(Z, centroids)
+        counts = np.bincount(labels, minlength=k).astype(np.float64)
+        risk = np.bincount(labels, weights=scores, minlength=k) / np.maximum(counts, 1)
+        risk[counts == 0] = scores.mean() if len(scores) else 50.0
+        return cls(feature_names, mean, scale, centroids, np.minimum(counts, COHORTS['MAX_WEIGHT']), risk)
+
+    def assign(self, X):
+        """Cohort id of one vector, or an array of ids for a matrix"""
+        X = np.asarray(X, dtype=np.float64)
+        labels = _nearest(np.atleast_2d((X - self.mean) / self.scale), self.centroids)
+        return int(labels[0]) if X.ndim == 1 else labels
+
+    def cohort_risk(self, X):
+        """Mean member risk of each vector's cohort"""
+        return self.risk[self.assign(X)]
+
+    def observe(self, vector, score=None):
+        """Buffer one vector, with its outcome score if it has one - the centroids move once BATCH_SIZE have arrived"""
+        with self.lock:
+            self.pending.append((vector, score))
+            if len(self.pending) < COHORTS['BATCH_SIZE']:
+                return False
+            batch, self.pending = self.pending, []
+            self.partial_fit([vector for vector, _ in batch], [np.nan if score is None else score for _, score in batch])
+            return True
+
+    def partial_fit(self, X, scores):
+        """One mini-batch k-means step - new arrays are swapped in whole, so concurrent assigns see a consistent model.
+
+        A NaN score marks an unlabeled vector: it moves its centroid but not the cohort's risk.
+        """
+        Z = (np.atleast_2d(np.asarray(X, dtype=np.float64)) - self.mean) / self.scale
+        scores = np.asarray(scores, dtype=np.float64)
+        labeled = ~np.isnan(scores)
+        k = len(self.centroids)
+        labels = _nearest(Z, self.centroids)
+        batch_counts = np.bincount(labels, minlength=k).astype(np.float64)
+        members = batch_counts > 0
+
+        counts = np.minimum(self.counts + batch_counts, COHORTS['MAX_WEIGHT'])
+        step = np.where(members, batch_counts / np.maximum(counts, 1), 0.0)
+        batch_means = np.zeros_like(self.centroids)
+        np.add.at(batch_means, labels, Z)
+        batch_means[members] /= batch_counts[members, None]
+        labeled_counts = np.bincount(labels[labeled], minlength=k).astype(np.float64)
+        risk_members = labeled_counts > 0
+        risk_step = np.where(risk_members, labeled_counts / np.maximum(counts, 1), 0.0)
+        batch_risk = np.bincount(labels[labeled], weights=scores[labeled], minlength=k).astype(np.float64)
+        batch_risk[risk_members] /= labeled_counts[risk_members]
+
+        self.centroids = self.centroids + step[:, None] * (batch_means - self.centroids)
+        self.risk = self.risk + risk_step * (batch_risk - self.risk)
+        self.counts = counts
+        self.version += 1
+
+    def __getstate__(self):
+        # Sent to batch scoring workers - the lock and unapplied batch stay behind
+        return {name: value for name, value in vars(self).items() if name not in ('lock', 'pending')}
+
+    def __setstate__(self, state):
+        vars(self).update(state)
+        self.pending = []
+        self.lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        return self.mean.nbytes + self.scale.nbytes + self.centroids.nbytes + self.counts.nbytes + self.risk.nbytes
+
+    def stats(self):
+        return {
+            'cohorts': len(self.centroids),
+            'version': self.version,
+            'sizes': self.counts.astype(int).tolist(),
+            'risk': [round(value, 1) for value in self.risk.tolist()]
+        }
+
+    def save(self, path):
+        """Write atomically, in the same uncompressed .npz layout as CompactRidge"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, feature_names=np.array(self.feature_names), mean=self.mean, scale=self.scale,
+                     centroids=self.centroids, counts=self.counts, risk=self.risk, meta=np.array([self.version]))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['feature_names'].tolist(), data['mean'], data['scale'], data['centroids'],
+                       data['counts'], data['risk'], int(data['meta'][0]))
+
+def _nearest(Z, centroids):
+    """Index of the nearest centroid per row: |z|^2 is the same for every centroid, so compare |c|^2 - 2 z.c"""
+    return np.argmin((centroids ** 2).sum(axis=1) - 2 * Z @ centroids.T, axis=1)
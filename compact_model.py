@@ -0,0 +1,64 @@
+"""
+Compact Model - Scaler plus ridge weights as plain arrays, saved as a small .npz
+"""
+import os
+import numpy as np
+
+class CompactRidge:
+    """A fitted StandardScaler + Ridge pair reduced to four arrays.
+
+    Prediction is one subtract, divide and dot product, so serving needs
+    numpy only. Artifacts are uncompressed .npz files of a few hundred
+    bytes that load without unpickling.
+    """
+    __slots__ = ('feature_names', 'mean', 'scale', 'coef', 'intercept', 'version', 'samples')
+
+    def __init__(self, feature_names, mean, scale, coef, intercept, version=0, samples=0):
+        self.feature_names = list(feature_names)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.version = int(version)
+        self.samples = int(samples)
+
+    @classmethod
+    def from_sklearn(cls, scaler, model, feature_names, version=0, samples=0):
+        return cls(feature_names, scaler.mean_, scaler.scale_, model.coef_, model.intercept_, version, samples)
+
+    @classmethod
+    def fit(cls, X, y, feature_names, alpha=0.1, version=0):
+        """Standardize and fit a ridge model in closed form"""
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        mean = X.mean(axis=0)
+        scale = X.std(axis=0)
+        scale[scale == 0] = 1.0
+        Z = (X - mean) / scale
+        y_mean = y.mean()
+        coef = np.linalg.solve(Z.T @ Z + alpha * np.eye(Z.shape[1]), Z.T @ (y - y_mean))
+        return cls(feature_names, mean, scale, coef, y_mean, version, len(y))
+
+    def predict(self, X):
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        return ((X - self.mean) / self.scale) @ self.coef + self.intercept
+
+    @property
+    def nbytes(self):
+        return self.mean.nbytes + self.scale.nbytes + self.coef.nbytes + sum(len(name) for name in self.feature_names)
+
+    def save(self, path):
+        """Write atomically so a reader never sees a partial artifact"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, feature_names=np.array(self.feature_names), mean=self.mean, scale=self.scale,
+                     coef=self.coef, meta=np.array([self.intercept, self.version, self.samples]))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            intercept, version, samples = data['meta'].tolist()
+            return cls(data['feature_names'].tolist(), data['mean'], data['scale'], data['coef'],
+                       intercept, version, samples)
@@ -41,4 +41,208 @@ PROFILE_MULTIPLIERS = {
     'Critical': {'deposit': 1.4, 'spending': 1.3, 'support': 1.2, 'overall': 1.2},
     'High': {'deposit': 1.2, 'spending': 1.1, 'support': 1.0, 'overall': 1.1},
     'Medium': {'deposit': 1.0, 'spending': 1.0, 'support': 1.0, 'overall': 1.0}
-}
\ No newline at end of file
+}
+
+# Per-session memory ceilings
+SESSION_LIMITS = {
+    'MAX_LEDGER_EVENTS': 500,
+    'MAX_INTERVENTION_LOG': 100,
+    'MAX_LOCATION_HISTORY': 50,
+    'LOCATION_RATE_WINDOW_MS': 60 * 60 * 1000
+}
+
+# Sliding windows for velocity features: name -> (window length ms, bucket count)
+VELOCITY_WINDOWS = {
+    '15m': (15 * 60 * 1000, 15),
+    '1h': (60 * 60 * 1000, 60),
+    '24h': (24 * 60 * 60 * 1000, 96),
+    '30d': (30 * 24 * 60 * 60 * 1000, 30)
+}
+
+# Loss-chasing detection
+LOSS_CHASING = {
+    'DEPLETION_RATIO': 0.1,  # Balance at or below 10% of its peak counts as depleted
+    'ESCALATION_FACTOR': 1.5,  # Stake at least 1.5x the previous one is an escalation
+    'ESCALATION_RUN': 3,  # Consecutive escalations before flagging - at 2, ~6% of customers with random stakes trip it
+    'RAPID_REDEPOSIT_MS': 10 * 60 * 1000,
+    'RAPID_REDEPOSIT_RUN': 2,  # Back-to-back rapid re-deposits before flagging
+    'MAX_TRACKED': 100000  # Customers a LossChasingMonitor keeps detectors for before the least recent is evicted
+}
+
+# Customer picker - ids sent to the browser per page
+CUSTOMER_SEARCH = {
+    'PAGE_SIZE': 25
+}
+
+# Intervention decision table - a rule fires when its factor reaches the threshold;
+# urgency and action are picked by the overall risk level (LOW, MEDIUM, HIGH, CRITICAL)
+INTERVENTION_RULES = [
+    {'type': 'Deposit Controls', 'factor': 'Deposit', 'threshold': RISK_THRESHOLDS['DEPOSIT_LOW'],
+     'urgency': ['MEDIUM', 'MEDIUM', 'HIGH', 'CRITICAL'],
+     'action': ['Deposit tracking - Preventive monitoring',
+                'Deposit tracking - Preventive monitoring',
+                'Deposit monitoring - High risk pattern identified',
+                'Immediate deposit intervention - Critical risk detected']},
+    {'type': 'Spend Management', 'factor': 'Spending', 'threshold': RISK_THRESHOLDS['SPENDING_LOW'],
+     'urgency': ['MEDIUM', 'MEDIUM', 'HIGH', 'CRITICAL'],
+     'action': ['Spend monitoring - Preventive measures',
+                'Spend monitoring - Preventive measures',
+                'Spend limits - High risk wagering pattern',
+                'Immediate spend intervention - Critical wagering detected']},
+    {'type': 'Session Management', 'factor': 'Session', 'threshold': RISK_THRESHOLDS['SESSION_LOW'],
+     'urgency': ['MEDIUM', 'MEDIUM', 'HIGH', 'CRITICAL'],
+     'action': ['Session controls - {level} risk level'] * 4},
+    {'type': 'Location Monitoring', 'factor': 'Location', 'threshold': RISK_THRESHOLDS['LOCATION_LOW'],
+     'urgency': ['MEDIUM', 'MEDIUM', 'HIGH', 'HIGH'],
+     'action': ['Location alerts - {level} risk venue activity'] * 4},
+    {'type': 'Enhanced Support', 'factor': 'Support', 'threshold': RISK_THRESHOLDS['SUPPORT_LOW'],
+     'urgency': ['MEDIUM', 'MEDIUM', 'HIGH', 'CRITICAL'],
+     'action': ['Enhanced support monitoring - Preventive care',
+                'Enhanced support monitoring - Preventive care',
+                'Priority counselor contact - High risk support',
+                'Immediate crisis intervention - Critical support needed']},
+    {'type': 'Loss Chasing Support', 'factor': 'Loss Chasing', 'threshold': 1,
+     'urgency': ['HIGH', 'HIGH', 'HIGH', 'CRITICAL'],
+     'action': ['Loss-chasing pattern detected ({patterns}) - Cooling-off offer'] * 4}
+]
+
+# Alert suppression for downstream case-management queues
+ALERT_SUPPRESSION = {
+    'BUCKET_CAPACITY': 5,  # Burst of alerts allowed per customer
+    'REFILL_PER_MINUTE': 1.0,  # Sustained alerts per customer per minute
+    'COOLDOWN_SECONDS': 15 * 60,  # An unchanged alert is re-raised at most this often
+    'MAX_TRACKED': 10000  # Alert keys and customer buckets kept before the oldest are evicted
+}
+
+# ML training buffer - what reaches the model from live scoring
+TRAINING_BUFFER = {
+    'MAX_SAMPLES': 100,
+    'RETRAIN_EVERY': 5,  # New samples accepted between retrains
+    'CUSTOMER_MIN_INTERVAL_SECONDS': 30,  # Unlabeled samples per customer at most this often
+    'MAX_TRACKED_CUSTOMERS': 10000
+}
+
+# Per-segment models - fall back to the global model when a segment has none
+MODEL_REGISTRY = {
+    'SEGMENT_FIELDS': ['profession', 'risk_category', 'cohort'],  # Tried in order, most specific first - cohort is the session's behavioural cohort
+    'DIRECTORY': 'models/segments',
+    'MEMORY_BUDGET_BYTES': 256 * 1024,  # Loaded segment models kept in memory
+    'MIN_SAMPLES': 20,  # Samples a segment needs before it gets its own model
+    'RETRAIN_EVERY': 10,
+    'MAX_SEGMENT_SAMPLES': 200
+}
+
+# Standalone trainer - 'inline' trains inside the app, 'external' leaves it to
+# `python -m fixed_ml_system train` (override with CUSTOMER_DNA_TRAINING)
+TRAINER = {
+    'MODE': 'inline',
+    'QUEUE_PATH': 'models/training_queue.sqlite',
+    'ARTIFACT_DIR': 'models/global',
+    'MANIFEST_PATH': 'models/manifest.json',
+    'INTERVAL_SECONDS': 60,  # Trainer schedule
+    'POLL_SECONDS': 5,  # Serving checks the manifest at most this often
+    'WINDOW': 5000,  # Queued samples the trainer fits on
+    'KEEP_VERSIONS': 5  # Published global artifacts kept on disk
+}
+
+# Retrain validation - alpha grid scored by closed-form leave-one-out error
+MODEL_SELECTION = {
+    'ALPHAS': [0.1, 0.01, 1.0, 10.0, 100.0],  # Tried in order; the first is the long-standing default
+    'TIME_BUDGET_MS': 25,
+    'MIN_RMSE_GAIN': 0.5  # Score points a candidate must beat the current model by - scores are integers, smaller gains are rounding noise
+}
+
+# Feature drift - self-labeled samples retrain only once scored traffic drifts from the training data
+# (in external mode serving flags drift in the queue's trainer state and the trainer applies the same gate)
+DRIFT = {
+    'BINS': 10,
+    'PSI_THRESHOLD': 0.2,  # 0.1-0.2 is moderate shift, above 0.2 significant
+    'MIN_OBSERVATIONS': 50  # Scored requests needed before drift is trusted
+}
+
+# Dashboard startup - what the first paint may import, checked by `python benchmarks.py startup`
+STARTUP = {
+    'DEFERRED_MODULES': ['pandas', 'sklearn', 'scipy', 'joblib', 'plotly.express'],  # Loaded on demand only
+    'IMPORT_BUDGET_MS': 1500  # Cumulative import time of the first paint, Streamlit included
+}
+
+# Headless batch scoring - `python batch_score.py input.csv output.csv`
+BATCH_SCORING = {
+    'CHUNK_SIZE': 10000,  # Rows held in memory per chunk (twice that per worker in flight)
+    'WORKERS': 1  # Scoring processes; 1 scores in the calling process
+}
+
+# Memory accounting - bytes per subsystem; an over-budget subsystem evicts its least recently used entries
+MEMORY_BUDGETS = {
+    'SESSION_BYTES': 64 * 1024,  # One dashboard session; past this its intervention log is trimmed
+    'SAMPLE_BYTES': 8 * 1024,  # Target for one training sample, buffer bookkeeping included
+    'SESSION_STATE': 64 * 1024 * 1024,  # Every tracked session in the process
+    'TRAINING_BUFFER': 8 * 1024 * 1024,
+    'MODEL': 16 * 1024 * 1024,  # Global, published and cached segment models
+    'CACHES': 32 * 1024 * 1024,  # Alert tables and per-customer rate limits
+    'SIMILARITY_INDEX': 512 * 1024 * 1024,  # About 450 MB holds a million profiles with their tree
+    'REFERENCE_DATA': None,  # The loaded customer book and its search index - sized by the book, so reported only
+    'CHECK_INTERVAL_SECONDS': 10,  # maybe_enforce() measures at most this often, on a background thread
+    'TRACEMALLOC': False  # Or set CUSTOMER_DNA_TRACEMALLOC=1 - traces allocations, slows every allocation
+}
+
+# Similar past customers - shown to analysts when a customer reaches CRITICAL
+SIMILARITY = {
+    'K': 5,
+    'EPS': 0.5,  # Tree neighbours may be up to 1.5x further than the true ones - ~99% recall, under 1 ms at a million profiles
+    'LEAF_SIZE': 16,
+    'DELTA_MAX': 4096,  # Newest profiles scanned exactly; the tree is rebuilt in the background once this many arrive
+    'BLOCK_ROWS': 65536,  # Rows per block for the exact scan used without scipy
+    'MAX_PROFILES': 1_000_000,  # Oldest profiles are dropped at the next rebuild beyond this
+    'QUERY_BUDGET_MS': 1.0  # Checked by `python benchmarks.py similarity`
+}
+
+# Behavioural cohorts - streaming mini-batch k-means over accepted samples, usable as a segment key and the cohort_risk feature
+COHORTS = {
+    'K': 6,
+    'BATCH_SIZE': 16,  # Accepted samples buffered per centroid update
+    'MAX_WEIGHT': 2000,  # Samples a centroid remembers - caps how slowly it can move
+    'INIT_ITERATIONS': 20  # Lloyd iterations when cohorts are first fitted
+}
+
+# Historical analysis - daily and monthly rollups of risk evaluations and executed interventions
+HISTORY = {
+    'DAYS': 400,  # Daily buckets kept
+    'MONTHS': 36,  # Monthly buckets kept
+    'SCORE_BIN_WIDTH': 10,  # Score distribution bins; 100 falls in the last bin
+    'CRISIS_COST': 5000,  # Assumed cost in £ of one gambling-harm crisis - chargebacks, remediation, regulatory exposure
+    'SUCCESS_RATES': {  # Share of crises an executed intervention prevents
+        'Deposit Controls': 0.92,
+        'Spend Management': 0.85,
+        'Session Management': 0.95,
+        'Location Monitoring': 0.70,
+        'Enhanced Support': 0.88,
+        'Loss Chasing Support': 0.80
+    }
+}
+
+# What-if sweep - one customer's risk over a grid of further deposits and wagers, session times and locations
+WHAT_IF = {
+    'AMOUNT_STEPS': 11,  # Deposit and wager values each, from 0 to MAX_LIMIT_MULTIPLE x the monthly limit
+    'MAX_LIMIT_MULTIPLE': 2.0,
+    'SESSION_MULTIPLES': [0.5, 1.0, 2.0, 3.0],  # Session times as multiples of the customer's average, plus the current one
+    'LOCATIONS': ['Home', 'Work', 'Public', 'Betting Shop', 'Casino']
+}
+
+# Scoring deadline - calculate_risk runs the ML path only when it is expected to fit, else returns the rule score
+LATENCY_BUDGETS = {
+    'SCORING_MS': 25,  # Per calculate_risk call, rule scoring included; None always waits for ML
+    'SMOOTHING': 0.1,  # Weight of the newest ML call in the running latency estimate
+    'PROBE_EVERY': 20,  # After this many calls skipped as too slow, one runs ML anyway to refresh the estimate
+    'MAX_DEFERRED': 100  # Model builds and blocking learning steps queued for the background learner
+}
+
+# Audit log - every risk evaluation and executed intervention, appended by a background writer
+AUDIT_LOG = {
+    'DIRECTORY': 'models/audit',
+    'SEGMENT_BYTES': 8 * 2**20,  # The active segment is compressed and indexed once it passes this size
+    'BATCH_SIZE': 2000,  # A full batch wakes the writer before the flush interval is up
+    'FLUSH_INTERVAL_SECONDS': 0.5,  # Longest a record waits in memory before it is written
+    'MAX_PENDING': 200000,  # Records buffered for the writer - beyond this they are dropped and counted, never waited on
+    'MIN_RECORDS_PER_SEC': 20000  # Benchmark floor for record-to-disk throughput
+}
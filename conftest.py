@@ -0,0 +1,41 @@
+"""
+Test setup - the suite runs in a scratch directory so the shared fixed_ml and audit log never write into the tree
+"""
+import os
+import shutil
+import tempfile
+
+# Saved model state the shared fixed_ml and batch scoring workers load from the working directory
+MODEL_FILES = ['fixed_risk_model.npz', 'fixed_cohorts.npz', 'fixed_training_data.pkl']
+
+_scratch = None
+_cwd = None
+
+def pytest_configure(config):
+    # Before collection - test modules build the shared fixed_ml as they are imported
+    global _scratch, _cwd
+    _cwd = os.getcwd()
+    _scratch = tempfile.TemporaryDirectory()
+    for name in MODEL_FILES:
+        if os.path.exists(name):
+            shutil.copy(name, _scratch.name)
+    os.chdir(_scratch.name)
+    # An absolute path, so records scored late - or flushed at exit - never land in the tree
+    from audit_log import audit_log
+    audit_log.directory = os.path.join(_scratch.name, 'audit')
+
+def pytest_sessionfinish(session, exitstatus):
+    # Background learners and segment retrains write relative to the scratch directory - let them land
+    # there (pytest has already changed back to the start directory by now)
+    os.chdir(_scratch.name)
+    from audit_log import audit_log
+    from risk_engine import latency_budget
+    from fixed_ml_system import fixed_ml_loaded, get_fixed_ml
+    latency_budget.wait()
+    if fixed_ml_loaded():
+        get_fixed_ml().registry.wait()
+    audit_log.flush()
+
+def pytest_unconfigure(config):
+    os.chdir(_cwd)
+    _scratch.cleanup()
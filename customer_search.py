@@ -0,0 +1,73 @@
+"""
+Customer Search - Prefix-indexed, paged customer lookup with risk filters
+"""
+import math
+from collections import namedtuple
+import numpy as np
+from rule_engine import LEVEL_NAMES
+
+SearchPage = namedtuple('SearchPage', ['ids', 'total', 'page', 'pages'])
+
+class CustomerSearch:
+    """Server-side customer search over a profile store.
+
+    Every word of every customer id is lower-cased into one sorted token
+    array, so a prefix lookup is two binary searches instead of a scan.
+    Results are filtered on the portfolio's precomputed scores and only
+    the requested page of ids is materialised.
+    """
+
+    def __init__(self, store, portfolio, page_size=25):
+        self.store = store
+        self.portfolio = portfolio
+        self.page_size = page_size
+
+        ids = store.ids.tolist()
+        self.alphabetical = np.argsort(np.char.lower(np.asarray(ids, dtype=str)), kind='stable') if ids else np.zeros(0, dtype=np.int64)
+        self.rank = np.empty(len(ids), dtype=np.int64)
+        self.rank[self.alphabetical] = np.arange(len(ids))
+
+        tokens = []
+        rows = []
+        for row, customer_id in enumerate(ids):
+            for token in set(customer_id.lower().replace('-', ' ').split()):
+                tokens.append(token)
+                rows.append(row)
+        tokens = np.asarray(tokens, dtype=str)
+        order = np.argsort(tokens, kind='stable')
+        self.tokens = tokens[order]
+        self.token_rows = np.asarray(rows, dtype=np.int64)[order]
+
+    def matching_rows(self, query=''):
+        """Rows whose id has a word starting with each query word, in alphabetical id order"""
+        words = query.lower().replace('-', ' ').split()
+        if not words:
+            return self.alphabetical
+
+        matched = None
+        for word in words:
+            lo = np.searchsorted(self.tokens, word, side='left')
+            hi = np.searchsorted(self.tokens, word + '\U0010ffff', side='left')
+            rows = np.unique(self.token_rows[lo:hi])
+            matched = rows if matched is None else np.intersect1d(matched, rows, assume_unique=True)
+            if not len(matched):
+                break
+
+        return matched[np.argsort(self.rank[matched])]
+
+    def search(self, query='', levels=None, score_range=None, page=0):
+        """One page of matching customer ids - levels is a list of LEVEL_NAMES, score_range (low, high) inclusive"""
+        rows = self.matching_rows(query)
+
+        if levels is not None:
+            codes = [LEVEL_NAMES.index(level) for level in levels]
+            rows = rows[np.isin(self.portfolio.levels[rows], codes)]
+        if score_range is not None:
+            scores = self.portfolio.scores[rows]
+            rows = rows[(scores >= score_range[0]) & (scores <= score_range[1])]
+
+        total = len(rows)
+        pages = max(1, math.ceil(total / self.page_size))
+        page = min(max(0, page), pages - 1)
+        start = page * self.page_size
+        return SearchPage(self.store.ids[rows[start:start + self.page_size]].tolist(), total, page, pages)
@@ -0,0 +1,109 @@
+"""
+Drift Monitor - Running feature statistics and PSI/KL drift against the training distribution
+"""
+import numpy as np
+from config import DRIFT
+from metrics import InstrumentedLock
+
+EPSILON = 1e-4  # Floor for empty-bin proportions so PSI and KL stay finite
+
+class DriftMonitor:
+    """Compares scored traffic with the data the model was trained on.
+
+    Bin edges are the reference deciles of each feature (fixed until the
+    next reset), so observing a request is one Welford mean/variance step
+    and one histogram increment per feature - O(d) with a constant number
+    of bins. PSI and KL are computed on demand from the two histograms.
+    """
+
+    def __init__(self, feature_names, reference=None, bins=None):
+        self.feature_names = list(feature_names)
+        self.bins = DRIFT['BINS'] if bins is None else bins
+        self.lock = InstrumentedLock('drift', reentrant=False)
+        self.reset(np.zeros((0, len(self.feature_names))) if reference is None else reference)
+
+    def reset(self, reference):
+        """Re-baseline on a new training matrix and clear the live statistics"""
+        reference = np.asarray(reference, dtype=np.float64)
+        dims = len(self.feature_names)
+        with self.lock:
+            if len(reference):
+                quantiles = np.linspace(0, 1, self.bins + 1)[1:-1]
+                self.edges = np.quantile(reference, quantiles, axis=0).T  # (d, bins - 1)
+                self.reference_hist = self._histogram(reference)
+                self.reference_mean = reference.mean(axis=0)
+                self.reference_std = reference.std(axis=0)
+            else:
+                self.edges = np.zeros((dims, self.bins - 1))
+                self.reference_hist = np.zeros((dims, self.bins))
+                self.reference_mean = np.zeros(dims)
+                self.reference_std = np.zeros(dims)
+            self.reference_count = len(reference)
+            self.count = 0
+            self.mean = np.zeros(dims)
+            self.m2 = np.zeros(dims)
+            self.hist = np.zeros((dims, self.bins))
+
+    def observe(self, values):
+        """Add one scored feature vector"""
+        x = np.asarray(values, dtype=np.float64)
+        with self.lock:
+            self.count += 1
+            delta = x - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (x - self.mean)
+            self.hist[np.arange(len(x)), (x[:, None] > self.edges).sum(axis=1)] += 1
+
+    def _histogram(self, X):
+        counts = np.zeros((X.shape[1], self.bins))
+        for feature in range(X.shape[1]):
+            bins = np.searchsorted(self.edges[feature], X[:, feature], side='left')
+            counts[feature] = np.bincount(bins, minlength=self.bins)
+        return counts
+
+    def _proportions(self):
+        live = self.hist / max(self.count, 1) + EPSILON
+        reference = self.reference_hist / max(self.reference_count, 1) + EPSILON
+        return live / live.sum(axis=1, keepdims=True), reference / reference.sum(axis=1, keepdims=True)
+
+    def psi(self):
+        """Population stability index per feature"""
+        with self.lock:
+            live, reference = self._proportions()
+        return ((live - reference) * np.log(live / reference)).sum(axis=1)
+
+    def kl(self):
+        """KL divergence of live traffic from the training distribution, per feature"""
+        with self.lock:
+            live, reference = self._proportions()
+        return (live * np.log(live / reference)).sum(axis=1)
+
+    def std(self):
+        with self.lock:
+            return np.sqrt(self.m2 / self.count) if self.count > 1 else np.zeros(len(self.feature_names))
+
+    def drifted(self):
+        """True once enough traffic is seen and some feature's PSI crosses the threshold"""
+        if self.count < DRIFT['MIN_OBSERVATIONS'] or not self.reference_count:
+            return False
+        return bool(self.psi().max() >= DRIFT['PSI_THRESHOLD'])
+
+    def metrics(self, top=5):
+        psi = self.psi()
+        kl = self.kl()
+        order = np.argsort(-psi)[:top]
+        return {
+            'observations': self.count,
+            'reference_samples': self.reference_count,
+            'max_psi': float(psi.max()) if len(psi) else 0.0,
+            'max_kl': float(kl.max()) if len(kl) else 0.0,
+            'threshold': DRIFT['PSI_THRESHOLD'],
+            'drifted': self.drifted(),
+            'top_features': [{
+                'feature': self.feature_names[i],
+                'psi': float(psi[i]),
+                'kl': float(kl[i]),
+                'live_mean': float(self.mean[i]),
+                'reference_mean': float(self.reference_mean[i])
+            } for i in order]
+        }
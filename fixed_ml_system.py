@@ -1,34 +1,198 @@
 """
 Fixed ML System - Actually learns from data, no hardcoded rules
 """
-import pandas as pd
 import numpy as np
-from sklearn.linear_model import Ridge
-from sklearn.preprocessing import StandardScaler
-import joblib
+import hashlib
 import os
+import pickle
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
 from datetime import datetime
+from config import TRAINING_BUFFER, TRAINER, MODEL_SELECTION
+from compact_model import CompactRidge
+from model_registry import ModelRegistry, read_manifest
+from model_selection import ridge_loo, beats_current, to_compact
+from drift_monitor import DriftMonitor
+from similarity_index import SimilarityIndex
+from cohort_clustering import CohortModel
+from metrics import InstrumentedLock
+from memory_budget import memory_budget, deep_sizeof
+from session_ledger import ledger_total, ledger_window_sum
+from location_tracker import HIGH_RISK_LOCATIONS, high_risk_visit_counts
+from loss_chasing import loss_chasing_signals
+
+# Comprehensive features that work together for ML decisions
+BASE_FEATURE_NAMES = [
+    'age', 'income', 'financial_stress', 'total_deposits', 'total_wagered',
+    'session_time', 'support_calls', 'deposit_count', 'wager_count', 'location_risk',
+    'profession_risk', 'work_stress_level', 'deposit_to_income_ratio', 'wager_to_income_ratio',
+    'wager_to_deposit_ratio', 'session_intensity', 'gambling_frequency', 'support_escalation', 'risk_amplifier',
+    'high_risk_visits', 'high_risk_visits_last_hour',
+    'deposit_velocity', 'wager_velocity', 'deposit_acceleration', 'wager_acceleration',
+    'loss_chasing_indicator', 'spending_acceleration'
+]
+
+# Behavioural cohorts are clustered on every feature above; their members' mean risk is one more feature
+FEATURE_NAMES = BASE_FEATURE_NAMES + ['cohort_risk']
+
+# Map profession to risk level
+PROFESSION_RISK = {
+    'Teacher': 7,  # High stress, low income
+    'Executive': 4,  # Medium stress, good income
+    'Business Owner': 9  # High stress, irregular income
+}
+
+# Map work stress to numeric
+WORK_STRESS_LEVELS = {
+    'Low': 2, 'Medium': 5, 'High': 7, 'Very High': 9, 'Extreme': 10
+}
+
+def _synthetic_velocity(kind, total, monthly_income, session_time, burst):
+    """Velocity features for a synthetic session of session_time minutes.
+    
+    burst > 1 front-loads the last 15 minutes, giving positive acceleration.
+    """
+    hour_share = min(1.0, 60 / session_time)
+    quarter_share = min(hour_share, 15 / session_time * burst)
+    return {
+        f'{kind}_velocity': total * hour_share / monthly_income,
+        f'{kind}_acceleration': total * (4 * quarter_share - hour_share) / monthly_income
+    }
+
+def _mapped(values, mapping, n):
+    """Look up a text column through a dict, once per distinct value - missing or unknown values map to 5"""
+    if values is None:
+        return np.full(n, 5, dtype=np.float64)
+    labels, inverse = np.unique(np.asarray(values).astype(str), return_inverse=True)
+    return np.array([mapping.get(label, 5) for label in labels], dtype=np.float64)[inverse]
+
+def feature_matrix(columns, cohorts=None):
+    """extract_features over whole arrays - a (n, FEATURE_NAMES) matrix for a batch of sessions.
+    
+    columns maps the profile fields and these session aggregates to length-n
+    arrays: total_deposits, deposit_count, wagered, wager_count, session_time,
+    location and support_calls. Window sums (deposits_1h, deposits_15m,
+    wagers_1h, wagers_15m), location counters (high_risk_visits,
+    high_risk_visits_last_hour) and the loss-chasing signals
+    (loss_chasing_indicator, spending_acceleration) are optional and default to 0.
+    cohort_risk comes from the CohortModel when one is given, else from columns or 0.
+    """
+    n = len(columns['income'])
+    
+    def numeric(name):
+        values = columns.get(name)
+        return np.zeros(n) if values is None else np.asarray(values, dtype=np.float64)
+    
+    income = numeric('income')
+    monthly_income = income / 12
+    has_income = monthly_income > 0
+    safe_income = np.where(has_income, monthly_income, 1)
+    per_income = lambda values: np.where(has_income, values / safe_income, 0)
+    
+    total_deposits, total_wagered = numeric('total_deposits'), numeric('wagered')
+    avg_session, session_time = numeric('avg_session'), numeric('session_time')
+    support_contacts, support_calls = numeric('support_contacts'), numeric('support_calls')
+    financial_stress = numeric('financial_stress')
+    deposit_count, wager_count = numeric('deposit_count'), numeric('wager_count')
+    deposits_15m, deposits_1h = numeric('deposits_15m'), numeric('deposits_1h')
+    wagers_15m, wagers_1h = numeric('wagers_15m'), numeric('wagers_1h')
+    
+    location = np.asarray(columns['location']).astype(str)
+    high_risk_venue = np.isin(location, HIGH_RISK_LOCATIONS)
+    at_work = location == 'Work'
+    location_multiplier = np.where(high_risk_venue, 1.5, np.where(at_work, 1.2, 1.0))
+    
+    features = {
+        'age': numeric('age'),
+        'income': income,
+        'financial_stress': financial_stress,
+        'total_deposits': total_deposits,
+        'total_wagered': total_wagered,
+        'session_time': session_time,
+        'support_calls': support_contacts + support_calls,
+        'deposit_count': deposit_count,
+        'wager_count': wager_count,
+        'location_risk': np.where(high_risk_venue, 15, np.where(at_work, 10, 5)).astype(np.float64),
+        'profession_risk': _mapped(columns.get('profession'), PROFESSION_RISK, n),
+        'work_stress_level': _mapped(columns.get('work_stress'), WORK_STRESS_LEVELS, n),
+        'deposit_to_income_ratio': per_income(total_deposits),
+        'wager_to_income_ratio': per_income(total_wagered),
+        'wager_to_deposit_ratio': np.where(total_deposits > 0, total_wagered / np.where(total_deposits > 0, total_deposits, 1), 0),
+        'session_intensity': np.where(avg_session > 0, session_time / np.where(avg_session > 0, avg_session, 1), 1),
+        'gambling_frequency': deposit_count + wager_count,
+        'support_escalation': support_calls / np.maximum(1, support_contacts),
+        'risk_amplifier': location_multiplier * (1 + financial_stress / 20),
+        'high_risk_visits': numeric('high_risk_visits'),
+        'high_risk_visits_last_hour': numeric('high_risk_visits_last_hour'),
+        'deposit_velocity': per_income(deposits_1h),
+        'wager_velocity': per_income(wagers_1h),
+        'deposit_acceleration': per_income(4 * deposits_15m - deposits_1h),
+        'wager_acceleration': per_income(4 * wagers_15m - wagers_1h),
+        'loss_chasing_indicator': numeric('loss_chasing_indicator'),
+        'spending_acceleration': numeric('spending_acceleration')
+    }
+    X = np.column_stack([features[name] for name in BASE_FEATURE_NAMES])
+    cohort_risk = cohorts.cohort_risk(X) if cohorts is not None else numeric('cohort_risk')
+    return np.column_stack([X, cohort_risk])
 
 class FixedCustomerRiskML:
-    def __init__(self):
-        self.model = Ridge(alpha=0.1, random_state=42)
-        self.scaler = StandardScaler()
+    def __init__(self, training_mode=None, directory=None):
+        # Scaler and ridge weights as plain arrays - training and serving need numpy only
+        self.model = None
+        self.alpha = 0.1
         self.is_trained = False
+        self.model_version = 0
         self.training_data = []
-        self.model_path = 'fixed_risk_model.pkl'
-        self.scaler_path = 'fixed_scaler.pkl'
-        self.data_path = 'fixed_training_data.pkl'
+        
+        # Guards the global model and training buffer - scoring threads share one instance
+        self.lock = InstrumentedLock('model')
+        
+        # 'external': samples go to the trainer's queue and published models are loaded read-only
+        self.training_mode = training_mode or os.environ.get('CUSTOMER_DNA_TRAINING', TRAINER['MODE'])
+        self.sample_queue = None
+        self.published_model = None
+        self.manifest_checked_at = 0.0
+        self.manifest_mtime = None
+        # A manifest can publish new segment versions next to an unchanged global model
+        self.manifest_version = 0
+        
+        # Training buffer bookkeeping - content hashes in the window, last unlabeled sample per customer
+        self.sample_hashes = set()
+        self.last_sample_at = OrderedDict()
+        self.pending_samples = 0
+        self.pending_labeled = 0
+        self.ingest_stats = Counter()
+        self.retraining = False
+        
+        # Retrain validation outcomes
+        self.selection_stats = Counter()
+        self.last_selection = None
+        
+        # Live serving stats for the model page
+        self.prediction_count = 0
+        self.avg_latency_ms = 0.0
+        # Saved artifacts - in the working directory unless directory is given
+        self.model_path, self.cohort_path, self.data_path = (
+            os.path.join(directory or '', name) for name in ['fixed_risk_model.npz', 'fixed_cohorts.npz', 'fixed_training_data.pkl'])
         
         # Comprehensive features that work together for ML decisions
-        self.feature_names = [
-            'age', 'income', 'financial_stress', 'total_deposits', 'total_wagered',
-            'session_time', 'support_calls', 'deposit_count', 'wager_count', 'location_risk',
-            'profession_risk', 'work_stress_level', 'deposit_to_income_ratio', 'wager_to_income_ratio',
-            'wager_to_deposit_ratio', 'session_intensity', 'gambling_frequency', 'support_escalation', 'risk_amplifier'
-        ]
+        self.feature_names = list(FEATURE_NAMES)
+        
+        # Segment models load on first use and fall back to the global model
+        self.registry = ModelRegistry(self.feature_names, None if directory is None else os.path.join(directory, 'segments'))
+        
+        # Scored traffic against the training distribution - re-baselined on every promoted retrain
+        self.drift = DriftMonitor(self.feature_names)
+        
+        # Every accepted sample, for finding past customers similar to a current one
+        self.similarity = SimilarityIndex(self.feature_names)
         
         # Initialize with realistic training data
         self._initialize_training_data()
+        self._rebuild_hashes()
+        self._seed_similarity()
         
     def _initialize_training_data(self):
         """Initialize with realistic training samples"""
@@ -38,6 +202,7 @@ class FixedCustomerRiskML:
             wagered = np.random.randint(10, min(80, deposits))  # Can't wager more than deposited
             income = np.random.randint(40000, 90000)
             monthly_income = income / 12
+            session_time = np.random.randint(30, 90)
             
             sample = {
                 'age': np.random.randint(25, 60),
@@ -45,7 +210,7 @@ class FixedCustomerRiskML:
                 'financial_stress': np.random.randint(1, 3),
                 'total_deposits': deposits,
                 'total_wagered': wagered,
-                'session_time': np.random.randint(30, 90),
+                'session_time': session_time,
                 'support_calls': np.random.randint(0, 1),
                 'deposit_count': np.random.randint(1, 2),
                 'wager_count': np.random.randint(1, 2),
@@ -60,6 +225,12 @@ class FixedCustomerRiskML:
                 'gambling_frequency': np.random.randint(2, 4),
                 'support_escalation': np.random.uniform(0, 0.5),
                 'risk_amplifier': np.random.uniform(1.0, 1.2),
+                'high_risk_visits': 0,
+                'high_risk_visits_last_hour': 0,
+                **_synthetic_velocity('deposit', deposits, monthly_income, session_time, np.random.uniform(0.8, 1.2)),
+                **_synthetic_velocity('wager', wagered, monthly_income, session_time, np.random.uniform(0.8, 1.2)),
+                'loss_chasing_indicator': 0,
+                'spending_acceleration': np.random.uniform(-0.1, 0.1),
                 'target_risk_score': np.random.randint(15, 30),
                 'timestamp': datetime.now().isoformat()
             }
@@ -71,6 +242,7 @@ class FixedCustomerRiskML:
             wagered = np.random.randint(80, min(400, deposits))
             income = np.random.randint(45000, 80000)
             monthly_income = income / 12
+            session_time = np.random.randint(90, 180)
             
             sample = {
                 'age': np.random.randint(30, 55),
@@ -78,7 +250,7 @@ class FixedCustomerRiskML:
                 'financial_stress': np.random.randint(3, 6),
                 'total_deposits': deposits,
                 'total_wagered': wagered,
-                'session_time': np.random.randint(90, 180),
+                'session_time': session_time,
                 'support_calls': np.random.randint(1, 3),
                 'deposit_count': np.random.randint(2, 4),
                 'wager_count': np.random.randint(2, 5),
@@ -93,6 +265,12 @@ class FixedCustomerRiskML:
                 'gambling_frequency': np.random.randint(4, 8),
                 'support_escalation': np.random.uniform(0.3, 1.0),
                 'risk_amplifier': np.random.uniform(1.2, 1.8),
+                'high_risk_visits': np.random.randint(0, 3),
+                'high_risk_visits_last_hour': np.random.randint(0, 2),
+                **_synthetic_velocity('deposit', deposits, monthly_income, session_time, np.random.uniform(1.0, 1.8)),
+                **_synthetic_velocity('wager', wagered, monthly_income, session_time, np.random.uniform(1.0, 1.8)),
+                'loss_chasing_indicator': np.random.choice([0, 0, 1]),
+                'spending_acceleration': np.random.uniform(0.0, 0.4),
                 'target_risk_score': np.random.randint(35, 55),
                 'timestamp': datetime.now().isoformat()
             }
@@ -104,6 +282,7 @@ class FixedCustomerRiskML:
             wagered = np.random.randint(400, min(1400, deposits))
             income = np.random.randint(20000, 45000)
             monthly_income = income / 12
+            session_time = np.random.randint(240, 480)
             
             sample = {
                 'age': np.random.randint(25, 45),
@@ -111,7 +290,7 @@ class FixedCustomerRiskML:
                 'financial_stress': np.random.randint(7, 10),
                 'total_deposits': deposits,
                 'total_wagered': wagered,
-                'session_time': np.random.randint(240, 480),
+                'session_time': session_time,
                 'support_calls': np.random.randint(5, 15),
                 'deposit_count': np.random.randint(4, 10),
                 'wager_count': np.random.randint(6, 15),
@@ -126,34 +305,45 @@ class FixedCustomerRiskML:
                 'gambling_frequency': np.random.randint(8, 20),
                 'support_escalation': np.random.uniform(1.0, 3.0),
                 'risk_amplifier': np.random.uniform(1.8, 3.0),
+                'high_risk_visits': np.random.randint(2, 8),
+                'high_risk_visits_last_hour': np.random.randint(1, 4),
+                **_synthetic_velocity('deposit', deposits, monthly_income, session_time, np.random.uniform(1.5, 3.0)),
+                **_synthetic_velocity('wager', wagered, monthly_income, session_time, np.random.uniform(1.5, 3.0)),
+                'loss_chasing_indicator': np.random.choice([0, 1, 1]),
+                'spending_acceleration': np.random.uniform(0.3, 1.5),
                 'target_risk_score': np.random.randint(65, 90),
                 'timestamp': datetime.now().isoformat()
             }
             self.training_data.append(sample)
         
+        # Cohorts start from the samples, then follow scored traffic
+        self.cohorts = CohortModel.fit(*self._cohort_inputs(self.training_data), BASE_FEATURE_NAMES)
+        self._label_cohorts(self.training_data)
+        
         # Train initial model
         self.train_model()
     
+    def _cohort_inputs(self, samples):
+        X = np.array([[sample[name] for name in BASE_FEATURE_NAMES] for sample in samples], dtype=np.float64)
+        return X.reshape(len(samples), len(BASE_FEATURE_NAMES)), [sample['target_risk_score'] for sample in samples]
+    
+    def _label_cohorts(self, samples):
+        """Give samples stored without one their cohort and cohort_risk"""
+        unlabeled = [sample for sample in samples if 'cohort' not in sample]
+        if unlabeled:
+            X, _ = self._cohort_inputs(unlabeled)
+            for sample, cohort in zip(unlabeled, self.cohorts.assign(X)):
+                sample['cohort'] = int(cohort)
+                sample['cohort_risk'] = float(self.cohorts.risk[cohort])
+    
     def extract_features(self, profile, session_data):
         """Extract comprehensive features that work together for ML decisions"""
         deposits = session_data.get('deposits', [])
         wagers = session_data.get('wagers', [])
         monthly_income = profile['income'] / 12
         
-        # Map profession to risk level
-        profession_risk_map = {
-            'Teacher': 7,  # High stress, low income
-            'Executive': 4,  # Medium stress, good income
-            'Business Owner': 9  # High stress, irregular income
-        }
-        
-        # Map work stress to numeric
-        work_stress_map = {
-            'Low': 2, 'Medium': 5, 'High': 7, 'Very High': 9, 'Extreme': 10
-        }
-        
         # Calculate derived features that connect all inputs
-        total_deposits = sum(deposits)
+        total_deposits = ledger_total(deposits)
         total_wagered = session_data['wagered']
         
         # Financial ratios (key ML features)
@@ -167,9 +357,20 @@ class FixedCustomerRiskML:
         support_escalation = session_data['support_calls'] / max(1, profile['support_contacts'])
         
         # Risk amplifiers (when multiple factors combine)
-        location_multiplier = 1.5 if session_data['location'] in ['Casino', 'Betting Shop'] else 1.2 if session_data['location'] == 'Work' else 1.0
+        location_multiplier = 1.5 if session_data['location'] in HIGH_RISK_LOCATIONS else 1.2 if session_data['location'] == 'Work' else 1.0
         stress_multiplier = 1 + (profile['financial_stress'] / 20)
         
+        # Velocity: share of monthly income moved in the last hour, and whether
+        # the last 15 minutes run faster than the hourly pace (bucketed windows, O(1))
+        deposits_15m, deposits_1h = ledger_window_sum(deposits, '15m'), ledger_window_sum(deposits, '1h')
+        wagers_15m, wagers_1h = ledger_window_sum(wagers, '15m'), ledger_window_sum(wagers, '1h')
+        
+        # Streaming loss-chasing state kept per session (no history rescans)
+        loss_chasing = loss_chasing_signals(session_data)
+        
+        # Location history counters (O(1) with a LocationTracker)
+        high_risk_visits, high_risk_visits_last_hour = high_risk_visit_counts(session_data.get('location_history', []))
+        
         features = {
             'age': profile['age'],
             'income': profile['income'],
@@ -180,9 +381,9 @@ class FixedCustomerRiskML:
             'support_calls': profile['support_contacts'] + session_data['support_calls'],
             'deposit_count': len(deposits),
             'wager_count': len(wagers),
-            'location_risk': 15 if session_data['location'] in ['Casino', 'Betting Shop'] else 10 if session_data['location'] == 'Work' else 5,
-            'profession_risk': profession_risk_map.get(profile.get('profession', 'Other'), 5),
-            'work_stress_level': work_stress_map.get(profile.get('work_stress', 'Medium'), 5),
+            'location_risk': 15 if session_data['location'] in HIGH_RISK_LOCATIONS else 10 if session_data['location'] == 'Work' else 5,
+            'profession_risk': PROFESSION_RISK.get(profile.get('profession', 'Other'), 5),
+            'work_stress_level': WORK_STRESS_LEVELS.get(profile.get('work_stress', 'Medium'), 5),
             # New interconnected features
             'deposit_to_income_ratio': deposit_to_income,
             'wager_to_income_ratio': wager_to_income,
@@ -190,66 +391,243 @@ class FixedCustomerRiskML:
             'session_intensity': session_intensity,
             'gambling_frequency': gambling_frequency,
             'support_escalation': support_escalation,
-            'risk_amplifier': location_multiplier * stress_multiplier
+            'risk_amplifier': location_multiplier * stress_multiplier,
+            'high_risk_visits': high_risk_visits,
+            'high_risk_visits_last_hour': high_risk_visits_last_hour,
+            'deposit_velocity': deposits_1h / monthly_income if monthly_income > 0 else 0,
+            'wager_velocity': wagers_1h / monthly_income if monthly_income > 0 else 0,
+            'deposit_acceleration': (4 * deposits_15m - deposits_1h) / monthly_income if monthly_income > 0 else 0,
+            'wager_acceleration': (4 * wagers_15m - wagers_1h) / monthly_income if monthly_income > 0 else 0,
+            'loss_chasing_indicator': loss_chasing['indicator'],
+            'spending_acceleration': loss_chasing['spending_acceleration']
         }
         
+        # Behavioural cohort of everything above - O(k*d)
+        cohort = self.cohorts.assign([features[name] for name in BASE_FEATURE_NAMES])
+        features['cohort'] = cohort
+        features['cohort_risk'] = float(self.cohorts.risk[cohort])
+        
         return features
     
-    def add_training_sample(self, profile, session_data, actual_risk_score=None):
-        """Add new sample and retrain"""
+    def add_training_sample(self, profile, session_data, actual_risk_score=None, prediction=None):
+        """Add a live-scoring sample, skipping duplicates and customers sampled too recently.
+
+        prediction is predict_risk's result for this session when the caller
+        already has it - it becomes the target instead of predicting again.
+        """
+        if actual_risk_score is not None:
+            return self.add_labeled_sample(profile, session_data, actual_risk_score)
+        
         features = self.extract_features(profile, session_data)
+        sample_hash = self._sample_hash(features)
+        customer = session_data.get('customer')
+        with self.lock:
+            if sample_hash in self.sample_hashes:
+                self.ingest_stats['duplicates'] += 1
+                return False
+            
+            now = time.monotonic()
+            if customer is not None:
+                last = self.last_sample_at.get(customer)
+                if last is not None and now - last < TRAINING_BUFFER['CUSTOMER_MIN_INTERVAL_SECONDS']:
+                    self.ingest_stats['rate_limited'] += 1
+                    return False
+                self.last_sample_at[customer] = now
+                self.last_sample_at.move_to_end(customer)
+                while len(self.last_sample_at) > TRAINING_BUFFER['MAX_TRACKED_CUSTOMERS']:
+                    self.last_sample_at.popitem(last=False)
         
-        # If no actual score provided, get current ML prediction as baseline
-        if actual_risk_score is None and self.is_trained:
+        # No outcome yet - the current prediction stands in as the target
+        if prediction is not None and prediction.get('method') == 'ml_only':
+            actual_risk_score = prediction['risk_score']
+        elif self.is_trained:
             try:
-                current_pred = self.predict_risk(profile, session_data)
-                actual_risk_score = current_pred['risk_score']
+                actual_risk_score = self.predict_risk(profile, session_data)['risk_score']
             except:
                 actual_risk_score = 50  # Default
-        elif actual_risk_score is None:
+        else:
             actual_risk_score = 50  # Default for first samples
         
-        sample = {
-            **features,
-            'target_risk_score': actual_risk_score,
-            'timestamp': datetime.now().isoformat()
-        }
-        
-        self.training_data.append(sample)
-        
-        # Keep last 100 samples
-        if len(self.training_data) > 100:
-            self.training_data = self.training_data[-100:]
-        
-        # Retrain every 5 new samples
-        if len(self.training_data) % 5 == 0:
-            self.train_model()
+        self._append_sample(profile, features, sample_hash, actual_risk_score, 'prediction', customer)
+        return True
     
-    def train_model(self):
-        """Train ML model on actual data"""
-        if len(self.training_data) < 10:
+    def learning_would_block(self):
+        """True if adding a sample now would wait for a running retrain, or start one"""
+        if self.training_mode == 'external':
             return False
+        if self.retraining:
+            return True
+        return self.pending_samples + 1 >= TRAINING_BUFFER['RETRAIN_EVERY'] and bool(self.pending_labeled or self.drift.drifted())
+    
+    def add_labeled_sample(self, profile, session_data, outcome_score):
+        """Add a sample with a real outcome label - replaces any unlabeled sample with the same features"""
+        features = self.extract_features(profile, session_data)
+        sample_hash = self._sample_hash(features)
+        with self.lock:
+            if sample_hash in self.sample_hashes:
+                existing = next(sample for sample in self.training_data if sample.get('sample_hash') == sample_hash)
+                if existing.get('label_source') == 'outcome' and existing['target_risk_score'] == outcome_score:
+                    self.ingest_stats['duplicates'] += 1
+                    return False
+                self.training_data.remove(existing)
+                self.sample_hashes.discard(sample_hash)
         
-        # Prepare data
-        df = pd.DataFrame(self.training_data)
-        X = df[self.feature_names]
-        y = df['target_risk_score']
-        
-        # Scale features
-        X_scaled = self.scaler.fit_transform(X)
-        
-        # Train model
-        self.model.fit(X_scaled, y)
-        self.is_trained = True
-        
-        # Save model
-        self.save_model()
-        
+        self._append_sample(profile, features, sample_hash, outcome_score, 'outcome', session_data.get('customer'))
         return True
     
-    def predict_risk(self, profile, session_data):
-        """Predict using trained ML model only"""
+    def _append_sample(self, profile, features, sample_hash, target, label_source, customer=None):
+        memory_budget.maybe_enforce()
+        with self.lock:
+            self.training_data.append({
+                **features,
+                'target_risk_score': target,
+                'label_source': label_source,
+                'sample_hash': sample_hash,
+                'customer': customer,
+                'timestamp': datetime.now().isoformat()
+            })
+            self.sample_hashes.add(sample_hash)
+            self.ingest_stats['labeled' if label_source == 'outcome' else 'accepted'] += 1
+            self.similarity.add([features[name] for name in self.feature_names], target, customer, label_source == 'outcome')
+            # Predictions would feed back into cohort_risk - only outcomes move it
+            self.cohorts.observe([features[name] for name in BASE_FEATURE_NAMES], target if label_source == 'outcome' else None)
+            
+            # Keep the last MAX_SAMPLES samples
+            if len(self.training_data) > TRAINING_BUFFER['MAX_SAMPLES']:
+                self.training_data = self.training_data[-TRAINING_BUFFER['MAX_SAMPLES']:]
+                self._rebuild_hashes()
+            
+            self.pending_samples += 1
+            if label_source == 'outcome':
+                self.pending_labeled += 1
+            if self.training_mode == 'external':
+                # The standalone trainer retrains; serving only queues
+                if self.sample_queue is None:
+                    from sample_queue import SampleQueue
+                    self.sample_queue = SampleQueue(TRAINER['QUEUE_PATH'])
+                self.sample_queue.put([features[name] for name in self.feature_names], target, label_source,
+                                      self.registry.segments_for(profile, features['cohort']), customer)
+                # The trainer cannot see scored traffic - serving flags drift for it
+                if self.drift.drifted():
+                    self.sample_queue.set_state('drifted', 1)
+                return
+            
+            # Retrain once enough new information has arrived - outcome labels, or scored
+            # traffic that has drifted from what the model was trained on
+            if self.pending_samples >= TRAINING_BUFFER['RETRAIN_EVERY'] and (self.pending_labeled or self.drift.drifted()):
+                # Flagged so scoring learns in the background rather than wait on the lock
+                self.retraining = True
+                try:
+                    self.train_model()
+                finally:
+                    self.retraining = False
+        
+        # Segment models retrain on their own background thread
+        self.registry.record(profile, features, target, features['cohort'])
+    
+    def _sample_hash(self, features):
+        """Content hash of a feature vector, rounded so float noise does not defeat dedup"""
+        values = np.round(np.array([features[name] for name in self.feature_names], dtype=np.float64), 6)
+        return hashlib.blake2b(values.tobytes(), digest_size=16).hexdigest()
+    
+    def _rebuild_hashes(self):
+        for sample in self.training_data:
+            if 'sample_hash' not in sample:
+                sample['sample_hash'] = self._sample_hash(sample)
+        self.sample_hashes = {sample['sample_hash'] for sample in self.training_data}
+    
+    def _seed_similarity(self):
+        """Start the similarity index over the training buffer"""
+        self.similarity = SimilarityIndex(self.feature_names)
+        if self.model is not None:
+            self.similarity.set_scaler(self.model.mean, self.model.scale)
+        if self.training_data:
+            self.similarity.add_many([[sample[name] for name in self.feature_names] for sample in self.training_data],
+                                     [sample['target_risk_score'] for sample in self.training_data],
+                                     [sample.get('customer') for sample in self.training_data],
+                                     [sample.get('label_source') == 'outcome' for sample in self.training_data])
+    
+    def similar_customers(self, profile, session_data, k=None):
+        """Stored profiles nearest to this session's features - one per customer, the session's own customer excluded"""
+        features = self.extract_features(profile, session_data)
+        return self.similarity.query([features[name] for name in self.feature_names], k, exclude=session_data.get('customer'))
+    
+    def trim_training_data(self, keep_ratio):
+        """Drop the oldest samples until keep_ratio of the buffer is left - never below the 10 training needs"""
+        with self.lock:
+            keep = max(10, int(len(self.training_data) * keep_ratio))
+            if len(self.training_data) > keep:
+                self.training_data = self.training_data[-keep:]
+                self._rebuild_hashes()
+    
+    def trim_rate_limits(self, keep_ratio):
+        """Forget the least recently seen customers' last sample times"""
+        with self.lock:
+            keep = int(len(self.last_sample_at) * keep_ratio)
+            while len(self.last_sample_at) > keep:
+                self.last_sample_at.popitem(last=False)
+            self.last_sample_at = OrderedDict(self.last_sample_at)
+    
+    def register_memory(self, budget):
+        """Account this instance's training buffer, models and rate-limit table against budget"""
+        budget.register('training_buffer', 'fixed_ml',
+                        lambda: deep_sizeof(self.training_data) + deep_sizeof(self.sample_hashes), self.trim_training_data)
+        budget.register('model', 'global', lambda: sum(model.nbytes for model in [self.model, self.published_model] if model is not None))
+        budget.register('model', 'segments', lambda: self.registry.cache_bytes, self.registry.evict)
+        budget.register('caches', 'rate_limits', lambda: deep_sizeof(self.last_sample_at), self.trim_rate_limits)
+        budget.register('similarity_index', 'profiles', lambda: self.similarity.nbytes, lambda ratio: self.similarity.evict(ratio))
+    
+    def train_model(self):
+        """Train ML model on actual data - promoted only if it validates better than the current model"""
+        with self.lock:
+            if len(self.training_data) < 10:
+                return False
+            
+            # Prepare data
+            X = np.array([[sample[name] for name in self.feature_names] for sample in self.training_data], dtype=np.float64)
+            y = np.array([sample['target_risk_score'] for sample in self.training_data], dtype=np.float64)
+            
+            # Pick alpha by closed-form leave-one-out error, then compare with the
+            # current model on the samples added since it was trained
+            selection = ridge_loo(X, y, MODEL_SELECTION['ALPHAS'], MODEL_SELECTION['TIME_BUDGET_MS'])
+            new_count = min(self.pending_samples, len(y)) if self.is_trained and self.model is not None else 0
+            current = self.model.predict(X[len(y) - new_count:]) if new_count else []
+            promote, candidate_mse, current_mse = beats_current(selection, current, y[len(y) - new_count:],
+                                                                MODEL_SELECTION['MIN_RMSE_GAIN'])
+            self.last_selection = {
+                'alpha': selection.alpha,
+                'loo_rmse': selection.loo_mse ** 0.5,
+                'candidate_rmse': candidate_mse ** 0.5 if candidate_mse is not None else None,
+                'current_rmse': current_mse ** 0.5 if current_mse is not None else None,
+                'alphas_tried': len(selection.alpha_scores),
+                'elapsed_ms': selection.elapsed_ms,
+                'promoted': promote
+            }
+            self.pending_samples = 0
+            self.pending_labeled = 0
+            if not promote:
+                self.selection_stats['rejected'] += 1
+                return False
+            self.selection_stats['promoted'] += 1
+            
+            # The selection already holds the standardized ridge fit for the chosen alpha
+            self.model_version += 1
+            self.model = to_compact(selection, self.feature_names, self.model_version)
+            self.alpha = selection.alpha
+            self.is_trained = True
+            self.drift.reset(X)
+            self.similarity.set_scaler(self.model.mean, self.model.scale)
+            
+            # Save model
+            self.save_model()
+            
+            return True
+    
+    def predict_risk(self, profile, session_data, load_segments=True):
+        """Predict using trained ML model only - load_segments=False never waits on a segment artifact being read"""
         features = self.extract_features(profile, session_data)
+        if self.training_mode == 'external':
+            self.refresh_published_model()
         
         if not self.is_trained:
             return {
@@ -260,12 +638,22 @@ class FixedCustomerRiskML:
             }
         
         try:
+            start = time.perf_counter()
+            
             # Prepare features
             feature_values = [features[name] for name in self.feature_names]
-            feature_scaled = self.scaler.transform([feature_values])
+            self.drift.observe(feature_values)
+            
+            # ML prediction only - the customer's segment model if one exists, else the global model
+            segment, segment_model = self.registry.model_for(profile, features['cohort'], load_segments)
+            if segment_model is not None:
+                ml_score = segment_model.predict(feature_values)[0]
+            elif self.published_model is not None:
+                ml_score = self.published_model.predict(feature_values)[0]
+            else:
+                ml_score = self.model.predict(feature_values)[0]
             
-            # ML prediction only
-            ml_score = self.model.predict(feature_scaled)[0]
+            self._record_latency((time.perf_counter() - start) * 1000)
             
             # Confidence based on training data
             confidence = min(0.95, 0.7 + (len(self.training_data) / 200))
@@ -274,6 +662,7 @@ class FixedCustomerRiskML:
                 'risk_score': int(max(15, min(95, ml_score))),
                 'confidence': confidence,
                 'method': 'ml_only',
+                'segment': f"{segment[0]}={segment[1]}" if segment else 'global',
                 'samples_used': len(self.training_data)
             }
             
@@ -285,32 +674,182 @@ class FixedCustomerRiskML:
                 'samples_used': len(self.training_data)
             }
     
+    def refresh_published_model(self, force=False):
+        """Pick up a newer version published by the standalone trainer (manifest polled every POLL_SECONDS)"""
+        now = time.monotonic()
+        if not force and now - self.manifest_checked_at < TRAINER['POLL_SECONDS']:
+            return False
+        self.manifest_checked_at = now
+        
+        try:
+            mtime = os.stat(TRAINER['MANIFEST_PATH']).st_mtime
+        except OSError:
+            return False
+        if mtime == self.manifest_mtime:
+            return False
+        self.manifest_mtime = mtime
+        
+        manifest = read_manifest(TRAINER['MANIFEST_PATH'])
+        if not manifest or manifest['version'] <= self.manifest_version:
+            return False
+        try:
+            model = CompactRidge.load(os.path.join(os.path.dirname(TRAINER['MANIFEST_PATH']), manifest['global']))
+        except OSError:
+            return False
+        if model.feature_names != self.feature_names:
+            return False
+        
+        with self.lock:
+            self.published_model = model
+            self.model_version = model.version
+            self.manifest_version = manifest['version']
+            self.is_trained = True
+            self.similarity.set_scaler(model.mean, model.scale)
+            # The new version was fitted on the samples this process queued - drift is measured from them
+            self.drift.reset([[sample[name] for name in self.feature_names] for sample in self.training_data])
+        self.registry.invalidate(manifest.get('segments', {}))
+        return True
+    
+    def _record_latency(self, latency_ms):
+        """Exponentially weighted inference latency"""
+        self.prediction_count += 1
+        if self.prediction_count == 1:
+            self.avg_latency_ms = latency_ms
+        else:
+            self.avg_latency_ms = 0.9 * self.avg_latency_ms + 0.1 * latency_ms
+    
+    def model_snapshot(self):
+        """Point-in-time view of the live model for display"""
+        coefficients = {}
+        intercept = None
+        model = self.published_model or (self.model if self.is_trained else None)
+        if model is not None:
+            coefficients = dict(zip(self.feature_names, model.coef.tolist()))
+            intercept = model.intercept
+        
+        return {
+            'model_version': self.model_version,
+            'is_trained': self.is_trained,
+            'training_mode': self.training_mode,
+            'algorithm': 'Ridge',
+            'alpha': self.alpha,
+            'intercept': intercept,
+            'coefficients': coefficients,
+            'samples': len(self.training_data),
+            'labeled_samples': sum(1 for sample in self.training_data if sample.get('label_source') == 'outcome'),
+            'pending_samples': self.pending_samples,
+            'ingest': dict(self.ingest_stats),
+            'segments': self.registry.stats(),
+            'similarity': self.similarity.stats(),
+            'cohorts': self.cohorts.stats(),
+            'selection': self.last_selection,
+            'drift': self.drift.metrics(),
+            'retrains_promoted': self.selection_stats['promoted'],
+            'retrains_rejected': self.selection_stats['rejected'],
+            'predictions': self.prediction_count,
+            'avg_latency_ms': self.avg_latency_ms
+        }
+    
     def save_model(self):
         """Save model"""
+        if self.training_mode == 'external':
+            return False  # Serving is read-only; the trainer publishes
         try:
-            if self.is_trained:
-                joblib.dump(self.model, self.model_path)
-                joblib.dump(self.scaler, self.scaler_path)
-            joblib.dump(self.training_data, self.data_path)
+            os.makedirs(os.path.dirname(self.data_path) or '.', exist_ok=True)
+            if self.is_trained and self.model is not None:
+                self.model.save(self.model_path)
+            self.cohorts.save(self.cohort_path)
+            with open(self.data_path, 'wb') as f:
+                pickle.dump(self.training_data, f)
             return True
         except:
             return False
     
     def load_model(self):
         """Load model"""
+        if self.training_mode == 'external' and self.refresh_published_model(force=True):
+            return True
         try:
             if os.path.exists(self.data_path):
-                self.training_data = joblib.load(self.data_path)
+                with open(self.data_path, 'rb') as f:
+                    self.training_data = pickle.load(f)
+                # Samples saved before a feature was added default it to 0
+                for sample in self.training_data:
+                    for name in BASE_FEATURE_NAMES:
+                        sample.setdefault(name, 0)
+            
+            if os.path.exists(self.cohort_path):
+                cohorts = CohortModel.load(self.cohort_path)
+                if cohorts.feature_names == BASE_FEATURE_NAMES:
+                    self.cohorts = cohorts
+            
+            if os.path.exists(self.data_path):
+                self._label_cohorts(self.training_data)
+                self._rebuild_hashes()
+                self._seed_similarity()
             
-            if os.path.exists(self.model_path) and os.path.exists(self.scaler_path):
-                self.model = joblib.load(self.model_path)
-                self.scaler = joblib.load(self.scaler_path)
+            if os.path.exists(self.model_path):
+                model = CompactRidge.load(self.model_path)
+                if model.feature_names != self.feature_names:
+                    # Artifact from an older feature set - retrain on the loaded samples instead
+                    return self.train_model()
+                self.model = model
                 self.is_trained = True
+                self.model_version += 1
+                self.similarity.set_scaler(model.mean, model.scale)
+                self.drift.reset([[sample[name] for name in self.feature_names] for sample in self.training_data])
                 return True
         except:
             pass
         return False
 
-# Global fixed ML instance
-fixed_ml = FixedCustomerRiskML()
-fixed_ml.load_model()
\ No newline at end of file
+# Global fixed ML instance - built on first access, so importing this module
+# (e.g. for the train command) neither trains nor writes model files
+_fixed_ml = None
+_fixed_ml_lock = threading.Lock()
+
+def get_fixed_ml():
+    global _fixed_ml
+    with _fixed_ml_lock:
+        if _fixed_ml is None:
+            model = FixedCustomerRiskML()
+            model.load_model()
+            model.register_memory(memory_budget)
+            _fixed_ml = model
+    return _fixed_ml
+
+def fixed_ml_loaded():
+    """True once the global instance is built - get_fixed_ml() then returns at once"""
+    return _fixed_ml is not None
+
+def __getattr__(name):
+    if name == 'fixed_ml':
+        return get_fixed_ml()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def main(argv=None):
+    """Command line entry point - `python -m fixed_ml_system train`"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog='python -m fixed_ml_system', description='Customer DNA model tools')
+    commands = parser.add_subparsers(dest='command', required=True)
+    train = commands.add_parser('train', help='Retrain from the sample queue and publish model versions')
+    train.add_argument('--once', action='store_true', help='Run a single training pass and exit')
+    train.add_argument('--force', action='store_true', help='Publish even if fewer than RETRAIN_EVERY samples are queued')
+    train.add_argument('--interval', type=float, default=TRAINER['INTERVAL_SECONDS'], help='Seconds between training passes')
+    args = parser.parse_args(argv)
+    
+    from trainer import Trainer
+    trainer = Trainer(FixedCustomerRiskML(training_mode='external'))
+    if args.once:
+        manifest = trainer.train_once(force=args.force)
+        print(f"Published v{manifest['version']}" if manifest else f"Nothing to publish ({trainer.pending()} samples pending)")
+        return 0
+    try:
+        trainer.run(args.interval)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
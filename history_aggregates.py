@@ -0,0 +1,167 @@
+"""
+History Aggregates - Daily and monthly rollups of risk evaluations and executed interventions
+"""
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime
+import numpy as np
+from config import HISTORY
+from rule_engine import LEVEL_NAMES, risk_level_codes
+from intervention_engine import DEFAULT_TABLE as INTERVENTIONS, URGENCY_NAMES
+from memory_budget import memory_budget
+
+class HistoryAggregates:
+    """Pre-rolled tables behind the Historical Analysis charts.
+
+    Every risk evaluation - one per scored action, so a session counts once
+    per action - and every executed intervention is added to the bucket
+    for its day and the bucket for its month as it happens, so a chart reads
+    one small row per period instead of scanning raw events. A bucket is a
+    flat vector: counts by risk level, a score histogram in SCORE_BIN_WIDTH
+    bins plus the score sum, intervention counts by type and urgency, and the
+    expected number of crises those interventions prevented (the crisis
+    probability at execution times the intervention's success rate).
+    Daily buckets are kept for DAYS and monthly buckets for MONTHS.
+    """
+
+    def __init__(self, days=None, months=None, bin_width=None, crisis_cost=None, success_rates=None):
+        self.days = HISTORY['DAYS'] if days is None else days
+        self.months = HISTORY['MONTHS'] if months is None else months
+        self.bin_width = HISTORY['SCORE_BIN_WIDTH'] if bin_width is None else bin_width
+        self.crisis_cost = HISTORY['CRISIS_COST'] if crisis_cost is None else crisis_cost
+        self.success_rates = HISTORY['SUCCESS_RATES'] if success_rates is None else success_rates
+        self.types = list(INTERVENTIONS.types)
+        self.bins = -(-100 // self.bin_width)
+
+        # Offsets into a bucket vector
+        self.levels = slice(0, len(LEVEL_NAMES))
+        self.histogram = slice(self.levels.stop, self.levels.stop + self.bins)
+        self.score_sum = self.histogram.stop
+        self.interventions = slice(self.score_sum + 1, self.score_sum + 1 + len(self.types) * len(URGENCY_NAMES))
+        self.prevented = self.interventions.stop
+        self.size = self.prevented + 1
+
+        self.daily = {}  # Date ordinal -> bucket
+        self.monthly = {}  # year * 12 + month - 1 -> bucket
+        self.counts = Counter()
+        self.lock = threading.Lock()
+
+    def record_score(self, score, timestamp=None):
+        self.record_scores([score], timestamp)
+
+    def record_scores(self, scores, timestamp=None):
+        """Add risk evaluations - levels come from the scores, as in calculate_risk"""
+        scores = np.atleast_1d(np.asarray(scores, dtype=np.float64))
+        delta = np.zeros(self.size)
+        delta[self.levels] = np.bincount(risk_level_codes(scores), minlength=len(LEVEL_NAMES))
+        bins = np.minimum(np.clip(scores, 0, None) // self.bin_width, self.bins - 1).astype(np.int64)
+        delta[self.histogram] = np.bincount(bins, minlength=self.bins)
+        delta[self.score_sum] = scores.sum()
+        self._add(delta, timestamp)
+
+    def record_intervention(self, intervention_type, urgency, crisis_probability, timestamp=None):
+        """Add an executed intervention - crisis_probability is the 0-100 risk score it was executed at"""
+        delta = np.zeros(self.size)
+        delta[self.interventions.start + self.types.index(intervention_type) * len(URGENCY_NAMES) + URGENCY_NAMES.index(urgency)] = 1
+        delta[self.prevented] = crisis_probability / 100 * self.success_rates.get(intervention_type, 0.0)
+        self._add(delta, timestamp)
+
+    def daily_table(self, days=30, now=None):
+        """One row per day for the last `days` days, oldest first - days without events are zero"""
+        today = self._moment(now).date().toordinal()
+        keys = range(today - days + 1, today + 1)
+        return self._table(self.daily, keys, [date.fromordinal(key).isoformat() for key in keys])
+
+    def monthly_table(self, months=12, now=None):
+        """One row per calendar month for the last `months` months, oldest first"""
+        keys = self._month_keys(months, now)
+        return self._table(self.monthly, keys, [f"{key // 12}-{key % 12 + 1:02d}" for key in keys])
+
+    def score_distribution(self, months=12, now=None):
+        """Evaluations per score bin over the last `months` months"""
+        totals = self._sum(self.monthly, self._month_keys(months, now))
+        ends = [100 if i == self.bins - 1 else (i + 1) * self.bin_width - 1 for i in range(self.bins)]
+        return [{'score_range': f"{i * self.bin_width}-{end}", 'evaluations': int(count)}
+                for i, (end, count) in enumerate(zip(ends, totals[self.histogram]))]
+
+    def intervention_breakdown(self, months=12, now=None):
+        """Executed interventions per type and urgency over the last `months` months - types never executed are left out"""
+        totals = self._sum(self.monthly, self._month_keys(months, now))
+        counts = totals[self.interventions].reshape(len(self.types), len(URGENCY_NAMES)).astype(np.int64)
+        return [{'type': intervention_type, **{urgency: int(count) for urgency, count in zip(URGENCY_NAMES[1:], row[1:])},
+                 'total': int(row.sum())}
+                for intervention_type, row in zip(self.types, counts) if row.sum()]
+
+    def totals(self):
+        """Everything still held in the monthly buckets"""
+        with self.lock:
+            totals = sum(self.monthly.values(), np.zeros(self.size))
+            months = len(self.monthly)
+        return {**self._row(totals), 'months': months}
+
+    def stats(self):
+        with self.lock:
+            return {'daily_buckets': len(self.daily), 'monthly_buckets': len(self.monthly), **self.counts}
+
+    def trim(self, keep_ratio):
+        """Drop the oldest daily buckets until keep_ratio of them is left - monthly trends are kept"""
+        with self.lock:
+            for key in sorted(self.daily)[:len(self.daily) - int(len(self.daily) * keep_ratio)]:
+                del self.daily[key]
+                self.counts['evicted'] += 1
+
+    def nbytes(self):
+        with self.lock:
+            return (len(self.daily) + len(self.monthly)) * (self.size * 8 + 112)  # Vector data and header, plus its dict slot
+
+    def _add(self, delta, timestamp):
+        moment = self._moment(timestamp)
+        with self.lock:
+            for table, key, keep in ((self.daily, moment.date().toordinal(), self.days),
+                                     (self.monthly, _month_key(moment), self.months)):
+                bucket = table.get(key)
+                if bucket is None:
+                    newest = max(table, default=key)
+                    if key <= newest - keep:
+                        self.counts['too_old'] += 1  # Late event for a period already dropped
+                        continue
+                    bucket = table[key] = np.zeros(self.size)
+                    for old in [old for old in table if old <= max(newest, key) - keep]:
+                        del table[old]
+                bucket += delta
+            self.counts['events'] += 1
+
+    def _table(self, table, keys, labels):
+        with self.lock:
+            buckets = [table[key].copy() if key in table else np.zeros(self.size) for key in keys]
+        return [{'period': label, **self._row(bucket)} for label, bucket in zip(labels, buckets)]
+
+    def _row(self, bucket):
+        scored = int(bucket[self.levels].sum())
+        return {
+            'scored': scored,
+            **{level: int(count) for level, count in zip(LEVEL_NAMES, bucket[self.levels])},
+            'mean_score': float(bucket[self.score_sum] / scored) if scored else 0.0,
+            'interventions': int(bucket[self.interventions].sum()),
+            'prevented_crises': float(bucket[self.prevented]),
+            'savings': float(bucket[self.prevented] * self.crisis_cost)
+        }
+
+    def _sum(self, table, keys):
+        with self.lock:
+            return sum((table[key] for key in keys if key in table), np.zeros(self.size))
+
+    def _month_keys(self, months, now):
+        current = _month_key(self._moment(now))
+        return range(current - months + 1, current + 1)
+
+    def _moment(self, timestamp):
+        return datetime.fromtimestamp(time.time() if timestamp is None else timestamp)
+
+def _month_key(moment):
+    return moment.year * 12 + moment.month - 1
+
+# Shared across sessions - every dashboard session feeds the same history
+history = HistoryAggregates()
+memory_budget.register('caches', 'history', history.nbytes, history.trim)
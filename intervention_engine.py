@@ -0,0 +1,64 @@
+"""
+Intervention Engine - Decision-table interventions evaluated over factor matrices
+"""
+import numpy as np
+from config import INTERVENTION_RULES
+from rule_engine import FACTOR_NAMES, LEVEL_NAMES
+
+# Columns of the factor matrix the rules read - the rule factors plus the loss-chasing flag
+SIGNAL_NAMES = FACTOR_NAMES + ['Loss Chasing']
+
+# Compact urgency codes, higher is more urgent; 0 means the rule did not fire
+URGENCY_NAMES = ['NONE', 'MEDIUM', 'HIGH', 'CRITICAL']
+
+LOSS_CHASING_PATTERNS = [
+    ('deposit_after_depletion', 're-deposit after depletion'),
+    ('escalating_stakes', 'escalating stakes'),
+    ('rapid_redeposits', 'rapid re-deposits')
+]
+
+class InterventionTable:
+    """A decision table compiled into arrays.
+
+    Each rule becomes a signal column, a threshold and a row of urgency
+    codes indexed by overall risk level, so a whole portfolio is evaluated
+    with one comparison and one gather.
+    """
+
+    def __init__(self, rules=None):
+        rules = INTERVENTION_RULES if rules is None else rules
+        self.types = [rule['type'] for rule in rules]
+        self.actions = [rule['action'] for rule in rules]
+        self.columns = np.array([SIGNAL_NAMES.index(rule['factor']) for rule in rules], dtype=np.int64)
+        self.thresholds = np.array([rule['threshold'] for rule in rules], dtype=np.float64)
+        self.urgency = np.array([[URGENCY_NAMES.index(urgency) for urgency in rule['urgency']] for rule in rules],
+                                dtype=np.int8).reshape(len(rules), len(LEVEL_NAMES))
+
+    def evaluate(self, signals, level_codes):
+        """Urgency codes (n, rules) for a signal matrix (n, SIGNAL_NAMES) and overall level codes (n,)"""
+        signals = np.asarray(signals)
+        fired = signals[:, self.columns] >= self.thresholds
+        return np.where(fired, self.urgency[:, np.asarray(level_codes, dtype=np.int64)].T, 0).astype(np.int8)
+
+    def interventions(self, codes, level, context=None):
+        """Intervention dicts for one customer's urgency codes, most urgent first"""
+        context = dict(context or {}, level=level.lower())
+        level_code = LEVEL_NAMES.index(level)
+        fired = np.flatnonzero(codes)
+        order = fired[np.argsort(-codes[fired], kind='stable')]
+        return [{
+            'type': self.types[i],
+            'urgency': URGENCY_NAMES[codes[i]],
+            'action': self.actions[i][level_code].format(**context)
+        } for i in order]
+
+def signal_row(factors, loss_chasing=None):
+    """Signal matrix row for one scored session"""
+    flag = 1 if loss_chasing and loss_chasing.get('indicator') else 0
+    return np.array([[factors[name] for name in FACTOR_NAMES] + [flag]], dtype=np.float64)
+
+def loss_chasing_context(loss_chasing):
+    patterns = [label for key, label in LOSS_CHASING_PATTERNS if (loss_chasing or {}).get(key)]
+    return {'patterns': ', '.join(patterns)}
+
+DEFAULT_TABLE = InterventionTable()
@@ -0,0 +1,203 @@
+"""
+Load Test - Concurrent dashboard sessions driving the real scoring path
+
+    python load_test.py --sessions 200 --actions 25
+    python load_test.py --sessions 200 --actions 25 --processes 4
+
+Each simulated session belongs to its own customer. It repeats the dashboard's
+button actions (deposit, wager, location change, support contact) and after each
+one rescores the way a rerun does, with calculate_risk then get_interventions.
+Sessions run on a thread pool sharing one fixed_ml, or split across processes
+that each have their own. The run happens in a scratch directory, so retrains
+never overwrite the app's model files.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from metrics import latency_summary, lock_stats, reset_lock_stats
+from session_actions import new_session, add_deposit, place_wager, change_location, contact_support
+
+ACTIONS = ['deposit', 'wager', 'location', 'support']
+ACTION_WEIGHTS = [0.35, 0.4, 0.15, 0.1]
+LOCATIONS = ['Home', 'Work', 'Casino', 'Betting Shop']
+PROFESSIONS = ['Teacher', 'Executive', 'Business Owner', 'Nurse', 'Retired']
+RISK_CATEGORIES = ['Low', 'Medium', 'High', 'Critical']
+WORK_STRESS = ['Low', 'Medium', 'High', 'Very High']
+
+def make_profile(rng):
+    income = int(rng.integers(15000, 120000))
+    return {
+        'age': int(rng.integers(21, 75)), 'income': income,
+        'profession': PROFESSIONS[rng.integers(len(PROFESSIONS))],
+        'risk_category': RISK_CATEGORIES[rng.integers(len(RISK_CATEGORIES))],
+        'monthly_limit': int(income / 12 * rng.uniform(0.05, 0.5)),
+        'avg_session': int(rng.integers(30, 300)),
+        'work_stress': WORK_STRESS[rng.integers(len(WORK_STRESS))],
+        'support_contacts': int(rng.integers(0, 15)),
+        'financial_stress': int(rng.integers(1, 11))
+    }
+
+def run_session(index, actions, seed, think_ms=0):
+    """One analyst session - returns (latencies in ms, action counts, ML errors, ML calls over the latency budget)"""
+    from risk_engine import calculate_risk, get_interventions
+
+    rng = np.random.default_rng([seed, index])
+    profile = make_profile(rng)
+    session_data = new_session(f"LOAD{index:05d}", profile['avg_session'])
+    latencies = []
+    counts = Counter()
+    ml_fallbacks = budget_fallbacks = 0
+    for _ in range(actions):
+        action = ACTIONS[rng.choice(len(ACTIONS), p=ACTION_WEIGHTS)]
+        if action == 'wager' and session_data['balance'] <= 0:
+            action = 'deposit'  # The wager button refuses an empty balance
+        start = time.perf_counter()
+        if action == 'deposit':
+            add_deposit(session_data, float(rng.integers(10, 500)))
+        elif action == 'wager':
+            place_wager(session_data, float(min(session_data['balance'], rng.integers(5, 300))))
+        elif action == 'location':
+            change_location(session_data, LOCATIONS[rng.integers(len(LOCATIONS))])
+        else:
+            contact_support(session_data)
+        risk = calculate_risk(profile, session_data)
+        get_interventions(risk, profile)
+        latencies.append((time.perf_counter() - start) * 1000)
+        counts[action] += 1
+        ml_fallbacks += risk['ml_method'] == 'error_fallback'
+        budget_fallbacks += risk['fallback'] is not None
+        if think_ms:
+            time.sleep(think_ms / 1000)
+    return latencies, counts, ml_fallbacks, budget_fallbacks
+
+def run_sessions(indices, actions, threads, seed, think_ms=0):
+    """Run sessions on a thread pool against this process's fixed_ml - returns raw results and model counters"""
+    from fixed_ml_system import fixed_ml
+    from risk_engine import latency_budget
+    from audit_log import audit_log
+
+    version, promoted, rejected = fixed_ml.model_version, fixed_ml.selection_stats['promoted'], fixed_ml.selection_stats['rejected']
+    segment_retrains = fixed_ml.registry.counts['retrains']
+    reset_lock_stats()
+    latencies, counts, ml_fallbacks, budget_fallbacks = [], Counter(), 0, 0
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for session_latencies, session_counts, session_fallbacks, session_budget_fallbacks in pool.map(
+                lambda index: run_session(index, actions, seed, think_ms), indices):
+            latencies.extend(session_latencies)
+            counts.update(session_counts)
+            ml_fallbacks += session_fallbacks
+            budget_fallbacks += session_budget_fallbacks
+    # ML calls that overran their budget finish in the background - let them land before leaving the scratch directory
+    latency_budget.wait()
+    fixed_ml.registry.wait()
+    audit_log.flush()
+    return {
+        'latencies': latencies,
+        'actions': dict(counts),
+        'ml_fallbacks': ml_fallbacks,
+        'budget_fallbacks': budget_fallbacks,
+        'model_versions': fixed_ml.model_version - version,
+        'retrains_promoted': fixed_ml.selection_stats['promoted'] - promoted,
+        'retrains_rejected': fixed_ml.selection_stats['rejected'] - rejected,
+        'segment_retrains': fixed_ml.registry.counts['retrains'] - segment_retrains,
+        'ingest': dict(fixed_ml.ingest_stats),
+        'locks': lock_stats()
+    }
+
+def _warm_worker():
+    from fixed_ml_system import get_fixed_ml
+    get_fixed_ml()
+
+def run(sessions=50, actions=20, threads=None, processes=1, seed=42, think_ms=0):
+    """Drive sessions concurrently and summarize throughput, latency, retrains and lock contention.
+
+    With processes > 1 the sessions are split evenly and each process runs
+    its share on threads / processes threads.
+    """
+    threads = threads or sessions
+    start = time.perf_counter()
+    if processes > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        groups = [list(range(sessions))[i::processes] for i in range(processes)]
+        with ProcessPoolExecutor(max_workers=processes, initializer=_warm_worker) as pool:
+            start = time.perf_counter()
+            results = list(pool.map(run_sessions, groups, [actions] * processes,
+                                    [max(1, threads // processes)] * processes, [seed] * processes, [think_ms] * processes))
+    else:
+        _warm_worker()
+        start = time.perf_counter()
+        results = [run_sessions(range(sessions), actions, threads, seed, think_ms)]
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for result in results for latency in result['latencies']]
+    locks = {}
+    for result in results:
+        for name, stats in result['locks'].items():
+            total = locks.setdefault(name, dict.fromkeys(stats, 0))
+            for key in ['acquisitions', 'contended', 'wait_ms']:
+                total[key] += stats[key]
+            total['max_wait_ms'] = max(total['max_wait_ms'], stats['max_wait_ms'])
+    for total in locks.values():
+        total['contention_rate'] = total['contended'] / total['acquisitions'] if total['acquisitions'] else 0.0
+
+    summary = {
+        'sessions': sessions,
+        'processes': processes,
+        'threads': threads,
+        'requests': len(latencies),
+        'seconds': elapsed,
+        'requests_per_sec': len(latencies) / elapsed if elapsed > 0 else 0.0,
+        'latency': latency_summary(latencies),
+        'actions': dict(sum((Counter(result['actions']) for result in results), Counter())),
+        'ml_fallbacks': sum(result['ml_fallbacks'] for result in results),
+        'budget_fallbacks': sum(result['budget_fallbacks'] for result in results),
+        'locks': locks
+    }
+    for key in ['model_versions', 'retrains_promoted', 'retrains_rejected', 'segment_retrains']:
+        summary[key] = sum(result[key] for result in results)
+    summary['retrains_per_1k_requests'] = 1000 * summary['retrains_promoted'] / max(1, len(latencies))
+    summary['ingest'] = dict(sum((Counter(result['ingest']) for result in results), Counter()))
+    return summary
+
+def print_summary(summary, out=sys.stdout):
+    latency = summary['latency']
+    print(f"{summary['requests']:,} requests from {summary['sessions']} sessions "
+          f"({summary['processes']} process(es) x {summary['threads'] // summary['processes']} threads) "
+          f"in {summary['seconds']:.2f}s - {summary['requests_per_sec']:,.0f} requests/s", file=out)
+    print(f"Latency: mean {latency['mean_ms']:.2f} ms, p50 {latency['p50_ms']:.2f}, p90 {latency['p90_ms']:.2f}, "
+          f"p99 {latency['p99_ms']:.2f}, max {latency['max_ms']:.2f}", file=out)
+    print(f"Retrains: {summary['retrains_promoted']} promoted, {summary['retrains_rejected']} rejected "
+          f"({summary['retrains_per_1k_requests']:.2f} per 1k requests), {summary['segment_retrains']} segment", file=out)
+    print("Ingest: " + ", ".join(f"{key} {value}" for key, value in sorted(summary['ingest'].items())), file=out)
+    for name, stats in sorted(summary['locks'].items()):
+        print(f"Lock {name}: {stats['acquisitions']:,} acquires, {stats['contention_rate']:.1%} contended, "
+              f"{stats['wait_ms']:.1f} ms waiting (max {stats['max_wait_ms']:.2f} ms)", file=out)
+    if summary['budget_fallbacks']:
+        print(f"Latency budget: {summary['budget_fallbacks']} requests ({summary['budget_fallbacks'] / max(1, summary['requests']):.1%}) "
+              f"returned the rule score without waiting for ML", file=out)
+    if summary['ml_fallbacks']:
+        print(f"ML errors: {summary['ml_fallbacks']} requests fell back to the rules", file=out)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python load_test.py', description='Concurrent session load test for calculate_risk')
+    parser.add_argument('--sessions', type=int, default=50, help='Concurrent analyst sessions')
+    parser.add_argument('--actions', type=int, default=20, help='Button actions per session')
+    parser.add_argument('--threads', type=int, help='Thread pool size in total (default: one per session)')
+    parser.add_argument('--processes', type=int, default=1, help='Split sessions across this many processes')
+    parser.add_argument('--think-ms', type=float, default=0, help='Pause between a session\'s actions')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        summary = run(args.sessions, args.actions, args.threads, args.processes, args.seed, args.think_ms)
+    print_summary(summary)
+    return 1 if summary['ml_fallbacks'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Location Tracker - Fixed-size location history with running visit counters
+"""
+import time
+from collections import deque
+import numpy as np
+from config import SESSION_LIMITS
+
+# Interned location codes - index into LOCATIONS
+LOCATIONS = ['Home', 'Work', 'Casino', 'Betting Shop', 'Public', 'Other']
+LOCATION_CODES = {name: code for code, name in enumerate(LOCATIONS)}
+HIGH_RISK_LOCATIONS = ['Casino', 'Betting Shop']
+HIGH_RISK_CODES = [LOCATION_CODES[name] for name in HIGH_RISK_LOCATIONS]
+
+class LocationTracker:
+    """Ring of interned location codes with per-location counts over the ring.
+    
+    Counts are adjusted as visits enter and leave the ring, and high-risk visit
+    times are kept in a deque trimmed to the rate window, so every read is O(1)
+    amortized. len() and iteration cover the retained visits only, matching the
+    old capped list.
+    """
+    
+    def __init__(self, capacity=None, window_ms=None):
+        self.capacity = capacity or SESSION_LIMITS['MAX_LOCATION_HISTORY']
+        self.window_ms = window_ms or SESSION_LIMITS['LOCATION_RATE_WINDOW_MS']
+        self.codes = np.zeros(self.capacity, dtype=np.int8)
+        self.counts = np.zeros(len(LOCATIONS), dtype=np.int64)
+        self.total_visits = 0
+        self._high_risk_times = deque(maxlen=self.capacity)
+    
+    def append(self, location, timestamp_ms=None):
+        if timestamp_ms is None:
+            timestamp_ms = int(time.time() * 1000)
+        code = LOCATION_CODES.get(location, LOCATION_CODES['Other'])
+        slot = self.total_visits % self.capacity
+        
+        if self.total_visits >= self.capacity:
+            self.counts[self.codes[slot]] -= 1
+        self.codes[slot] = code
+        self.counts[code] += 1
+        self.total_visits += 1
+        
+        if code in HIGH_RISK_CODES:
+            self._high_risk_times.append(timestamp_ms)
+            self._expire(timestamp_ms)
+    
+    def _expire(self, now_ms):
+        cutoff = now_ms - self.window_ms
+        while self._high_risk_times and self._high_risk_times[0] <= cutoff:
+            self._high_risk_times.popleft()
+    
+    @property
+    def high_risk_visits(self):
+        return int(self.counts[HIGH_RISK_CODES].sum())
+    
+    def high_risk_visits_in_window(self, now_ms=None):
+        """High-risk visits within the rate window (last hour by default)"""
+        self._expire(int(time.time() * 1000) if now_ms is None else now_ms)
+        return len(self._high_risk_times)
+    
+    def visit_count(self, location):
+        return int(self.counts[LOCATION_CODES.get(location, LOCATION_CODES['Other'])])
+    
+    def __len__(self):
+        return min(self.total_visits, self.capacity)
+    
+    def __iter__(self):
+        retained = len(self)
+        start = (self.total_visits - retained) % self.capacity
+        for i in range(retained):
+            yield LOCATIONS[self.codes[(start + i) % self.capacity]]
+    
+    def __repr__(self):
+        return f"LocationTracker(visits={len(self)}, high_risk={self.high_risk_visits})"
+
+def high_risk_visit_counts(location_history):
+    """(retained high-risk visits, high-risk visits in the last hour) for a tracker or plain list"""
+    if isinstance(location_history, LocationTracker):
+        return location_history.high_risk_visits, location_history.high_risk_visits_in_window()
+    # Plain lists carry no timestamps, so no windowed rate
+    return sum(1 for loc in location_history if loc in HIGH_RISK_LOCATIONS), 0
@@ -0,0 +1,156 @@
+"""
+Loss Chasing Detector - Incremental per-customer state machine over deposits and wagers
+"""
+import sys
+import time
+from collections import Counter, OrderedDict
+from config import LOSS_CHASING
+
+class LossChasingDetector:
+    """Flags loss-chasing patterns from the event stream at O(1) per event.
+    
+    Signals:
+      - deposit after depletion: the latest deposit came once wagering had run
+        the balance down to DEPLETION_RATIO of its peak
+      - escalating stakes: ESCALATION_RUN consecutive stakes each at least
+        ESCALATION_FACTOR times the previous one
+      - rapid re-deposits: RAPID_REDEPOSIT_RUN deposits in a row, each within
+        RAPID_REDEPOSIT_MS of the previous one
+    """
+    __slots__ = ('balance', 'peak_balance', 'wagered_since_deposit', 'last_stake',
+                 'depleted_redeposit', 'escalation_run', 'last_deposit_ms', 'rapid_run', 'depletion_deposits',
+                 'escalations', 'rapid_redeposits', 'fast_stake', 'slow_stake', 'events')
+    
+    def __init__(self):
+        self.balance = 0.0
+        self.peak_balance = 0.0
+        self.wagered_since_deposit = False
+        self.last_stake = 0.0
+        self.depleted_redeposit = False
+        self.escalation_run = 0
+        self.last_deposit_ms = None
+        self.rapid_run = 0
+        self.depletion_deposits = 0
+        self.escalations = 0
+        self.rapid_redeposits = 0
+        self.fast_stake = 0.0
+        self.slow_stake = 0.0
+        self.events = 0
+    
+    def on_deposit(self, amount, timestamp_ms=None):
+        if timestamp_ms is None:
+            timestamp_ms = int(time.time() * 1000)
+        
+        self.depleted_redeposit = (self.wagered_since_deposit and
+                                   self.balance <= self.peak_balance * LOSS_CHASING['DEPLETION_RATIO'])
+        if self.depleted_redeposit:
+            self.depletion_deposits += 1
+        
+        if self.last_deposit_ms is not None and timestamp_ms - self.last_deposit_ms <= LOSS_CHASING['RAPID_REDEPOSIT_MS']:
+            self.rapid_run += 1
+            if self.rapid_run == LOSS_CHASING['RAPID_REDEPOSIT_RUN']:
+                self.rapid_redeposits += 1
+        else:
+            self.rapid_run = 0
+        
+        self.balance += amount
+        self.peak_balance = self.balance if self.wagered_since_deposit else max(self.peak_balance, self.balance)
+        self.wagered_since_deposit = False
+        self.last_deposit_ms = timestamp_ms
+        self.events += 1
+    
+    def on_wager(self, amount, timestamp_ms=None):
+        if self.last_stake > 0 and amount >= self.last_stake * LOSS_CHASING['ESCALATION_FACTOR']:
+            self.escalation_run += 1
+            if self.escalation_run == LOSS_CHASING['ESCALATION_RUN']:
+                self.escalations += 1
+        else:
+            self.escalation_run = 0
+        
+        # Fast vs slow stake averages - their ratio tracks spending acceleration
+        if self.slow_stake > 0:
+            self.fast_stake += 0.5 * (amount - self.fast_stake)
+            self.slow_stake += 0.1 * (amount - self.slow_stake)
+        else:
+            self.fast_stake = self.slow_stake = float(amount)
+        
+        self.balance = max(0.0, self.balance - amount)
+        self.wagered_since_deposit = True
+        self.last_stake = amount
+        self.events += 1
+    
+    @property
+    def escalating(self):
+        return self.escalation_run >= LOSS_CHASING['ESCALATION_RUN']
+    
+    @property
+    def rapid_redepositing(self):
+        return self.rapid_run >= LOSS_CHASING['RAPID_REDEPOSIT_RUN']
+    
+    @property
+    def indicator(self):
+        """1 while any loss-chasing signal is present, else 0"""
+        return int(self.depleted_redeposit or self.escalating or self.rapid_redepositing)
+    
+    @property
+    def spending_acceleration(self):
+        return self.fast_stake / self.slow_stake - 1 if self.slow_stake > 0 else 0.0
+    
+    def signals(self):
+        return {
+            'indicator': self.indicator,
+            'deposit_after_depletion': self.depleted_redeposit,
+            'escalating_stakes': self.escalating,
+            'rapid_redeposits': self.rapid_redepositing,
+            'spending_acceleration': self.spending_acceleration
+        }
+
+class LossChasingMonitor:
+    """One detector per customer for a mixed event stream.
+
+    Detectors are kept LRU-bounded to MAX_TRACKED customers - a customer
+    quiet for long enough to be evicted starts again from a clear detector.
+    nbytes and trim are the memory_budget hooks for an owner to register.
+    """
+    
+    def __init__(self, max_tracked=None):
+        self.max_tracked = LOSS_CHASING['MAX_TRACKED'] if max_tracked is None else max_tracked
+        self.detectors = OrderedDict()
+        self.counts = Counter()
+    
+    def process(self, customer_id, event_type, amount, timestamp_ms=None):
+        detector = self.detectors.get(customer_id)
+        if detector is None:
+            detector = self.detectors[customer_id] = LossChasingDetector()
+            self._evict(self.max_tracked)
+        else:
+            self.detectors.move_to_end(customer_id)
+        if event_type == 'deposit':
+            detector.on_deposit(amount, timestamp_ms)
+        else:
+            detector.on_wager(amount, timestamp_ms)
+        return detector
+    
+    def flagged_customers(self):
+        return [customer_id for customer_id, detector in self.detectors.items() if detector.indicator]
+    
+    def nbytes(self):
+        # Detectors are slotted and all the same size; keys and dict slots on top
+        per_detector = sys.getsizeof(LossChasingDetector()) + 8 * len(LossChasingDetector.__slots__) + 100
+        return len(self.detectors) * per_detector
+    
+    def trim(self, keep_ratio):
+        """Drop the least recently active customers until keep_ratio of them is left"""
+        self._evict(int(len(self.detectors) * keep_ratio))
+    
+    def _evict(self, limit):
+        while len(self.detectors) > limit:
+            self.detectors.popitem(last=False)
+            self.counts['evicted'] += 1
+
+def loss_chasing_signals(session_data):
+    """Signals for a session, all clear when it has no detector"""
+    detector = session_data.get('loss_chasing')
+    if detector is None:
+        return LossChasingDetector().signals()
+    return detector.signals()
@@ -0,0 +1,177 @@
+"""
+Memory Budget - Bytes per subsystem, configurable budgets and eviction when one is exceeded
+"""
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import types
+import weakref
+from collections import Counter
+import numpy as np
+from config import MEMORY_BUDGETS
+
+SUBSYSTEMS = ['session_state', 'training_buffer', 'model', 'caches', 'similarity_index', 'reference_data']
+
+# Shared, immutable or process-wide objects that are never charged to a subsystem
+_SKIP_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+def deep_sizeof(obj):
+    """Bytes held by obj and everything reachable from it, counting shared objects once.
+
+    Containers, __dict__ and __slots__ attributes are followed. numpy arrays
+    report their own buffer through sys.getsizeof, so views and memory-mapped
+    arrays count only their header. Classes, modules and functions are skipped.
+    """
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, _SKIP_TYPES):
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, (str, bytes, int, float, bool, np.ndarray, np.generic)) or item is None:
+            continue
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)) or type(item).__name__ == 'deque':
+            stack.extend(item)
+        if hasattr(item, '__dict__'):
+            stack.append(vars(item))
+        for cls in type(item).__mro__:
+            for slot in getattr(cls, '__slots__', ()):
+                if slot != '__weakref__' and hasattr(item, slot):
+                    stack.append(getattr(item, slot))
+    return total
+
+class MemoryBudget:
+    """Memory per subsystem, checked against byte budgets.
+
+    Each subsystem is a set of named components, each with a measure()
+    returning bytes and optionally an evict(keep_ratio) that drops its
+    least recently used entries until roughly keep_ratio of it is left.
+    When a subsystem is over budget every evictable component is asked to
+    shrink by the same ratio. Sessions are tracked individually and keyed
+    on their deposit ledger, so an entry disappears with its session.
+    A subsystem without a budget is reported but never evicted from.
+    """
+
+    def __init__(self, budgets=None):
+        self.budgets = dict(MEMORY_BUDGETS if budgets is None else budgets)
+        self.components = {name: {} for name in SUBSYSTEMS}
+        self.sessions = weakref.WeakKeyDictionary()  # deposit ledger -> session bytes at last check
+        self.counts = Counter()
+        self.checked_at = 0.0
+        self.enforcer = None  # Background enforce() started by maybe_enforce
+        self.enforce_errors = 0
+        self.last_error = None
+        self.lock = threading.Lock()
+        if self.budgets.get('TRACEMALLOC') or os.environ.get('CUSTOMER_DNA_TRACEMALLOC'):
+            tracemalloc.start()
+
+    def register(self, subsystem, component, measure, evict=None):
+        with self.lock:
+            self.components[subsystem][component] = (measure, evict)
+
+    def track_session(self, session_data):
+        """Measure one session and trim its intervention log if it is over the per-session budget"""
+        size = deep_sizeof(session_data)
+        log = session_data.get('executed_interventions')
+        while size > self.budgets['SESSION_BYTES'] and log:
+            # Ledgers and the location ring are fixed-size; the log is the part that can shrink
+            for _ in range(max(1, len(log) // 2)):
+                log.popleft()
+            self.counts['session_trims'] += 1
+            size = deep_sizeof(session_data)
+        with self.lock:
+            self.sessions[session_data['deposits']] = size
+        return size
+
+    def usage(self):
+        """{subsystem: {component: bytes}}"""
+        with self.lock:
+            components = {name: dict(parts) for name, parts in self.components.items()}
+            sessions = list(self.sessions.values())
+        usage = {name: {component: measure() for component, (measure, _) in parts.items()}
+                 for name, parts in components.items()}
+        usage['session_state']['sessions'] = sum(sessions)
+        return usage
+
+    def enforce(self):
+        """Shrink every subsystem that is over budget - returns {subsystem: bytes freed}"""
+        freed = {}
+        for subsystem, parts in self.usage().items():
+            budget = self.budgets.get(subsystem.upper())
+            used = sum(parts.values())
+            if not budget or used <= budget:
+                continue
+            keep_ratio = budget / used
+            with self.lock:
+                evictors = [evict for _, evict in self.components[subsystem].values() if evict is not None]
+            for evict in evictors:
+                evict(keep_ratio)
+            self.counts[f'{subsystem}_evictions'] += 1
+            freed[subsystem] = used - sum(self.usage()[subsystem].values())
+        self.checked_at = time.monotonic()
+        return freed
+
+    def maybe_enforce(self):
+        """Start enforce() on a background thread, at most once per CHECK_INTERVAL_SECONDS - True if one started.
+
+        Called from scoring and rendering, which must not wait on eviction - the
+        similarity index rebuilds its tree when it evicts.
+        """
+        with self.lock:
+            if self.enforcer is not None or time.monotonic() - self.checked_at < self.budgets['CHECK_INTERVAL_SECONDS']:
+                return False
+            self.checked_at = time.monotonic()
+            self.enforcer = threading.Thread(target=self._enforce_in_background, name='memory-budget', daemon=True)
+            self.enforcer.start()
+        return True
+
+    def _enforce_in_background(self):
+        try:
+            self.enforce()
+        except Exception as error:
+            self.enforce_errors += 1
+            self.last_error = repr(error)
+        finally:
+            with self.lock:
+                self.enforcer = None
+
+    def wait(self):
+        """Block until a background enforce() finishes"""
+        enforcer = self.enforcer
+        if enforcer is not None:
+            enforcer.join()
+
+    def report(self, top=5):
+        """Bytes and budget per subsystem, plus traced allocations by file when tracemalloc is on"""
+        usage = self.usage()
+        report = {
+            'subsystems': {name: {
+                'bytes': sum(parts.values()),
+                'budget': self.budgets.get(name.upper()),
+                'components': parts
+            } for name, parts in usage.items()},
+            'sessions_tracked': len(self.sessions),
+            'session_budget': self.budgets['SESSION_BYTES'],
+            'evictions': dict(self.counts),
+            'enforce_errors': self.enforce_errors
+        }
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            stats = tracemalloc.take_snapshot().statistics('filename')[:top]
+            report['tracemalloc'] = {
+                'current': current,
+                'peak': peak,
+                'top_files': [(os.path.basename(stat.traceback[0].filename), stat.size) for stat in stats]
+            }
+        return report
+
+# Shared by every session in the process
+memory_budget = MemoryBudget()
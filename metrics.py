@@ -0,0 +1,91 @@
+"""
+Metrics - Lock contention counters and latency summaries for sizing scoring workers
+"""
+import threading
+import time
+import weakref
+import numpy as np
+
+# Every live InstrumentedLock, for lock_stats()
+_LOCKS = weakref.WeakSet()
+
+class InstrumentedLock:
+    """Drop-in Lock/RLock that counts how often callers had to wait, and for how long.
+
+    An acquire first tries without blocking, so only contended acquires are
+    timed and an uncontended one costs a single extra call. The counters are
+    updated while the lock is held, so they need no lock of their own.
+    """
+
+    def __init__(self, name, reentrant=True):
+        self.name = name
+        self._lock = threading.RLock() if reentrant else threading.Lock()
+        self.reset()
+        _LOCKS.add(self)
+
+    def acquire(self, blocking=True, timeout=-1):
+        if self._lock.acquire(blocking=False):
+            self.acquisitions += 1
+            return True
+        if not blocking:
+            return False
+        start = time.perf_counter()
+        if not self._lock.acquire(timeout=timeout):
+            return False
+        waited = time.perf_counter() - start
+        self.acquisitions += 1
+        self.contended += 1
+        self.wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        return True
+
+    def release(self):
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def reset(self):
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def stats(self):
+        return {
+            'acquisitions': self.acquisitions,
+            'contended': self.contended,
+            'contention_rate': self.contended / self.acquisitions if self.acquisitions else 0.0,
+            'wait_ms': self.wait_seconds * 1000,
+            'max_wait_ms': self.max_wait_seconds * 1000
+        }
+
+def lock_stats():
+    """Contention per lock name, summed over every instrumented lock with that name"""
+    totals = {}
+    for lock in list(_LOCKS):
+        stats = lock.stats()
+        total = totals.setdefault(lock.name, dict.fromkeys(stats, 0))
+        for key in ['acquisitions', 'contended', 'wait_ms']:
+            total[key] += stats[key]
+        total['max_wait_ms'] = max(total['max_wait_ms'], stats['max_wait_ms'])
+    for total in totals.values():
+        total['contention_rate'] = total['contended'] / total['acquisitions'] if total['acquisitions'] else 0.0
+    return totals
+
+def reset_lock_stats():
+    for lock in list(_LOCKS):
+        lock.reset()
+
+def latency_summary(latencies_ms):
+    """Mean and tail percentiles of a list of latencies"""
+    if not len(latencies_ms):
+        return {'count': 0}
+    values = np.asarray(latencies_ms, dtype=np.float64)
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {'count': len(values), 'mean_ms': float(values.mean()), 'p50_ms': float(p50),
+            'p90_ms': float(p90), 'p99_ms': float(p99), 'max_ms': float(values.max())}
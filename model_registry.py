@@ -0,0 +1,251 @@
+"""
+Model Registry - Lazily loaded per-segment models with an LRU memory budget
+"""
+import json
+import os
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from config import MODEL_REGISTRY, MODEL_SELECTION
+from compact_model import CompactRidge
+from metrics import InstrumentedLock
+from model_selection import ridge_loo, beats_current, to_compact
+
+class ModelRegistry:
+    """Segment models keyed on (field, value), e.g. ('profession', 'Teacher').
+
+    Nothing is read at construction. A segment's artifact is loaded on its
+    first request - inline, or on the background thread for callers that
+    cannot wait on the disk - and kept in an LRU cache whose total size
+    stays within the memory budget; segments without an artifact are
+    remembered as missing so the global model answers without touching the
+    disk again.
+    Segments published by the standalone trainer are versioned artifacts;
+    invalidate() switches a segment to the version its manifest names.
+    Samples are buffered per segment and each segment retrains on its own
+    background thread once enough new ones arrive. A retrain picks alpha by
+    leave-one-out error and replaces the segment's model only if it beats it
+    on the samples that arrived since, as the global model does.
+    """
+
+    def __init__(self, feature_names, directory=None, segment_fields=None, memory_budget_bytes=None,
+                 min_samples=None, retrain_every=None, max_segment_samples=None, alphas=None):
+        self.feature_names = feature_names
+        self.directory = MODEL_REGISTRY['DIRECTORY'] if directory is None else directory
+        self.segment_fields = MODEL_REGISTRY['SEGMENT_FIELDS'] if segment_fields is None else segment_fields
+        self.memory_budget_bytes = MODEL_REGISTRY['MEMORY_BUDGET_BYTES'] if memory_budget_bytes is None else memory_budget_bytes
+        self.min_samples = MODEL_REGISTRY['MIN_SAMPLES'] if min_samples is None else min_samples
+        self.retrain_every = MODEL_REGISTRY['RETRAIN_EVERY'] if retrain_every is None else retrain_every
+        self.max_segment_samples = MODEL_REGISTRY['MAX_SEGMENT_SAMPLES'] if max_segment_samples is None else max_segment_samples
+        self.alphas = MODEL_SELECTION['ALPHAS'] if alphas is None else alphas
+
+        self.cache = OrderedDict()  # segment -> CompactRidge, least recently used first
+        self.cache_bytes = 0
+        self.missing = set()
+        self.published = {}  # segment -> version named by the trainer's manifest
+        self.samples = {}  # segment -> deque of (features, target)
+        self.pending = Counter()
+        self.retraining = set()
+        self.loading = set()  # Segments being read on the background thread
+        self.counts = Counter()
+        self.outcomes = {}  # segment -> Counter of promoted / rejected retrains
+        self.lock = InstrumentedLock('segment_registry')
+        self.executor = None
+
+    def segments_for(self, profile, cohort=None):
+        """Segments of a profile, most specific first - cohort is the session's behavioural cohort, if known"""
+        segments = []
+        for field in self.segment_fields:
+            value = cohort if field == 'cohort' and cohort is not None else profile.get(field)
+            if value not in (None, ''):
+                segments.append((field, str(value)))
+        return segments
+
+    def artifact_path(self, segment, version=None):
+        """Inline retrains overwrite one artifact per segment; published versions each get their own"""
+        field, value = segment
+        safe_value = ''.join(c if c.isalnum() else '_' for c in value)
+        suffix = '' if version is None else f"-v{version:06d}"
+        return os.path.join(self.directory, f"{field}-{safe_value}{suffix}.npz")
+
+    def get(self, segment, load=True):
+        """Loaded model for a segment, or None if it has no artifact.
+
+        With load=False a segment that is not cached yet is read on the
+        background thread instead, and None is returned until it is.
+        """
+        with self.lock:
+            model = self.cache.get(segment)
+            if model is not None:
+                self.cache.move_to_end(segment)
+                self.counts['hits'] += 1
+                return model
+            if segment in self.missing:
+                return None
+            if not load:
+                if segment not in self.loading:
+                    self.loading.add(segment)
+                    self.counts['deferred_loads'] += 1
+                    self._submit(self._load_in_background, segment)
+                return None
+            version = self.published.get(segment)
+
+        # Read outside the lock, so cached segments keep serving meanwhile
+        path = self.artifact_path(segment, version)
+        model = CompactRidge.load(path) if os.path.exists(path) else None
+        with self.lock:
+            if model is None or model.feature_names != self.feature_names:
+                # No artifact, or one from another feature set - serve the global model until it retrains
+                self.missing.add(segment)
+                return None
+            self.counts['loads'] += 1
+            if self.published.get(segment) == version:  # Not superseded while it was read
+                self._cache(segment, model)
+            return model
+
+    def model_for(self, profile, cohort=None, load=True):
+        """Most specific segment model available for a profile - (segment, model), or (None, None).
+
+        load=False never reads the disk on the caller; see get().
+        """
+        for segment in self.segments_for(profile, cohort):
+            model = self.get(segment, load)
+            if model is not None:
+                return segment, model
+        self.counts['fallbacks'] += 1
+        return None, None
+
+    def _load_in_background(self, segment):
+        try:
+            self.get(segment)
+        finally:
+            with self.lock:
+                self.loading.discard(segment)
+
+    def record(self, profile, features, target, cohort=None):
+        """Buffer a training sample for each of the profile's segments, retraining those that are due"""
+        row = np.array([features[name] for name in self.feature_names], dtype=np.float64)
+        due = []
+        with self.lock:
+            for segment in self.segments_for(profile, cohort):
+                buffer = self.samples.get(segment)
+                if buffer is None:
+                    buffer = self.samples[segment] = deque(maxlen=self.max_segment_samples)
+                buffer.append((row, float(target)))
+                self.pending[segment] += 1
+                if (len(buffer) >= self.min_samples and self.pending[segment] >= self.retrain_every
+                        and segment not in self.retraining):
+                    self.retraining.add(segment)
+                    due.append((segment, list(buffer), self.pending[segment]))
+                    self.pending[segment] = 0
+        for segment, rows, new_count in due:
+            self._submit(self._retrain, segment, rows, new_count)
+
+    def retrain(self, segment):
+        """Retrain one segment now on its buffered samples - the new model, or None if it was not promoted"""
+        with self.lock:
+            rows = list(self.samples.get(segment, ()))
+            new_count = self.pending[segment]
+            self.pending[segment] = 0
+            self.retraining.add(segment)
+        return self._retrain(segment, rows, new_count)
+
+    def _retrain(self, segment, rows, new_count):
+        try:
+            if len(rows) < self.min_samples:
+                return None
+            X = np.vstack([row for row, _ in rows])
+            y = np.array([target for _, target in rows])
+            selection = ridge_loo(X, y, self.alphas, MODEL_SELECTION['TIME_BUDGET_MS'])
+            previous = self.get(segment)
+            new_count = min(new_count, len(y)) if previous is not None else 0
+            current = previous.predict(X[len(y) - new_count:]) if new_count else []
+            promote, _, _ = beats_current(selection, current, y[len(y) - new_count:], MODEL_SELECTION['MIN_RMSE_GAIN'])
+            with self.lock:
+                self.outcomes.setdefault(segment, Counter())['promoted' if promote else 'rejected'] += 1
+                if not promote:
+                    self.counts['rejected'] += 1
+                    return None
+
+            model = to_compact(selection, self.feature_names, previous.version + 1 if previous else 1)
+            model.save(self.artifact_path(segment))
+            with self.lock:
+                self.missing.discard(segment)
+                self._cache(segment, model)
+                self.counts['retrains'] += 1
+            return model
+        finally:
+            with self.lock:
+                self.retraining.discard(segment)
+
+    def _submit(self, task, *args):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='segment-registry')
+        self.executor.submit(task, *args)
+
+    def _cache(self, segment, model):
+        old = self.cache.pop(segment, None)
+        if old is not None:
+            self.cache_bytes -= old.nbytes
+        self.cache[segment] = model
+        self.cache_bytes += model.nbytes
+        self._evict_to(self.memory_budget_bytes, keep=1)
+
+    def evict(self, keep_ratio):
+        """Drop least recently used segment models until keep_ratio of the cache is left"""
+        with self.lock:
+            self._evict_to(self.cache_bytes * keep_ratio)
+
+    def _evict_to(self, max_bytes, keep=0):
+        while self.cache_bytes > max_bytes and len(self.cache) > keep:
+            _, evicted = self.cache.popitem(last=False)
+            self.cache_bytes -= evicted.nbytes
+            self.counts['evictions'] += 1
+
+    def invalidate(self, versions):
+        """Apply published segment versions ({"field=value": version}) - stale cached models reload on next use"""
+        with self.lock:
+            for name, version in versions.items():
+                field, _, value = name.partition('=')
+                segment = (field, value)
+                self.published[segment] = version
+                self.missing.discard(segment)
+                cached = self.cache.get(segment)
+                if cached is not None and cached.version != version:
+                    self.cache.pop(segment)
+                    self.cache_bytes -= cached.nbytes
+
+    def wait(self):
+        """Block until queued background retrains and loads finish"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    def stats(self):
+        with self.lock:
+            return {
+                'loaded_segments': [segment_name(segment) for segment in self.cache],
+                'cache_bytes': self.cache_bytes,
+                'memory_budget_bytes': self.memory_budget_bytes,
+                'buffered_segments': len(self.samples),
+                **{name: self.counts[name] for name in ['hits', 'loads', 'deferred_loads', 'fallbacks', 'retrains', 'rejected', 'evictions']},
+                'segment_retrains': {segment_name(segment): dict(outcomes) for segment, outcomes in self.outcomes.items()}
+            }
+
+def segment_name(segment):
+    return f"{segment[0]}={segment[1]}"
+
+def read_manifest(path):
+    """Published model manifest, or None if nothing has been published"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_manifest(path, manifest):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
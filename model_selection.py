@@ -0,0 +1,74 @@
+"""
+Model Selection - Closed-form leave-one-out ridge validation over an alpha grid
+"""
+import time
+from collections import namedtuple
+import numpy as np
+from compact_model import CompactRidge
+
+RidgeSelection = namedtuple('RidgeSelection', [
+    'alpha', 'loo_mse', 'loo_residuals', 'mean', 'scale', 'coef', 'intercept', 'alpha_scores', 'elapsed_ms'
+])
+
+def ridge_loo(X, y, alphas, time_budget_ms=None):
+    """Pick the ridge alpha with the lowest leave-one-out error, from one SVD.
+
+    Features are standardized as StandardScaler would. With Z = U S V^T the
+    fit for any alpha is V diag(s / (s^2 + alpha)) U^T y and the hat matrix
+    diagonal is sum_j U_ij^2 s_j^2 / (s_j^2 + alpha) + 1/n (the intercept), so
+    each LOO residual is (y_i - fitted_i) / (1 - h_i) without refitting.
+    Alphas are tried in order and the grid stops early once the time budget
+    is spent; the first alpha is always scored.
+    """
+    start = time.perf_counter()
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+
+    mean = X.mean(axis=0)
+    scale = X.std(axis=0)
+    scale[scale == 0] = 1.0
+    Z = (X - mean) / scale
+    y_mean = y.mean()
+    U, s, Vt = np.linalg.svd(Z, full_matrices=False)
+    Uty = U.T @ (y - y_mean)
+    U_squared = U ** 2
+    s_squared = s ** 2
+
+    best = None
+    alpha_scores = {}
+    for alpha in alphas:
+        shrink = s_squared / (s_squared + alpha)
+        fitted = U @ (shrink * Uty) + y_mean
+        leverage = U_squared @ shrink + 1.0 / n
+        residuals = (y - fitted) / np.maximum(1.0 - leverage, 1e-12)
+        mse = float(np.mean(residuals ** 2))
+        alpha_scores[alpha] = mse
+        if best is None or mse < best[1]:
+            best = (alpha, mse, residuals, shrink)
+        if time_budget_ms is not None and (time.perf_counter() - start) * 1000 > time_budget_ms:
+            break
+
+    alpha, mse, residuals, shrink = best
+    coef = Vt.T @ (shrink / np.where(s > 0, s, 1.0) * Uty)
+    return RidgeSelection(alpha, mse, residuals, mean, scale, coef, y_mean, alpha_scores,
+                          (time.perf_counter() - start) * 1000)
+
+def to_compact(selection, feature_names, version=0):
+    return CompactRidge(feature_names, selection.mean, selection.scale, selection.coef, selection.intercept,
+                        version, len(selection.loo_residuals))
+
+def beats_current(selection, current_predictions, y_new, min_rmse_gain=0.0):
+    """Compare on the newest samples only - the candidate's LOO error against the current model's error.
+
+    Neither model has fitted those samples, so the comparison is out-of-sample for both.
+    The candidate must lower the RMSE by at least min_rmse_gain.
+    Returns (promote, candidate_mse, current_mse).
+    """
+    y_new = np.asarray(y_new, dtype=np.float64)
+    count = len(y_new)
+    if count == 0:
+        return True, None, None
+    candidate_mse = float(np.mean(selection.loo_residuals[-count:] ** 2))
+    current_mse = float(np.mean((y_new - np.asarray(current_predictions, dtype=np.float64)) ** 2))
+    return candidate_mse ** 0.5 + min_rmse_gain < current_mse ** 0.5, candidate_mse, current_mse
@@ -0,0 +1,32 @@
+"""
+Portfolio - Baseline rule scores for every customer in a profile store
+"""
+import numpy as np
+from rule_engine import rule_factors, rule_scores, risk_level_codes, location_factor, overall_multiplier
+
+class PortfolioScores:
+    """Baseline risk for the whole book, computed in one vectorized pass.
+
+    The baseline is the rule score of a reference session - one deposit
+    and one stake of the full monthly limit over an average-length
+    session at home - so it ranks customers by the exposure their profile
+    and limit allow. Rows line up with the store's rows.
+    """
+
+    def __init__(self, store):
+        columns = store.columns
+        count = len(store)
+        multipliers = np.array([overall_multiplier(label) for label in store.categories['risk_category']])
+        limit = columns['monthly_limit']
+        factors = rule_factors(
+            columns['income'], columns['avg_session'], columns['support_contacts'], columns['financial_stress'],
+            limit, np.ones(count), limit, np.ones(count),
+            columns['avg_session'], location_factor('Home'), np.zeros(count))
+        self.scores = rule_scores(factors, multipliers[columns['risk_category']]).astype(np.int16)
+        self.levels = risk_level_codes(self.scores)
+
+    def __len__(self):
+        return len(self.scores)
+
+    def level_counts(self):
+        return np.bincount(self.levels, minlength=4)
@@ -0,0 +1,166 @@
+"""
+Profile Store - Columnar customer profiles with categorical codes and memory-mapped reads
+"""
+import json
+import os
+from collections.abc import Mapping
+import numpy as np
+
+# Numeric profile columns and their storage dtypes
+NUMERIC_FIELDS = {
+    'age': np.int16,
+    'income': np.int64,
+    'monthly_limit': np.int64,
+    'avg_session': np.int32,
+    'support_contacts': np.int32,
+    'financial_stress': np.int16
+}
+
+# Text columns stored as integer codes into a per-column category list
+CATEGORICAL_FIELDS = [
+    'profession', 'risk_category', 'work_stress', 'emotional_state',
+    'gambling_trigger', 'spending_pattern', 'demo_scenario'
+]
+
+REQUIRED_FIELDS = ['age', 'income', 'profession', 'risk_category', 'monthly_limit',
+                   'avg_session', 'work_stress', 'support_contacts', 'financial_stress']
+
+ID_COLUMN = 'customer_id'
+
+class ProfileView(Mapping):
+    """Read-only dict-like view of one store row - values are read from the columns on access"""
+    __slots__ = ('_store', '_row')
+
+    def __init__(self, store, row):
+        self._store = store
+        self._row = row
+
+    def __getitem__(self, field):
+        return self._store.value(field, self._row)
+
+    def __iter__(self):
+        return iter(self._store.fields)
+
+    def __len__(self):
+        return len(self._store.fields)
+
+    @property
+    def customer_id(self):
+        return str(self._store.ids[self._row])
+
+    def __repr__(self):
+        return f"ProfileView({self.customer_id!r})"
+
+class ProfileStore:
+    """Customer profiles held column-wise.
+
+    Numeric fields are typed arrays, text fields are integer codes plus a
+    category list, and ids are a fixed-width string array with an id -> row
+    dict. Lookups return ProfileView rows, so nothing is copied per request.
+    A saved store is a directory of .npy files that load() can memory-map.
+    """
+
+    def __init__(self, ids, columns, categories):
+        self.ids = ids
+        self.columns = columns
+        self.categories = categories
+        self.fields = list(NUMERIC_FIELDS) + [name for name in CATEGORICAL_FIELDS if name in columns]
+        self.index = {customer_id: row for row, customer_id in enumerate(ids.tolist())}
+
+    @classmethod
+    def from_records(cls, records):
+        """Build from a {customer_id: profile dict} mapping"""
+        ids = list(records.keys())
+        rows = list(records.values())
+        columns = {}
+        categories = {}
+        for name, dtype in NUMERIC_FIELDS.items():
+            columns[name] = np.array([row[name] for row in rows], dtype=dtype)
+        for name in CATEGORICAL_FIELDS:
+            labels = sorted({row.get(name, '') for row in rows})
+            lookup = {label: code for code, label in enumerate(labels)}
+            columns[name] = np.array([lookup[row.get(name, '')] for row in rows], dtype=_code_dtype(len(labels)))
+            categories[name] = labels
+        return cls(np.array(ids, dtype=str), columns, categories)
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Build from a pandas DataFrame with a customer_id column"""
+        import pandas as pd
+
+        missing = [name for name in [ID_COLUMN] + REQUIRED_FIELDS if name not in frame.columns]
+        if missing:
+            raise ValueError(f"Profile file is missing columns: {', '.join(missing)}")
+
+        columns = {}
+        categories = {}
+        for name, dtype in NUMERIC_FIELDS.items():
+            columns[name] = frame[name].to_numpy(dtype=dtype)
+        for name in CATEGORICAL_FIELDS:
+            values = frame[name].fillna('') if name in frame.columns else pd.Series([''] * len(frame))
+            codes, labels = pd.factorize(values.astype(str), sort=True)
+            columns[name] = codes.astype(_code_dtype(len(labels)))
+            categories[name] = labels.tolist()
+        return cls(frame[ID_COLUMN].astype(str).to_numpy(dtype=str), columns, categories)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Load a .csv or .parquet file, or a directory written by save() (memory-mapped by default)"""
+        if os.path.isdir(path):
+            mode = 'r' if mmap else None
+            with open(os.path.join(path, 'categories.json')) as f:
+                categories = json.load(f)
+            ids = np.load(os.path.join(path, f'{ID_COLUMN}.npy'), mmap_mode=mode)
+            columns = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mode)
+                       for name in list(NUMERIC_FIELDS) + list(categories)}
+            return cls(ids, columns, categories)
+
+        import pandas as pd
+
+        if path.endswith('.parquet'):
+            try:
+                frame = pd.read_parquet(path)
+            except ImportError as e:
+                raise ImportError("Parquet profile files need pyarrow: pip install pyarrow") from e
+        else:
+            frame = pd.read_csv(path)
+        return cls.from_frame(frame)
+
+    def save(self, directory):
+        """Write one .npy per column plus the category lists"""
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, f'{ID_COLUMN}.npy'), np.asarray(self.ids))
+        for name, column in self.columns.items():
+            np.save(os.path.join(directory, f'{name}.npy'), np.asarray(column))
+        with open(os.path.join(directory, 'categories.json'), 'w') as f:
+            json.dump(self.categories, f)
+
+    def value(self, field, row):
+        if field in self.categories:
+            return self.categories[field][self.columns[field][row]]
+        return self.columns[field][row].item()
+
+    def labels(self, field):
+        """Decoded values of a categorical column for every customer"""
+        return np.asarray(self.categories[field], dtype=object)[self.columns[field]]
+
+    def row(self, customer_id):
+        return self.index[customer_id]
+
+    def keys(self):
+        return self.ids.tolist()
+
+    def __getitem__(self, customer_id):
+        return ProfileView(self, self.index[customer_id])
+
+    def __contains__(self, customer_id):
+        return customer_id in self.index
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+def _code_dtype(category_count):
+    return np.int8 if category_count < 128 else np.int16 if category_count < 32768 else np.int32
@@ -0,0 +1,334 @@
+"""
+Risk Engine - Session risk scoring and interventions, shared by the dashboard and batch scoring
+"""
+import copy
+import queue
+import threading
+import time
+from collections import Counter
+import numpy as np
+from config import LATENCY_BUDGETS
+from session_ledger import ledger_total
+from loss_chasing import loss_chasing_signals
+from rule_engine import FACTOR_NAMES, LEVEL_NAMES, rule_factors, rule_scores, risk_level_codes, location_factor, overall_multiplier
+from intervention_engine import DEFAULT_TABLE as INTERVENTIONS, URGENCY_NAMES, LOSS_CHASING_PATTERNS, signal_row, loss_chasing_context
+from history_aggregates import history
+from audit_log import audit_log
+
+class LatencyBudget:
+    """Keeps calculate_risk inside a per-call deadline.
+
+    Rule scoring always runs first, so a score is in hand before any ML
+    work starts. The ML path then runs inline only when it is expected to fit
+    in what is left of the budget; otherwise the call falls back to the rule
+    score. The expectation is a running mean plus twice the mean deviation of
+    recent ML calls, and every PROBE_EVERY-th call that would be skipped runs
+    anyway so a recovered model is noticed. Work that would block for much
+    longer never runs on the caller: building the model on first use, and
+    learning from a sample while a retrain holds the model or when the sample
+    would start one, go to a background learner thread instead.
+    """
+
+    def __init__(self, budget_ms=None, smoothing=None, probe_every=None, max_deferred=None):
+        self.budget_ms = LATENCY_BUDGETS['SCORING_MS'] if budget_ms is None else budget_ms
+        self.smoothing = LATENCY_BUDGETS['SMOOTHING'] if smoothing is None else smoothing
+        self.probe_every = LATENCY_BUDGETS['PROBE_EVERY'] if probe_every is None else probe_every
+        self.deferred = queue.Queue(maxsize=LATENCY_BUDGETS['MAX_DEFERRED'] if max_deferred is None else max_deferred)
+        self.learner = None  # Started on first deferral
+        self.mean_ms = 0.0
+        self.deviation_ms = 0.0
+        self.skipped = 0  # Consecutive calls skipped as too slow
+        self.counts = Counter()
+        self.last_error = None  # Of a deferred task - the learner thread has no caller to raise to
+        self.lock = threading.Lock()
+
+    @property
+    def estimate_ms(self):
+        return self.mean_ms + 2 * self.deviation_ms
+
+    def fits(self, remaining_ms):
+        """True if the ML path is expected to finish in remaining_ms - or it is time for a probe"""
+        with self.lock:
+            if remaining_ms is None or self.estimate_ms <= remaining_ms:
+                self.skipped = 0
+                return True
+            self.skipped += 1
+            if self.skipped >= self.probe_every:
+                self.skipped = 0
+                self.counts['probes'] += 1
+                return True
+            return False
+
+    def observe(self, elapsed_ms):
+        """Fold one inline ML call's latency into the estimate"""
+        with self.lock:
+            self.deviation_ms += self.smoothing * (abs(elapsed_ms - self.mean_ms) - self.deviation_ms)
+            self.mean_ms += self.smoothing * (elapsed_ms - self.mean_ms)
+
+    def defer(self, task, kind):
+        """Run task on the background learner - dropped, and counted, when the queue is full"""
+        with self.lock:
+            if self.learner is None:
+                self.learner = threading.Thread(target=self._learn, name='ml-learner', daemon=True)
+                self.learner.start()
+            try:
+                self.deferred.put_nowait(task)
+                self.counts[f'deferred_{kind}'] += 1
+            except queue.Full:
+                self.counts['deferred_dropped'] += 1
+
+    def record(self, elapsed_ms, budget_ms, fallback):
+        with self.lock:
+            self.counts['calls'] += 1
+            if fallback:
+                self.counts[f'fallback_{fallback}'] += 1
+            if budget_ms is not None and elapsed_ms > budget_ms:
+                self.counts['overruns'] += 1
+
+    def wait(self):
+        """Block until the background learner has run everything deferred so far"""
+        self.deferred.join()
+
+    def stats(self):
+        with self.lock:
+            calls = self.counts['calls']
+            fallbacks = sum(count for key, count in self.counts.items() if key.startswith('fallback_'))
+            return {
+                'budget_ms': self.budget_ms,
+                'estimate_ms': self.estimate_ms,
+                'calls': calls,
+                'fallbacks': fallbacks,
+                'fallback_rate': fallbacks / calls if calls else 0.0,
+                'overruns': self.counts['overruns'],
+                'overrun_rate': self.counts['overruns'] / calls if calls else 0.0,
+                'pending_deferred': self.deferred.unfinished_tasks,
+                'last_error': self.last_error,
+                **{key: count for key, count in self.counts.items() if key not in ('calls', 'overruns')}
+            }
+
+    def _learn(self):
+        while True:
+            task = self.deferred.get()
+            try:
+                task()
+            except Exception as error:
+                with self.lock:
+                    self.counts['deferred_errors'] += 1
+                    self.last_error = repr(error)
+            finally:
+                self.deferred.task_done()
+
+# Shared by every caller - one latency estimate and one background learner per process
+latency_budget = LatencyBudget()
+
+# Session fields extract_features reads - a deferred sample is learned from a copy of these alone
+LEARNING_FIELDS = ['customer', 'wagered', 'session_time', 'location', 'support_calls']
+LEARNING_TRACKERS = ['location_history', 'loss_chasing']
+
+def learning_copy(session_data):
+    """What learning reads from a session, copied so the caller can go on changing the session.
+
+    Ledgers copy their own arrays and window buckets; the intervention log and
+    anything else in the session is left behind.
+    """
+    copied = {name: session_data[name] for name in LEARNING_FIELDS if name in session_data}
+    for name in ['deposits', 'wagers']:
+        if name in session_data:
+            copied[name] = session_data[name].copy()
+    for name in LEARNING_TRACKERS:
+        if name in session_data:
+            copied[name] = copy.deepcopy(session_data[name])
+    return copied
+
+def calculate_risk(profile, session_data, learn=True, budget_ms=None):
+    """Enhanced risk calculation with learning ML system - learn=False scores without adding a training sample.
+
+    budget_ms (default LATENCY_BUDGETS['SCORING_MS']) bounds the call: when the ML
+    path would overrun it, the rule score is returned with fallback set to why.
+    """
+    start = time.perf_counter()
+    budget_ms = latency_budget.budget_ms if budget_ms is None else budget_ms
+    
+    # Always calculate rule-based factors for comparison and display - and as the fallback
+    deposits = session_data.get('deposits', [])
+    wagers = session_data.get('wagers', [])
+    factor_row = rule_factors(
+        profile['income'], profile['avg_session'], profile['support_contacts'], profile['financial_stress'],
+        ledger_total(deposits), len(deposits), session_data['wagered'], len(wagers),
+        session_data['session_time'], location_factor(session_data['location']), session_data['support_calls'])
+    factors = dict(zip(FACTOR_NAMES, factor_row[0].tolist()))
+    rule_risk_score = int(rule_scores(factor_row, overall_multiplier(profile['risk_category']))[0])
+    
+    fallback = None
+    model_version = None  # Of the model that scored - None when ML was not consulted
+    try:
+        # Use fixed ML system that learns from data
+        from fixed_ml_system import get_fixed_ml, fixed_ml_loaded
+        
+        if budget_ms is not None and not fixed_ml_loaded():
+            # Building the model trains it - far beyond any budget, so it happens in the background
+            fallback = 'model_load'
+            latency_budget.defer(get_fixed_ml, 'model_load')
+        elif budget_ms is not None and not latency_budget.fits(budget_ms - (time.perf_counter() - start) * 1000):
+            fallback = 'slow'
+        
+        if fallback:
+            ml_risk_score = rule_risk_score
+            ml_confidence = 0.5
+            ml_method = 'rule_based_fallback'
+            ml_samples = 0
+        else:
+            ml_start = time.perf_counter()
+            fixed_ml = get_fixed_ml()
+            model_version = fixed_ml.model_version
+            
+            # Get ML prediction (pure ML, no hardcoded rules) - under a budget a segment model
+            # not in memory yet is read in the background while the global model answers
+            ml_prediction = fixed_ml.predict_risk(profile, session_data, load_segments=budget_ms is None)
+            
+            # Add this interaction to training data for continuous learning - a sample
+            # that would wait on or run a retrain is learned in the background from a copy
+            if learn and budget_ms is not None and fixed_ml.learning_would_block():
+                session_copy = learning_copy(session_data)
+                latency_budget.defer(lambda: fixed_ml.add_training_sample(profile, session_copy, prediction=ml_prediction), 'learning')
+            elif learn:
+                fixed_ml.add_training_sample(profile, session_data, prediction=ml_prediction)
+            latency_budget.observe((time.perf_counter() - ml_start) * 1000)
+            
+            ml_risk_score = ml_prediction['risk_score']
+            ml_confidence = ml_prediction['confidence']
+            ml_method = ml_prediction['method']
+            ml_samples = ml_prediction.get('samples_used', 0)
+        
+    except Exception as e:
+        print(f"ML Error: {e}")
+        # Pure rule-based fallback
+        ml_risk_score = 50  # Default
+        ml_confidence = 0.5
+        ml_method = 'error_fallback'
+        ml_samples = 0
+    
+    # Use ML score if available and confident, otherwise use rule-based
+    if ml_method == 'ml_prediction' and ml_confidence > 0.7:
+        final_score = ml_risk_score
+        # Scale factors to match ML score
+        if rule_risk_score > 0:
+            scale = final_score / rule_risk_score
+            factors = {k: min(25 if k in ['Deposit', 'Spending'] else 20 if k == 'Session' else 15, 
+                             int(v * scale)) for k, v in factors.items()}
+    else:
+        final_score = rule_risk_score
+    
+    # Determine risk level
+    if final_score >= 80:
+        risk_level = "CRITICAL"
+    elif final_score >= 60:
+        risk_level = "HIGH"
+    elif final_score >= 40:
+        risk_level = "MEDIUM"
+    else:
+        risk_level = "LOW"
+    history.record_score(final_score)
+    audit_log.record('score', session_data.get('customer'), model_version=model_version, score=final_score,
+                     level=risk_level, rule_score=rule_risk_score, ml_score=ml_risk_score, ml_method=ml_method,
+                     fallback=fallback)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    latency_budget.record(elapsed_ms, budget_ms, fallback)
+    
+    return {
+        'score': final_score,
+        'level': risk_level,
+        'factors': factors,
+        'ml_used': ml_method == 'ml_prediction',
+        'ml_confidence': ml_confidence,
+        'ml_method': ml_method,
+        'ml_samples': ml_samples,
+        'rule_score': rule_risk_score,
+        'loss_chasing': loss_chasing_signals(session_data),
+        'learning_active': True,
+        'fallback': fallback,
+        'model_version': model_version,
+        'latency_ms': elapsed_ms
+    }
+
+def get_interventions(risk_result, profile):
+    """Decision-table interventions for the scored session, most urgent first"""
+    level = risk_result['level']
+    loss_chasing = risk_result.get('loss_chasing', {})
+    codes = INTERVENTIONS.evaluate(signal_row(risk_result['factors'], loss_chasing), [LEVEL_NAMES.index(level)])[0]
+    return INTERVENTIONS.interventions(codes, level, loss_chasing_context(loss_chasing))
+
+def score_batch(columns, model=None, registry=None, cohorts=None):
+    """calculate_risk and get_interventions over a batch of session aggregates, without learning from them.
+
+    columns maps field names to length-n arrays, as for fixed_ml_system.feature_matrix,
+    plus risk_category and optional loss-chasing pattern flags. Rule factors,
+    levels and intervention codes are computed over the whole batch. The ML score
+    comes from each row's segment model when the registry has one, else from model;
+    the overall score is the rule score, as in calculate_risk. cohorts assigns each
+    row its behavioural cohort, for the cohort_risk feature and cohort segments.
+    Returns output columns.
+    """
+    from fixed_ml_system import FEATURE_NAMES, feature_matrix
+    
+    X = feature_matrix(columns, cohorts)
+    n = len(X)
+    if cohorts is not None:
+        columns = {**columns, 'cohort': cohorts.assign(X[:, :-1])}
+    
+    # ML score per segment group - one predict call per distinct segment
+    ml_scores = np.full(n, 50, dtype=np.int64)
+    ml_segments = np.full(n, 'default' if model is None else 'global', dtype=object)
+    if model is not None:
+        ml_scores[:] = np.clip(model.predict(X), 15, 95).astype(np.int64)
+    if registry is not None and registry.segment_fields and all(field in columns for field in registry.segment_fields):
+        keys = np.stack([np.asarray(columns[field]).astype(str) for field in registry.segment_fields], axis=1)
+        groups, inverse = np.unique(keys, axis=0, return_inverse=True)
+        for group, values in enumerate(groups):
+            segment, segment_model = registry.model_for(dict(zip(registry.segment_fields, values.tolist())))
+            if segment_model is not None:
+                rows = inverse.ravel() == group
+                ml_scores[rows] = np.clip(segment_model.predict(X[rows]), 15, 95).astype(np.int64)
+                ml_segments[rows] = f"{segment[0]}={segment[1]}"
+    
+    # Rule factors reuse the feature matrix's location risk
+    labels, inverse = np.unique(np.asarray(columns['risk_category']).astype(str), return_inverse=True)
+    multipliers = np.array([overall_multiplier(label) for label in labels])[inverse.ravel()]
+    factors = rule_factors(
+        columns['income'], columns['avg_session'], columns['support_contacts'], columns['financial_stress'],
+        columns['total_deposits'], columns['deposit_count'], columns['wagered'], columns['wager_count'],
+        columns['session_time'], X[:, FEATURE_NAMES.index('location_risk')], columns['support_calls'])
+    scores = rule_scores(factors, multipliers)
+    levels = risk_level_codes(scores)
+    
+    loss_chasing = X[:, FEATURE_NAMES.index('loss_chasing_indicator')] > 0
+    codes = INTERVENTIONS.evaluate(np.column_stack([factors, loss_chasing]), levels)
+    patterns = np.column_stack([np.asarray(columns[key], dtype=bool) if key in columns else np.zeros(n, dtype=bool)
+                                for key, _ in LOSS_CHASING_PATTERNS])
+    
+    # Action text depends only on the fired codes, the level and the pattern flags,
+    # so it is formatted once per distinct combination and gathered back to the rows
+    combos, inverse = np.unique(np.column_stack([codes, levels, patterns]).astype(np.int8), axis=0, return_inverse=True)
+    rule_count = codes.shape[1]
+    interventions = np.empty(len(combos), dtype=object)
+    actions = np.empty(len(combos), dtype=object)
+    for i, combo in enumerate(combos):
+        flags = dict(zip((key for key, _ in LOSS_CHASING_PATTERNS), combo[rule_count + 1:]))
+        fired = INTERVENTIONS.interventions(combo[:rule_count], LEVEL_NAMES[combo[rule_count]], loss_chasing_context(flags))
+        interventions[i] = '; '.join(f"{item['type']} ({item['urgency']})" for item in fired)
+        actions[i] = '; '.join(item['action'] for item in fired)
+    inverse = inverse.ravel()
+    
+    return {
+        'score': scores,
+        'level': np.array(LEVEL_NAMES, dtype=object)[levels],
+        'rule_score': scores,
+        'ml_score': ml_scores,
+        'ml_segment': ml_segments,
+        **{f'{name.lower()}_factor': factors[:, i] for i, name in enumerate(FACTOR_NAMES)},
+        'loss_chasing': loss_chasing,
+        'urgency': np.array(URGENCY_NAMES, dtype=object)[codes.max(axis=1)],
+        'interventions': interventions[inverse],
+        'actions': actions[inverse],
+        **({'cohort': columns['cohort']} if cohorts is not None else {})
+    }
@@ -0,0 +1,62 @@
+"""
+Rule Engine - Vectorized rule-based risk factors for one session or a whole portfolio
+"""
+import numpy as np
+from config import RISK_LEVELS, PROFILE_MULTIPLIERS
+from location_tracker import HIGH_RISK_LOCATIONS
+
+FACTOR_NAMES = ['Deposit', 'Spending', 'Session', 'Location', 'Support']
+LEVEL_NAMES = ['LOW', 'MEDIUM', 'HIGH', 'CRITICAL']
+
+def location_factor(location):
+    """Location Risk (0-15) for a single venue"""
+    if location in HIGH_RISK_LOCATIONS:
+        return 15
+    if location == 'Work':
+        return 10
+    return 5
+
+def overall_multiplier(risk_category):
+    return PROFILE_MULTIPLIERS.get(risk_category, PROFILE_MULTIPLIERS['Medium'])['overall']
+
+def rule_factors(income, avg_session, support_contacts, financial_stress,
+                 total_deposits, deposit_count, wagered, wager_count,
+                 session_time, location_risk, support_calls):
+    """Factor matrix (n, 5) in FACTOR_NAMES order; every argument is a scalar or length-n array"""
+    income, avg_session, support_contacts, financial_stress, total_deposits, deposit_count, \
+        wagered, wager_count, session_time, location_risk, support_calls = np.broadcast_arrays(
+            *(np.atleast_1d(np.asarray(value, dtype=np.float64)) for value in (
+                income, avg_session, support_contacts, financial_stress, total_deposits, deposit_count,
+                wagered, wager_count, session_time, location_risk, support_calls)))
+    monthly_income = income / 12
+    has_income = monthly_income > 0
+    safe_income = np.where(has_income, monthly_income, 1)
+
+    # Deposit Risk (0-25)
+    deposit_ratio = np.where(has_income, total_deposits / safe_income, 0)
+    deposit = np.select([deposit_ratio > 2.0, deposit_ratio > 1.0, deposit_ratio > 0.5], [25, 18, 12], 5)
+    deposit = np.where(deposit_count > 0, np.minimum(25, deposit + np.minimum(5, deposit_count)), 0)
+
+    # Spending Risk (0-25)
+    spend_ratio = np.where(has_income, wagered / safe_income, 0)
+    spending = np.select([spend_ratio > 1.5, spend_ratio > 1.0, spend_ratio > 0.5], [25, 20, 15], 8)
+    spending = np.where(wagered > 0, np.minimum(25, spending + np.minimum(5, wager_count)), 0)
+
+    # Session Risk (0-20)
+    session_ratio = np.where(avg_session > 0, session_time / np.where(avg_session > 0, avg_session, 1), 1)
+    session = np.select([session_ratio > 2.0, session_ratio > 1.5], [20, 15], 8)
+
+    # Support Risk (0-15)
+    total_support = support_contacts + support_calls
+    support = np.select([total_support > 10, total_support > 5], [15, 12], 6)
+    support = np.minimum(15, support + financial_stress)
+
+    return np.stack([deposit, spending, session, location_risk, support], axis=1).astype(np.int64)
+
+def rule_scores(factors, multipliers):
+    """Overall rule score per row - factor sum scaled by the profile multiplier, capped at 100"""
+    return np.minimum(100, (factors.sum(axis=1) * multipliers).astype(np.int64))
+
+def risk_level_codes(scores):
+    """0-3 index into LEVEL_NAMES"""
+    return np.searchsorted([RISK_LEVELS['MEDIUM'], RISK_LEVELS['HIGH'], RISK_LEVELS['CRITICAL']], scores, side='right').astype(np.int8)
@@ -0,0 +1,94 @@
+"""
+Sample Queue - SQLite spool of training samples between serving and the trainer
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created REAL NOT NULL,
+    customer TEXT,
+    segments TEXT NOT NULL,
+    features BLOB NOT NULL,
+    target REAL NOT NULL,
+    label_source TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS trainer_state (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+class SampleQueue:
+    """Append-only sample table - serving processes put, the trainer reads.
+
+    WAL mode lets writers and the trainer work at the same time. Features
+    are stored as float64 bytes in the trainer's feature order; the trainer
+    remembers the last sample id it trained on, so a restart picks up
+    where it left off.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def put(self, features, target, label_source, segments=(), customer=None):
+        """Queue one sample - features is a sequence in feature order"""
+        with self.lock:
+            self.conn.execute(
+                'INSERT INTO samples (created, customer, segments, features, target, label_source) VALUES (?, ?, ?, ?, ?, ?)',
+                (time.time(), customer, json.dumps([list(segment) for segment in segments]),
+                 np.asarray(features, dtype=np.float64).tobytes(), float(target), label_source))
+
+    def last_id(self):
+        with self.lock:
+            return self.conn.execute('SELECT COALESCE(MAX(id), 0) FROM samples').fetchone()[0]
+
+    def count_after(self, sample_id, label_source=None):
+        with self.lock:
+            if label_source is None:
+                return self.conn.execute('SELECT COUNT(*) FROM samples WHERE id > ?', (sample_id,)).fetchone()[0]
+            return self.conn.execute('SELECT COUNT(*) FROM samples WHERE id > ? AND label_source = ?',
+                                     (sample_id, label_source)).fetchone()[0]
+
+    def window(self, limit, feature_count):
+        """Most recent samples, oldest first - (ids, X, y, segments per row).
+
+        Rows queued under a different feature set are skipped.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT id, segments, features, target FROM samples ORDER BY id DESC LIMIT ?', (limit,)).fetchall()
+        rows = [row for row in reversed(rows) if len(row[2]) == feature_count * 8]
+        ids = [row[0] for row in rows]
+        X = np.array([np.frombuffer(row[2], dtype=np.float64) for row in rows]).reshape(len(rows), feature_count)
+        y = np.array([row[3] for row in rows], dtype=np.float64)
+        segments = [[tuple(segment) for segment in json.loads(row[1])] for row in rows]
+        return ids, X, y, segments
+
+    def prune(self, keep):
+        """Drop all but the newest keep samples"""
+        with self.lock:
+            self.conn.execute('DELETE FROM samples WHERE id <= (SELECT COALESCE(MAX(id), 0) FROM samples) - ?', (keep,))
+
+    def get_state(self, key, default=0):
+        with self.lock:
+            row = self.conn.execute('SELECT value FROM trainer_state WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_state(self, key, value):
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO trainer_state (key, value) VALUES (?, ?)', (key, int(value)))
+
+    def close(self):
+        self.conn.close()
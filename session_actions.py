@@ -0,0 +1,50 @@
+"""
+Session Actions - The dashboard's deposit, wager, location and support actions on a session dict
+"""
+import time
+from session_ledger import SessionLedger, new_intervention_log
+from location_tracker import LocationTracker
+from loss_chasing import LossChasingDetector
+
+def new_session(customer, avg_session):
+    """Fresh session for a customer - starts with zero balance, must deposit to wager"""
+    return {
+        'customer': customer,
+        'balance': 0.0,
+        'wagered': 0,
+        'session_time': avg_session,
+        'location': 'Home',
+        'support_calls': 0,
+        'deposits': SessionLedger(),
+        'wagers': SessionLedger(),
+        'location_history': LocationTracker(),
+        'loss_chasing': LossChasingDetector(),
+        'executed_interventions': new_intervention_log()
+    }
+
+def add_deposit(session_data, amount, now_ms=None):
+    now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+    session_data['balance'] += amount
+    session_data['deposits'].append(amount, now_ms)
+    session_data['loss_chasing'].on_deposit(amount, now_ms)
+
+def place_wager(session_data, amount, now_ms=None):
+    """Stake from the balance - callers check the balance covers it"""
+    now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+    session_data['balance'] -= amount
+    session_data['wagered'] += amount
+    session_data['wagers'].append(amount, now_ms)
+    session_data['loss_chasing'].on_wager(amount, now_ms)
+
+def change_location(session_data, location):
+    # Track location history - fixed-size ring with running counters
+    if 'location_history' not in session_data:
+        session_data['location_history'] = LocationTracker()
+    session_data['location_history'].append(location)
+    session_data['location'] = location
+
+def contact_support(session_data):
+    session_data['support_calls'] += 1
+
+def set_session_time(session_data, minutes):
+    session_data['session_time'] = minutes
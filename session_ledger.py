@@ -0,0 +1,94 @@
+"""
+Session Ledger - Bounded per-session event log with O(1) aggregates
+"""
+import time
+from collections import deque
+import numpy as np
+from config import SESSION_LIMITS
+from sliding_window import VelocityWindows
+
+class SessionLedger:
+    """Fixed-size ring of recent amounts with running session totals.
+    
+    Amounts are stored as float32 and timestamps as int64 epoch milliseconds.
+    Only the most recent `capacity` events are retained; `total`, `count` and
+    len() cover every event appended during the session.
+    """
+    
+    def __init__(self, capacity=None):
+        self.capacity = capacity or SESSION_LIMITS['MAX_LEDGER_EVENTS']
+        self.amounts = np.zeros(self.capacity, dtype=np.float32)
+        self.timestamps = np.zeros(self.capacity, dtype=np.int64)
+        self.total = 0.0
+        self.count = 0
+        self.windows = VelocityWindows()
+    
+    def append(self, amount, timestamp_ms=None):
+        """Record an event, overwriting the oldest once the ring is full"""
+        if timestamp_ms is None:
+            timestamp_ms = int(time.time() * 1000)
+        slot = self.count % self.capacity
+        self.amounts[slot] = amount
+        self.timestamps[slot] = timestamp_ms
+        self.total += float(amount)
+        self.count += 1
+        self.windows.add(float(amount), timestamp_ms)
+    
+    def window_sum(self, name, now_ms=None):
+        """Total over a trailing VELOCITY_WINDOWS window, e.g. '1h' or '30d'"""
+        return self.windows.read(name, now_ms)[0]
+    
+    def window_count(self, name, now_ms=None):
+        return self.windows.read(name, now_ms)[1]
+    
+    def copy(self):
+        """Independent copy - arrays and window buckets are copied, not shared"""
+        other = SessionLedger.__new__(SessionLedger)
+        other.capacity, other.total, other.count = self.capacity, self.total, self.count
+        other.amounts, other.timestamps = self.amounts.copy(), self.timestamps.copy()
+        other.windows = self.windows.copy()
+        return other
+    
+    @property
+    def retained(self):
+        return min(self.count, self.capacity)
+    
+    @property
+    def last(self):
+        return float(self.amounts[(self.count - 1) % self.capacity]) if self.count else 0.0
+    
+    def recent(self):
+        """Retained (amounts, timestamps), oldest first"""
+        if self.count <= self.capacity:
+            return self.amounts[:self.count], self.timestamps[:self.count]
+        start = self.count % self.capacity
+        order = np.r_[start:self.capacity, 0:start]
+        return self.amounts[order], self.timestamps[order]
+    
+    def __len__(self):
+        return self.count
+    
+    def __bool__(self):
+        return self.count > 0
+    
+    def __iter__(self):
+        return iter(self.recent()[0].tolist())
+    
+    def __repr__(self):
+        return f"SessionLedger(count={self.count}, total={self.total:.2f}, retained={self.retained})"
+
+def new_intervention_log():
+    """Bounded log of executed interventions, oldest dropped first"""
+    return deque(maxlen=SESSION_LIMITS['MAX_INTERVENTION_LOG'])
+
+def ledger_window_sum(values, name, now_ms=None):
+    """Windowed total for a ledger - plain lists carry no timestamps and report 0"""
+    if isinstance(values, SessionLedger):
+        return values.window_sum(name, now_ms)
+    return 0.0
+
+def ledger_total(values):
+    """Session total for a ledger, or a plain list of amounts"""
+    if isinstance(values, SessionLedger):
+        return values.total
+    return sum(values)
@@ -0,0 +1,246 @@
+"""
+Similarity Index - Past customers nearest to a feature vector, for analysts reviewing a CRITICAL case
+"""
+import threading
+import time
+from collections import Counter
+import numpy as np
+from config import SIMILARITY
+from metrics import InstrumentedLock
+
+class SimilarityIndex:
+    """k nearest stored profiles by Euclidean distance between standardized feature vectors.
+
+    Raw vectors and what became of each profile (score, whether that score
+    is an outcome label, customer, time stored) live in growable arrays.
+    Rows before `sealed` are covered by a KD-tree (scipy's cKDTree) over the
+    vectors standardized with the scaler in force when it was built; newer
+    rows form a delta that every query scans exactly. Once the delta reaches
+    DELTA_MAX rows the tree is rebuilt on a background thread, picking up the
+    latest scaler, while queries keep using the old tree plus the delta.
+    Tree searches allow neighbours up to (1 + EPS) times further than the true
+    ones, which keeps a million-profile query under a millisecond. Without
+    scipy the sealed rows are scanned exactly in BLOCK_ROWS blocks instead.
+    """
+
+    def __init__(self, feature_names, k=None, eps=None, leaf_size=None, delta_max=None,
+                 block_rows=None, max_profiles=None):
+        self.feature_names = list(feature_names)
+        self.k = SIMILARITY['K'] if k is None else k
+        self.eps = SIMILARITY['EPS'] if eps is None else eps
+        self.leaf_size = SIMILARITY['LEAF_SIZE'] if leaf_size is None else leaf_size
+        self.delta_max = SIMILARITY['DELTA_MAX'] if delta_max is None else delta_max
+        self.block_rows = SIMILARITY['BLOCK_ROWS'] if block_rows is None else block_rows
+        self.max_profiles = SIMILARITY['MAX_PROFILES'] if max_profiles is None else max_profiles
+
+        dims = len(self.feature_names)
+        self.vectors = np.zeros((1024, dims), dtype=np.float32)
+        self.scores = np.zeros(1024, dtype=np.float32)
+        self.labeled = np.zeros(1024, dtype=bool)
+        self.stored_at = np.zeros(1024, dtype=np.float64)  # Epoch seconds
+        self.customers = []  # None for samples with no customer, e.g. synthetic training data
+        self.count = 0
+
+        # Scaler the sealed rows were standardized with - until one is set, the first build derives it
+        self.mean = np.zeros(dims)
+        self.scale = np.ones(dims)
+        self.scaler_set = False
+        self.next_scaler = None
+        self.sealed = 0
+        self.tree = None  # cKDTree, or (standardized rows, squared norms) for the blocked scan
+        self.backend = None
+        self.builder = None
+        self.counts = Counter()
+        self.query_seconds = 0.0
+        self.lock = InstrumentedLock('similarity')
+        self.build_lock = threading.Lock()  # One rebuild at a time - only a rebuild moves rows
+
+    def set_scaler(self, mean, scale):
+        """Standardize with a model's fitted scaler - applied at once while nothing is sealed, else at the next rebuild"""
+        scaler = (np.asarray(mean, dtype=np.float64), np.asarray(scale, dtype=np.float64))
+        with self.lock:
+            if self.tree is None:
+                self.mean, self.scale = scaler
+            else:
+                self.next_scaler = scaler
+            self.scaler_set = True
+
+    def add(self, vector, score, customer=None, labeled=False, stored_at=None):
+        self.add_many([vector], [score], [customer], [labeled], stored_at)
+
+    def add_many(self, vectors, scores, customers=None, labeled=None, stored_at=None):
+        """Append profiles - starts a background rebuild once the unsealed delta is full"""
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        n = len(vectors)
+        with self.lock:
+            self._reserve(self.count + n)
+            rows = slice(self.count, self.count + n)
+            self.vectors[rows] = vectors
+            self.scores[rows] = scores
+            self.labeled[rows] = False if labeled is None else labeled
+            self.stored_at[rows] = time.time() if stored_at is None else stored_at
+            self.customers.extend([None] * n if customers is None else customers)
+            self.count += n
+            self.counts['inserts'] += n
+            start_build = self.count - self.sealed >= self.delta_max and self.builder is None
+            if start_build:
+                self.builder = threading.Thread(target=self.rebuild, name='similarity-rebuild', daemon=True)
+        if start_build:
+            self.builder.start()
+
+    def rebuild(self, keep=None):
+        """Seal every row into a fresh tree, dropping all but the newest `keep` (default MAX_PROFILES)"""
+        with self.build_lock:
+            with self.lock:
+                end = self.count
+                start = max(0, end - (self.max_profiles if keep is None else keep))
+                vectors = self.vectors  # Rows below count never change while build_lock is held
+                scaler = self.next_scaler
+                if scaler is None and self.scaler_set:
+                    scaler = (self.mean, self.scale)
+            rows = vectors[start:end]
+            if scaler is None:
+                scale = rows.std(axis=0).astype(np.float64)
+                scale[scale == 0] = 1.0
+                scaler = (rows.mean(axis=0).astype(np.float64), scale)
+            tree, backend = self._build((rows - scaler[0]) / scaler[1])
+
+            with self.lock:
+                self._drop_oldest(start)
+                self.tree, self.backend = tree, backend
+                self.sealed = end - start
+                self.mean, self.scale = scaler
+                if self.next_scaler is scaler:
+                    self.next_scaler = None
+                self.counts['rebuilds'] += 1
+                if self.builder is threading.current_thread():
+                    self.builder = None
+
+    def wait(self):
+        """Block until a background rebuild finishes"""
+        builder = self.builder
+        if builder is not None and builder.is_alive():
+            builder.join()
+
+    def evict(self, keep_ratio):
+        """Keep the newest keep_ratio of the profiles"""
+        self.rebuild(keep=int(self.count * keep_ratio))
+
+    def query(self, vector, k=None, exclude=None):
+        """Nearest stored profiles - one per customer, skipping `exclude`, closest first"""
+        k = self.k if k is None else k
+        start = time.perf_counter()
+        with self.lock:
+            z = (np.asarray(vector, dtype=np.float64) - self.mean) / self.scale
+            # The delta is small enough to scan exactly, once - in float32, scaling the differences
+            difference = self.vectors[self.sealed:self.count] - np.asarray(vector, dtype=np.float32)
+            difference *= (1 / self.scale).astype(np.float32)
+            delta_distances = np.sqrt(np.einsum('ij,ij->i', difference, difference))
+            delta_order = np.argsort(delta_distances)
+
+            # One spare candidate covers the excluded customer; repeat rows of a customer widen the search
+            wanted = k + 1
+            while True:
+                results = self._nearest(z, wanted, delta_distances, delta_order, k, exclude)
+                if len(results) == k or wanted >= self.count:
+                    break
+                wanted *= 2
+            self.counts['queries'] += 1
+            self.query_seconds += time.perf_counter() - start
+        return results
+
+    def _nearest(self, z, wanted, delta_distances, delta_order, k, exclude):
+        distances, indices = self._search_sealed(z, wanted)
+        nearest = delta_order[:wanted]
+        distances = np.concatenate([distances, delta_distances[nearest]])
+        indices = np.concatenate([indices, nearest + self.sealed])
+
+        results = []
+        seen = {exclude}
+        for position in np.argsort(distances, kind='stable'):
+            row = int(indices[position])
+            customer = self.customers[row]
+            if customer in seen and customer is not None:
+                continue
+            seen.add(customer)
+            results.append({
+                'customer': customer,
+                'distance': float(distances[position]),
+                'score': float(self.scores[row]),
+                'outcome': bool(self.labeled[row]),
+                'stored_at': float(self.stored_at[row])
+            })
+            if len(results) == k:
+                break
+        return results
+
+    @property
+    def nbytes(self):
+        total = self.vectors.nbytes + self.scores.nbytes + self.labeled.nbytes + self.stored_at.nbytes
+        total += 8 * len(self.customers)  # List slots - customer names are shared with the sessions
+        if self.backend == 'kdtree':
+            total += self.tree.data.nbytes + self.tree.indices.nbytes
+        elif self.backend == 'blocked':
+            total += self.tree[0].nbytes + self.tree[1].nbytes
+        return total
+
+    def stats(self):
+        with self.lock:
+            return {
+                'profiles': self.count,
+                'indexed': self.sealed,
+                'delta': self.count - self.sealed,
+                'backend': self.backend or 'scan',
+                'rebuilds': self.counts['rebuilds'],
+                'queries': self.counts['queries'],
+                'avg_query_ms': 1000 * self.query_seconds / self.counts['queries'] if self.counts['queries'] else 0.0,
+                'nbytes': self.nbytes
+            }
+
+    def _build(self, standardized):
+        try:
+            from scipy.spatial import cKDTree
+        except ImportError:
+            rows = standardized.astype(np.float32)
+            return (rows, (rows.astype(np.float64) ** 2).sum(axis=1)), 'blocked'
+        # Unbalanced, uncompacted nodes build and query faster on clustered profiles
+        return cKDTree(standardized, leafsize=self.leaf_size, balanced_tree=False, compact_nodes=False), 'kdtree'
+
+    def _search_sealed(self, z, wanted):
+        if self.sealed == 0:
+            return np.zeros(0), np.zeros(0, dtype=np.int64)
+        wanted = min(wanted, self.sealed)
+        if self.backend == 'kdtree':
+            distances, indices = self.tree.query(z, k=wanted, eps=self.eps)
+            return np.atleast_1d(distances), np.atleast_1d(indices)
+
+        # Exact scan in blocks: |r - z|^2 = |r|^2 - 2 r.z + |z|^2, keeping each block's best
+        rows, norms = self.tree
+        best_distances, best_indices = [], []
+        for block in range(0, self.sealed, self.block_rows):
+            squared = norms[block:block + self.block_rows] - 2 * (rows[block:block + self.block_rows] @ z) + z @ z
+            nearest = np.argpartition(squared, wanted - 1)[:wanted] if len(squared) > wanted else np.arange(len(squared))
+            best_distances.append(np.sqrt(np.maximum(squared[nearest], 0)))
+            best_indices.append(nearest + block)
+        return np.concatenate(best_distances), np.concatenate(best_indices)
+
+    def _reserve(self, size):
+        if size <= len(self.scores):
+            return
+        capacity = max(size, 2 * len(self.scores))
+        for name in ['vectors', 'scores', 'labeled', 'stored_at']:
+            old = getattr(self, name)
+            grown = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            grown[:self.count] = old[:self.count]
+            setattr(self, name, grown)
+
+    def _drop_oldest(self, n):
+        if n <= 0:
+            return
+        kept = self.count - n
+        for name in ['vectors', 'scores', 'labeled', 'stored_at']:
+            array = getattr(self, name)
+            array[:kept] = array[n:self.count].copy()
+        del self.customers[:n]
+        self.count = kept
+        self.counts['dropped'] += n
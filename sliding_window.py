@@ -0,0 +1,81 @@
+"""
+Sliding Window - Bucketed trailing sums and counts with O(1) updates
+"""
+import time
+from config import VELOCITY_WINDOWS
+
+class BucketedWindow:
+    """Sum and count of events over a trailing time window.
+    
+    The window is a ring of equal-width time buckets. Adding an event or
+    reading the totals first expires buckets that fell out of the window, so
+    each operation touches at most bucket_count buckets and usually one.
+    The trailing edge is accurate to one bucket width.
+    """
+    
+    def __init__(self, window_ms, bucket_count):
+        self.bucket_count = bucket_count
+        self.bucket_ms = max(1, window_ms // bucket_count)
+        self.sums = [0.0] * bucket_count
+        self.counts = [0] * bucket_count
+        self.total = 0.0
+        self.count = 0
+        self.head = None  # Absolute index of the newest bucket
+    
+    def _advance(self, now_ms):
+        bucket = now_ms // self.bucket_ms
+        if self.head is None:
+            self.head = bucket
+            return
+        if bucket <= self.head:
+            return
+        for step in range(1, min(bucket - self.head, self.bucket_count) + 1):
+            slot = (self.head + step) % self.bucket_count
+            self.total -= self.sums[slot]
+            self.count -= self.counts[slot]
+            self.sums[slot] = 0.0
+            self.counts[slot] = 0
+        self.head = bucket
+        if self.count == 0:
+            self.total = 0.0  # Drop accumulated float error when empty
+    
+    def add(self, amount, timestamp_ms):
+        self._advance(timestamp_ms)
+        bucket = timestamp_ms // self.bucket_ms
+        if bucket <= self.head - self.bucket_count:
+            return  # Older than the window
+        slot = bucket % self.bucket_count
+        self.sums[slot] += amount
+        self.counts[slot] += 1
+        self.total += amount
+        self.count += 1
+    
+    def read(self, now_ms=None):
+        """(sum, count) of events in the window ending now"""
+        self._advance(int(time.time() * 1000) if now_ms is None else now_ms)
+        return self.total, self.count
+    
+    def copy(self):
+        other = BucketedWindow.__new__(BucketedWindow)
+        vars(other).update(vars(self))
+        other.sums, other.counts = list(self.sums), list(self.counts)
+        return other
+
+class VelocityWindows:
+    """One BucketedWindow per configured VELOCITY_WINDOWS entry"""
+    
+    def __init__(self, windows=None):
+        windows = windows or VELOCITY_WINDOWS
+        self.windows = {name: BucketedWindow(length_ms, buckets) for name, (length_ms, buckets) in windows.items()}
+    
+    def add(self, amount, timestamp_ms):
+        for window in self.windows.values():
+            window.add(amount, timestamp_ms)
+    
+    def read(self, name, now_ms=None):
+        return self.windows[name].read(now_ms)
+    
+    def copy(self):
+        other = VelocityWindows.__new__(VelocityWindows)
+        other.windows = {name: window.copy() for name, window in self.windows.items()}
+        return other
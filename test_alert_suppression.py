@@ -0,0 +1,83 @@
+"""
+Test alert suppression cool-downs, state changes, rate limits and bounds
+"""
+from alert_suppression import AlertSuppressor
+
+def test_repeats_suppressed_until_state_changes():
+    suppressor = AlertSuppressor(capacity=10, refill_per_minute=60, cooldown_seconds=300)
+    
+    assert suppressor.should_emit('sarah', 'Deposit Controls', 'HIGH', now=0)
+    assert not suppressor.should_emit('sarah', 'Deposit Controls', 'HIGH', now=10)
+    assert suppressor.should_emit('sarah', 'Deposit Controls', 'CRITICAL', now=20)
+    assert suppressor.should_emit('david', 'Deposit Controls', 'CRITICAL', now=20)
+    assert not suppressor.should_emit('sarah', 'Deposit Controls', 'CRITICAL', now=300)
+    assert suppressor.should_emit('sarah', 'Deposit Controls', 'CRITICAL', now=321)
+    
+    suppressor.clear('sarah', 'Deposit Controls')
+    assert suppressor.should_emit('sarah', 'Deposit Controls', 'CRITICAL', now=330)
+    
+    stats = suppressor.stats()
+    assert stats['emitted'] == 5 and stats['suppressed_cooldown'] == 2 and stats['suppressed'] == 2
+
+def test_token_bucket_limits_flapping_customer():
+    suppressor = AlertSuppressor(capacity=3, refill_per_minute=1, cooldown_seconds=0)
+    urgencies = ['HIGH', 'CRITICAL'] * 5
+    
+    emitted = [suppressor.should_emit('david', 'Session Management', urgency, now=i) for i, urgency in enumerate(urgencies)]
+    # The first rise to CRITICAL is an escalation and skips the bucket; flapping back to it does not
+    assert emitted == [True, True, True, True] + [False] * 6
+    assert suppressor.stats()['suppressed_rate_limit'] == 6 and suppressor.stats()['escalations'] == 1
+    
+    # One token back after a minute; other customers have their own bucket
+    assert suppressor.should_emit('david', 'Session Management', 'HIGH', now=70)
+    assert not suppressor.should_emit('david', 'Session Management', 'CRITICAL', now=71)
+    assert suppressor.should_emit('sarah', 'Session Management', 'HIGH', now=71)
+
+def test_escalation_after_a_burst_is_raised():
+    suppressor = AlertSuppressor(capacity=5, refill_per_minute=1, cooldown_seconds=900)
+    sarah = ('session-1', 'sarah')
+    
+    # MEDIUM, then HIGH - a level alert and interventions each time
+    assert suppressor.decide(sarah, 'Risk Level', 'MEDIUM', now=0, channel='risk_level') == 'emitted'
+    assert suppressor.filter(sarah, [{'type': 'Deposit Controls', 'urgency': 'MEDIUM'},
+                                     {'type': 'Enhanced Support', 'urgency': 'MEDIUM'}], now=0)
+    assert suppressor.decide(sarah, 'Risk Level', 'HIGH', now=10, channel='risk_level') == 'emitted'
+    assert suppressor.filter(sarah, [{'type': 'Deposit Controls', 'urgency': 'HIGH'}], now=10)
+    for i in range(5):  # Spends the intervention bucket
+        suppressor.should_emit(sarah, f"Other {i}", 'MEDIUM', now=15)
+    
+    assert suppressor.decide(sarah, 'Risk Level', 'CRITICAL', now=30, channel='risk_level') == 'emitted'
+    assert suppressor.should_emit(sarah, 'Deposit Controls', 'CRITICAL', now=30)  # Escalation skips the empty bucket
+    assert suppressor.decide(sarah, 'Risk Level', 'CRITICAL', now=40, channel='risk_level') == 'cooldown'
+    assert suppressor.decide(sarah, 'Other 0', 'MEDIUM', now=40) == 'cooldown'
+    assert suppressor.decide(sarah, 'Other 4', 'MEDIUM', now=40) == 'rate_limit'  # Never raised - not 'already raised'
+
+def test_filter_interventions():
+    suppressor = AlertSuppressor()
+    interventions = [{'type': 'Deposit Controls', 'urgency': 'HIGH'}, {'type': 'Enhanced Support', 'urgency': 'HIGH'}]
+    
+    assert suppressor.filter('sarah', interventions, now=0) == interventions
+    assert suppressor.filter('sarah', interventions, now=1) == []
+    interventions[1]['urgency'] = 'CRITICAL'
+    assert suppressor.filter('sarah', interventions, now=2) == [interventions[1]]
+
+def test_memory_is_bounded():
+    suppressor = AlertSuppressor(max_tracked=100)
+    for i in range(1000):
+        suppressor.should_emit(f"C{i}", 'Location Monitoring', 'MEDIUM', now=i)
+    
+    stats = suppressor.stats()
+    assert stats['tracked_alerts'] == 100 and stats['tracked_customers'] == 100
+    assert stats['evicted'] == 1800
+    
+    # Oldest keys were evicted, so they raise again; recent ones are still suppressed
+    assert suppressor.should_emit('C0', 'Location Monitoring', 'MEDIUM', now=1000)
+    assert not suppressor.should_emit('C999', 'Location Monitoring', 'MEDIUM', now=1000)
+
+if __name__ == "__main__":
+    test_repeats_suppressed_until_state_changes()
+    test_token_bucket_limits_flapping_customer()
+    test_escalation_after_a_burst_is_raised()
+    test_filter_interventions()
+    test_memory_is_bounded()
+    print("Alert suppression tests passed")
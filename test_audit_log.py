@@ -0,0 +1,84 @@
+"""
+Test the audit log - batched writes, rotation with compression, indexed reads and the scoring hook
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from audit_log import AuditLog, audit_log
+from fixed_ml_system import fixed_ml
+from risk_engine import calculate_risk
+
+def test_query_by_customer_and_time_across_sealed_segments():
+    with tempfile.TemporaryDirectory() as tmp:
+        log = AuditLog(tmp, segment_bytes=2000, batch_size=50, flush_interval=0.05)
+        for i in range(300):
+            log.record('score', f"C{i % 7}", model_version=3, score=i, level='LOW')
+            if i % 50 == 49:
+                log.flush()  # Several batches, so several segments
+        log.record('intervention', 'C1', model_version=3, type='Deposit Controls', urgency='HIGH')
+        middle = time.time()
+        log.record('score', 'C1', model_version=4, score=99, level='CRITICAL')
+
+        records = log.query('C1')
+        assert [record['score'] for record in records if record['kind'] == 'score'] == list(range(1, 300, 7)) + [99]
+        assert records[-2]['type'] == 'Deposit Controls' and records[-1]['model_version'] == 4
+        assert [record['score'] for record in log.query('C1', start=middle)] == [99]
+        assert len(log.query(kind='intervention')) == 1 and len(log.query()) == 302
+        assert log.query('nobody') == []
+
+        stats = log.stats()
+        assert stats['written'] == stats['accepted'] == 302 and stats['pending'] == 0
+        assert stats['segments'] > 1 and stats['compressed_bytes'] < stats['raw_bytes']
+        files = os.listdir(tmp)
+        assert not [name for name in files if name.endswith('.jsonl') and name.split('.')[0] + '.jsonl.gz' in files]
+
+        # A fresh reader, as another process would be, finds the same records from the files alone
+        log.rotate()
+        assert AuditLog(tmp).query('C1') == records
+
+def test_segments_left_by_other_processes():
+    with tempfile.TemporaryDirectory() as tmp:
+        exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+        exited.wait()
+        lines = [json.dumps({'ts': 100.0 + i, 'kind': 'score', 'customer': 'C9', 'score': i}) for i in range(3)]
+        with open(os.path.join(tmp, f"audit-00000000000000001-{exited.pid}.jsonl"), 'w') as f:
+            f.write('\n'.join(lines) + '\n{"ts": 10')  # Cut off mid-record
+        with open(os.path.join(tmp, f"audit-00000000000000002-{os.getppid()}.jsonl"), 'w') as f:
+            f.write(json.dumps({'ts': 200.0, 'kind': 'score', 'customer': 'C9', 'score': 7}) + '\n')
+
+        log = AuditLog(tmp, flush_interval=0.01)
+        log.record('score', 'C9', score=8)
+        assert [record['score'] for record in log.query('C9')] == [0, 1, 2, 7, 8]
+        assert log.stats()['orphans_sealed'] == 1  # The live writer's segment is read, not sealed
+        assert [record['score'] for record in log.query('C9', start=101, end=250)] == [1, 2, 7]
+
+def test_full_buffer_drops_instead_of_blocking():
+    with tempfile.TemporaryDirectory() as tmp:
+        log = AuditLog(tmp, batch_size=1000, flush_interval=60, max_pending=3)
+        accepted = [log.record('score', 'C1', score=i) for i in range(5)]
+        assert accepted == [True, True, True, False, False]
+        log.flush()
+        assert log.stats()['written'] == 3 and log.stats()['dropped'] == 2
+
+def test_calculate_risk_is_audited_with_the_model_version():
+    profile = {"age": 42, "income": 65000, "profession": "Executive", "risk_category": "Medium",
+               "monthly_limit": 1200, "avg_session": 120, "work_stress": "Medium",
+               "support_contacts": 2, "financial_stress": 4}
+    customer = f"audit-{time.time_ns()}"
+    session = {'customer': customer, 'balance': 0, 'wagered': 250, 'session_time': 120,
+               'location': 'Home', 'support_calls': 0, 'deposits': [], 'wagers': []}
+    assert fixed_ml.is_trained  # Loaded, so the call scores with ML rather than falling back
+    risk = calculate_risk(profile, session, learn=False, budget_ms=5000)
+    [record] = audit_log.query(customer, kind='score')
+    assert record['score'] == risk['score'] and record['level'] == risk['level']
+    assert record['model_version'] == risk['model_version'] is not None and record['fallback'] is None
+
+if __name__ == "__main__":
+    test_query_by_customer_and_time_across_sealed_segments()
+    test_segments_left_by_other_processes()
+    test_full_buffer_drops_instead_of_blocking()
+    test_calculate_risk_is_audited_with_the_model_version()
+    print("Audit log tests passed")
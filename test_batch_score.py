@@ -0,0 +1,116 @@
+"""
+Test headless batch scoring against the dashboard's per-session scoring
+"""
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from batch_score import run, load_scoring_model
+from fixed_ml_system import fixed_ml, feature_matrix
+from risk_engine import calculate_risk, get_interventions, score_batch
+from session_ledger import SessionLedger
+
+PROFILES = [
+    {"age": 34, "income": 28000, "profession": "Teacher", "risk_category": "High", "monthly_limit": 500,
+     "avg_session": 180, "work_stress": "High", "support_contacts": 6, "financial_stress": 8},
+    {"age": 42, "income": 65000, "profession": "Executive", "risk_category": "Medium", "monthly_limit": 1200,
+     "avg_session": 120, "work_stress": "Medium", "support_contacts": 2, "financial_stress": 4},
+    {"age": 29, "income": 42000, "profession": "Business Owner", "risk_category": "Critical", "monthly_limit": 2000,
+     "avg_session": 300, "work_stress": "Very High", "support_contacts": 12, "financial_stress": 10},
+    {"age": 67, "income": 15000, "profession": "Retired", "risk_category": "Low", "monthly_limit": 300,
+     "avg_session": 0, "work_stress": "Low", "support_contacts": 0, "financial_stress": 2}
+]
+
+def make_session(deposits, wagers, session_time, location, support_calls):
+    session = {'wagered': sum(wagers), 'session_time': session_time, 'location': location,
+               'support_calls': support_calls, 'deposits': SessionLedger(), 'wagers': SessionLedger()}
+    for amount in deposits:
+        session['deposits'].append(amount)
+    for amount in wagers:
+        session['wagers'].append(amount)
+    return session
+
+def make_rows(count, seed=3):
+    """Random profile/session rows plus the matching per-session inputs"""
+    rng = np.random.default_rng(seed)
+    rows, sessions = [], []
+    for i in range(count):
+        profile = PROFILES[i % len(PROFILES)]
+        deposits = rng.integers(10, 900, rng.integers(0, 4)).tolist()
+        wagers = rng.integers(10, 700, rng.integers(0, 4)).tolist() if deposits else []
+        session = make_session(deposits, wagers, int(rng.integers(10, 600)),
+                               ['Home', 'Work', 'Casino', 'Betting Shop'][int(rng.integers(0, 4))], int(rng.integers(0, 4)))
+        sessions.append((profile, session))
+        rows.append({'customer_id': f"C{i:05d}", **profile,
+                     'total_deposits': sum(deposits), 'deposit_count': len(deposits),
+                     'wagered': sum(wagers), 'wager_count': len(wagers),
+                     'session_time': session['session_time'], 'location': session['location'],
+                     'support_calls': session['support_calls'],
+                     # Everything was just added, so it all falls in the 15 minute and 1 hour windows
+                     'deposits_15m': sum(deposits), 'deposits_1h': sum(deposits),
+                     'wagers_15m': sum(wagers), 'wagers_1h': sum(wagers)})
+    return pd.DataFrame(rows), sessions
+
+def test_feature_matrix_matches_extract_features():
+    frame, sessions = make_rows(40)
+    X = feature_matrix({name: frame[name].to_numpy() for name in frame.columns}, fixed_ml.cohorts)
+    expected = [[fixed_ml.extract_features(profile, session)[name] for name in fixed_ml.feature_names]
+                for profile, session in sessions]
+    assert np.allclose(X, expected)
+
+def test_batch_matches_calculate_risk_and_interventions():
+    frame, sessions = make_rows(60)
+    samples = len(fixed_ml.training_data)
+    result = score_batch({name: frame[name].to_numpy() for name in frame.columns}, fixed_ml.model, fixed_ml.registry, fixed_ml.cohorts)
+
+    for row, (profile, session) in enumerate(sessions):
+        risk = calculate_risk(profile, session, learn=False)
+        assert result['score'][row] == risk['score']
+        assert result['level'][row] == risk['level']
+        assert [result[f'{name.lower()}_factor'][row] for name in risk['factors']] == list(risk['factors'].values())
+        assert result['ml_score'][row] == fixed_ml.predict_risk(profile, session)['risk_score']
+        interventions = get_interventions(risk, profile)
+        assert result['interventions'][row] == '; '.join(f"{item['type']} ({item['urgency']})" for item in interventions)
+        assert result['actions'][row] == '; '.join(item['action'] for item in interventions)
+
+    # Scoring without learning leaves the training buffer alone
+    assert len(fixed_ml.training_data) == samples
+
+def test_chunked_and_parallel_runs_write_every_row_in_order():
+    frame, _ = make_rows(250)
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'sessions.csv')
+        frame.to_csv(source, index=False)
+        model_path = os.path.join(tmp, 'model.npz')
+        load_scoring_model().save(model_path)
+
+        single = os.path.join(tmp, 'single.csv')
+        stats = run(source, single, chunk_size=40, workers=1, model_path=model_path, progress=None)
+        parallel = os.path.join(tmp, 'parallel.csv')
+        run(source, parallel, chunk_size=40, workers=2, model_path=model_path, progress=None)
+
+        scored = pd.read_csv(single)
+        assert stats['rows'] == len(scored) == 250
+        assert sum(stats['levels'].values()) == 250
+        assert scored['customer_id'].tolist() == frame['customer_id'].tolist()
+        assert scored.equals(pd.read_csv(parallel))
+        assert not os.path.exists(single + '.tmp')
+
+def test_missing_columns_leave_no_output():
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'sessions.csv')
+        pd.DataFrame({'age': [30], 'income': [40000]}).to_csv(source, index=False)
+        output = os.path.join(tmp, 'scored.csv')
+        try:
+            run(source, output, progress=None)
+            assert False, "expected missing columns to fail"
+        except ValueError as e:
+            assert 'risk_category' in str(e)
+        assert not os.path.exists(output) and not os.path.exists(output + '.tmp')
+
+if __name__ == "__main__":
+    test_feature_matrix_matches_extract_features()
+    test_batch_matches_calculate_risk_and_interventions()
+    test_chunked_and_parallel_runs_write_every_row_in_order()
+    test_missing_columns_leave_no_output()
+    print("Batch scoring tests passed")
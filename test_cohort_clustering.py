@@ -0,0 +1,120 @@
+"""
+Test streaming behavioural cohorts - initial fit, mini-batch updates, persistence and the fixed_ml hooks
+"""
+import os
+import pickle
+import tempfile
+import numpy as np
+from config import COHORTS
+from cohort_clustering import CohortModel
+from fixed_ml_system import FixedCustomerRiskML, BASE_FEATURE_NAMES
+
+FEATURES = ['deposits', 'session_time', 'support_calls']
+CENTERS = np.array([[50.0, 30.0, 0.0], [500.0, 120.0, 2.0], [2000.0, 300.0, 8.0]])
+
+def blobs(seed=0, per_center=100, centers=CENTERS):
+    rng = np.random.default_rng(seed)
+    X = np.concatenate([center + rng.normal(scale=[10.0, 5.0, 0.3], size=(per_center, 3)) for center in centers])
+    scores = np.repeat([20.0, 50.0, 90.0], per_center)
+    return X, scores
+
+def test_fit_finds_cohorts_and_their_risk():
+    X, scores = blobs()
+    cohorts = CohortModel.fit(X, scores, FEATURES, k=3)
+    labels = cohorts.assign(X)
+    for block in range(3):
+        assert len(set(labels[block * 100:(block + 1) * 100])) == 1
+    assert len(set(labels)) == 3
+    assert np.allclose(sorted(cohorts.risk), [20, 50, 90])
+    assert cohorts.assign(CENTERS[2]) == labels[-1]
+    assert cohorts.cohort_risk(CENTERS[2:]) == [90]
+
+def test_stream_moves_centroids_toward_new_behaviour():
+    X, scores = blobs()
+    cohorts = CohortModel.fit(X, scores, FEATURES, k=3)
+    high = cohorts.assign(CENTERS[2])
+    before = cohorts.centroids[high].copy()
+
+    # The high spenders drift upward and their outcomes get worse
+    shifted, _ = blobs(seed=1, per_center=COHORTS['BATCH_SIZE'] * 20, centers=CENTERS[2:] + [400.0, 0.0, 0.0])
+    for vector in shifted:
+        cohorts.observe(vector, 95.0)
+
+    assert cohorts.version == 20
+    moved = cohorts.centroids[high] * cohorts.scale + cohorts.mean
+    assert 2000 + 100 < moved[0] < 2400 and not np.allclose(cohorts.centroids[high], before)
+    assert 90 < cohorts.risk[high] <= 95
+    assert cohorts.counts.max() <= COHORTS['MAX_WEIGHT']
+    assert cohorts.assign(CENTERS[2] + [400.0, 0.0, 0.0]) == high
+
+def test_unlabeled_vectors_move_centroids_but_not_risk():
+    X, scores = blobs()
+    cohorts = CohortModel.fit(X, scores, FEATURES, k=3)
+    high = cohorts.assign(CENTERS[2])
+    risk, before = cohorts.risk.copy(), cohorts.centroids[high].copy()
+
+    # Scored without an outcome - a prediction must not feed back into cohort_risk
+    shifted, _ = blobs(seed=2, per_center=COHORTS['BATCH_SIZE'] * 5, centers=CENTERS[2:] + [400.0, 0.0, 0.0])
+    for vector in shifted:
+        cohorts.observe(vector)
+    assert cohorts.version == 5 and not np.allclose(cohorts.centroids[high], before)
+    assert np.array_equal(cohorts.risk, risk)
+
+    for vector in shifted[:COHORTS['BATCH_SIZE']]:
+        cohorts.observe(vector, 95.0)
+    assert cohorts.risk[high] > risk[high]
+
+def test_save_load_and_pickle_keep_assignments():
+    X, scores = blobs()
+    cohorts = CohortModel.fit(X, scores, FEATURES, k=3)
+    cohorts.observe(X[0], 20.0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'cohorts.npz')
+        cohorts.save(path)
+        loaded = CohortModel.load(path)
+    assert loaded.feature_names == FEATURES and loaded.version == cohorts.version
+    assert np.array_equal(loaded.assign(X), cohorts.assign(X))
+    assert np.array_equal(loaded.risk, cohorts.risk)
+
+    copied = pickle.loads(pickle.dumps(cohorts))  # As sent to batch scoring workers
+    assert np.array_equal(copied.assign(X), cohorts.assign(X)) and copied.pending == []
+
+def test_fixed_ml_uses_cohorts_as_feature_and_segment():
+    profile = {"age": 34, "income": 28000, "profession": "Teacher", "risk_category": "High",
+               "monthly_limit": 500, "avg_session": 180, "work_stress": "High",
+               "support_contacts": 6, "financial_stress": 8}
+    with tempfile.TemporaryDirectory() as tmp:
+        model = FixedCustomerRiskML(directory=tmp)
+        assert 'cohort_risk' in model.feature_names and model.cohorts.feature_names == BASE_FEATURE_NAMES
+        assert all('cohort' in sample for sample in model.training_data)
+
+        session = {'customer': 'sarah', 'balance': 0, 'wagered': 300, 'session_time': 200,
+                   'location': 'Casino', 'support_calls': 1, 'deposits': [], 'wagers': []}
+        features = model.extract_features(profile, session)
+        assert features['cohort_risk'] == model.cohorts.risk[features['cohort']]
+        assert ('cohort', str(features['cohort'])) in model.registry.segments_for(profile, features['cohort'])
+
+        risk = model.cohorts.risk.copy()
+        for i in range(COHORTS['BATCH_SIZE']):
+            model.add_training_sample(profile, dict(session, customer=f"P{i}", wagered=100 + 10 * i))
+        assert np.array_equal(model.cohorts.risk, risk)
+
+        version = model.cohorts.version
+        for i in range(COHORTS['BATCH_SIZE']):
+            model.add_training_sample(profile, dict(session, customer=f"C{i}", wagered=100 + 10 * i), actual_risk_score=70)
+        assert model.cohorts.version == version + 1
+
+        model.save_model()
+        reloaded = FixedCustomerRiskML(directory=os.path.join(tmp, 'reloaded'))
+        reloaded.model_path, reloaded.data_path, reloaded.cohort_path = model.model_path, model.data_path, model.cohort_path
+        reloaded.load_model()
+        assert np.array_equal(reloaded.cohorts.centroids, model.cohorts.centroids)
+        model.registry.wait()  # Segment retrains write into tmp
+
+if __name__ == "__main__":
+    test_fit_finds_cohorts_and_their_risk()
+    test_stream_moves_centroids_toward_new_behaviour()
+    test_unlabeled_vectors_move_centroids_but_not_risk()
+    test_save_load_and_pickle_keep_assignments()
+    test_fixed_ml_uses_cohorts_as_feature_and_segment()
+    print("Cohort clustering tests passed")
@@ -0,0 +1,63 @@
+"""
+Test paged customer search and portfolio baseline scores
+"""
+from profile_store import ProfileStore
+from portfolio import PortfolioScores
+from customer_search import CustomerSearch
+
+def make_profile(risk_category, monthly_limit, support_contacts, financial_stress):
+    return {"age": 40, "income": 42000, "profession": "Teacher", "risk_category": risk_category,
+            "monthly_limit": monthly_limit, "avg_session": 120, "work_stress": "High",
+            "support_contacts": support_contacts, "financial_stress": financial_stress}
+
+def make_book(count=100):
+    names = ['Sarah Martinez', 'Michael Thompson', 'David Chen', 'Amy Patel']
+    records = {}
+    for i in range(count):
+        risky = i % 4 == 2
+        records[f"{names[i % 4]} {i:03d} - Teacher"] = make_profile(
+            'Critical' if risky else 'Medium', 4000 if risky else 300, 12 if risky else 1, 10 if risky else 0)
+    return ProfileStore.from_records(records)
+
+def test_portfolio_baseline_scores():
+    store = make_book()
+    portfolio = PortfolioScores(store)
+
+    # One deposit and one stake of the 4000 limit against 3500/month income, support capped at 15
+    assert portfolio.scores[store.row("David Chen 002 - Teacher")] == min(100, int((19 + 21 + 8 + 5 + 15) * 1.2))
+    assert portfolio.scores[store.row("Amy Patel 003 - Teacher")] == 6 + 9 + 8 + 5 + 6
+    assert list(portfolio.level_counts()) == [75, 0, 0, 25]
+
+def test_prefix_search_and_paging():
+    store = make_book()
+    search = CustomerSearch(store, PortfolioScores(store), page_size=10)
+
+    page = search.search()
+    assert page.total == 100 and page.pages == 10 and len(page.ids) == 10
+    assert page.ids[0] == "Amy Patel 003 - Teacher"
+
+    page = search.search("  CHEN ")
+    assert page.total == 25 and all('Chen' in customer_id for customer_id in page.ids)
+
+    page = search.search("sa mart 00", page=5)
+    assert page.ids == ["Sarah Martinez 000 - Teacher", "Sarah Martinez 004 - Teacher", "Sarah Martinez 008 - Teacher"]
+    assert page.page == 0
+
+    assert search.search("zed").total == 0
+
+def test_risk_filters():
+    store = make_book()
+    search = CustomerSearch(store, PortfolioScores(store), page_size=10)
+
+    assert search.search(levels=['CRITICAL']).total == 25
+    assert search.search("david", levels=['LOW', 'MEDIUM']).total == 0
+    assert search.search(score_range=(0, 40)).total == 75
+
+    page = search.search("michael", score_range=(30, 40), page=2)
+    assert page.total == 25 and page.pages == 3 and len(page.ids) == 5
+
+if __name__ == "__main__":
+    test_portfolio_baseline_scores()
+    test_prefix_search_and_paging()
+    test_risk_filters()
+    print("Customer search tests passed")
@@ -0,0 +1,72 @@
+"""
+Test the historical rollups - daily and monthly buckets, retention and the scoring hook
+"""
+from datetime import datetime
+from history_aggregates import HistoryAggregates, history
+from risk_engine import calculate_risk
+
+def at(year, month, day):
+    return datetime(year, month, day, 12).timestamp()
+
+def test_daily_and_monthly_rollups():
+    aggregates = HistoryAggregates(crisis_cost=1000, success_rates={'Deposit Controls': 0.5})
+    aggregates.record_scores([10, 45, 85], timestamp=at(2026, 9, 30))
+    aggregates.record_score(100, timestamp=at(2026, 10, 1))
+    aggregates.record_score(65, timestamp=at(2026, 10, 2))
+    aggregates.record_intervention('Deposit Controls', 'CRITICAL', 90, timestamp=at(2026, 10, 2))
+    aggregates.record_intervention('Enhanced Support', 'HIGH', 70, timestamp=at(2026, 10, 2))
+
+    days = aggregates.daily_table(3, now=at(2026, 10, 2))
+    assert [row['period'] for row in days] == ['2026-09-30', '2026-10-01', '2026-10-02']
+    assert [row['scored'] for row in days] == [3, 1, 1]
+    assert days[0]['LOW'] == days[0]['MEDIUM'] == days[0]['CRITICAL'] == 1 and days[0]['mean_score'] == 140 / 3
+    assert days[2]['HIGH'] == 1 and days[2]['interventions'] == 2
+
+    september, october = aggregates.monthly_table(2, now=at(2026, 10, 2))
+    assert september['period'] == '2026-09' and september['scored'] == 3 and september['interventions'] == 0
+    assert october['scored'] == 2 and october['CRITICAL'] == 1
+    assert abs(october['prevented_crises'] - 0.45) < 1e-9 and abs(october['savings'] - 450) < 1e-6
+
+    distribution = aggregates.score_distribution(2, now=at(2026, 10, 2))
+    assert distribution[-1] == {'score_range': '90-100', 'evaluations': 1}
+    assert sum(row['evaluations'] for row in distribution) == 5
+    assert aggregates.intervention_breakdown(now=at(2026, 10, 2)) == [
+        {'type': 'Deposit Controls', 'MEDIUM': 0, 'HIGH': 0, 'CRITICAL': 1, 'total': 1},
+        {'type': 'Enhanced Support', 'MEDIUM': 0, 'HIGH': 1, 'CRITICAL': 0, 'total': 1}
+    ]
+    assert aggregates.totals()['scored'] == 5 and aggregates.totals()['months'] == 2
+
+def test_old_buckets_expire_and_trim_keeps_months():
+    aggregates = HistoryAggregates(days=7, months=2)
+    for day in range(1, 32):
+        aggregates.record_score(50, timestamp=at(2026, 8, day))
+    assert sorted(row['period'] for row in aggregates.daily_table(7, now=at(2026, 8, 31)) if row['scored']) == [
+        f"2026-08-{day}" for day in range(25, 32)]
+    assert aggregates.stats()['daily_buckets'] == 7
+
+    aggregates.record_score(50, timestamp=at(2026, 8, 1))  # Day already dropped, but its month is still held
+    assert aggregates.stats()['too_old'] == 1 and aggregates.monthly_table(1, now=at(2026, 8, 31))[0]['scored'] == 32
+
+    aggregates.record_score(50, timestamp=at(2026, 10, 1))
+    assert [row['scored'] for row in aggregates.monthly_table(3, now=at(2026, 10, 1))] == [0, 0, 1]
+
+    aggregates.trim(0.5)
+    assert aggregates.stats()['daily_buckets'] == 0 and aggregates.stats()['monthly_buckets'] == 1
+
+def test_calculate_risk_feeds_the_shared_history():
+    profile = {"age": 42, "income": 65000, "profession": "Executive", "risk_category": "Medium",
+               "monthly_limit": 1200, "avg_session": 120, "work_stress": "Medium",
+               "support_contacts": 2, "financial_stress": 4}
+    session = {'customer': 'michael', 'balance': 0, 'wagered': 0, 'session_time': 120,
+               'location': 'Home', 'support_calls': 0, 'deposits': [], 'wagers': []}
+    before = history.daily_table(1)[0]
+    risk = calculate_risk(profile, session, learn=False)
+    after = history.daily_table(1)[0]
+    assert after['scored'] == before['scored'] + 1
+    assert after[risk['level']] == before[risk['level']] + 1
+
+if __name__ == "__main__":
+    test_daily_and_monthly_rollups()
+    test_old_buckets_expire_and_trim_keeps_months()
+    test_calculate_risk_feeds_the_shared_history()
+    print("History aggregates tests passed")
@@ -0,0 +1,28 @@
+"""
+Test that the dashboard's first paint leaves heavy libraries unloaded
+"""
+from benchmarks import first_paint_modules, import_profile
+from config import STARTUP
+
+def test_first_paint_defers_heavy_modules():
+    _, loaded = import_profile(first_paint_modules(), 'fixed_ml_system.get_fixed_ml().predict_risk'
+                               '({"age": 34, "income": 28000, "avg_session": 180, "support_contacts": 6, "financial_stress": 8},'
+                               ' {"wagered": 0, "session_time": 180, "location": "Home", "support_calls": 0})')
+    assert 'streamlit' in loaded and 'fixed_ml_system' in loaded
+    assert [name for name in STARTUP['DEFERRED_MODULES'] if name in loaded] == []
+
+def test_importing_ml_module_does_not_train():
+    _, loaded = import_profile(['fixed_ml_system'], 'import os\nassert fixed_ml_system._fixed_ml is None and os.listdir(".") == []')
+    assert 'sklearn' not in loaded
+
+def test_model_page_loads_plotly_express_on_demand():
+    _, loaded = import_profile(['ai_clean_ui_page'])
+    assert 'plotly.express' not in loaded and 'pandas' not in loaded
+    _, loaded = import_profile(['ai_clean_ui_page'], 'ai_clean_ui_page.build_performance_figures(1)')
+    assert 'plotly.express' in loaded
+
+if __name__ == "__main__":
+    test_first_paint_defers_heavy_modules()
+    test_importing_ml_module_does_not_train()
+    test_model_page_loads_plotly_express_on_demand()
+    print("Import footprint tests passed")
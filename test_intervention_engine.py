@@ -0,0 +1,118 @@
+"""
+Test decision-table interventions against the original hand-written rules
+"""
+import numpy as np
+from config import RISK_THRESHOLDS
+from rule_engine import LEVEL_NAMES
+from intervention_engine import InterventionTable, URGENCY_NAMES, signal_row, loss_chasing_context
+
+def legacy_interventions(risk_result):
+    """The if-chain get_interventions used before the decision table"""
+    interventions = []
+    factors = risk_result['factors']
+    overall_risk = risk_result['level']
+    
+    if factors['Deposit'] >= RISK_THRESHOLDS['DEPOSIT_LOW']:
+        if overall_risk == 'CRITICAL':
+            urgency, action = 'CRITICAL', 'Immediate deposit intervention - Critical risk detected'
+        elif overall_risk == 'HIGH':
+            urgency, action = 'HIGH', 'Deposit monitoring - High risk pattern identified'
+        else:
+            urgency, action = 'MEDIUM', 'Deposit tracking - Preventive monitoring'
+        interventions.append({'type': 'Deposit Controls', 'urgency': urgency, 'action': action})
+    
+    if factors['Spending'] >= RISK_THRESHOLDS['SPENDING_LOW']:
+        if overall_risk == 'CRITICAL':
+            urgency, action = 'CRITICAL', 'Immediate spend intervention - Critical wagering detected'
+        elif overall_risk == 'HIGH':
+            urgency, action = 'HIGH', 'Spend limits - High risk wagering pattern'
+        else:
+            urgency, action = 'MEDIUM', 'Spend monitoring - Preventive measures'
+        interventions.append({'type': 'Spend Management', 'urgency': urgency, 'action': action})
+    
+    if factors['Session'] >= RISK_THRESHOLDS['SESSION_LOW']:
+        urgency = overall_risk if overall_risk in ['CRITICAL', 'HIGH'] else 'MEDIUM'
+        interventions.append({'type': 'Session Management', 'urgency': urgency,
+                              'action': f'Session controls - {overall_risk.lower()} risk level'})
+    
+    if factors['Location'] >= RISK_THRESHOLDS['LOCATION_LOW']:
+        urgency = 'HIGH' if overall_risk in ['CRITICAL', 'HIGH'] else 'MEDIUM'
+        interventions.append({'type': 'Location Monitoring', 'urgency': urgency,
+                              'action': f'Location alerts - {overall_risk.lower()} risk venue activity'})
+    
+    if factors['Support'] >= RISK_THRESHOLDS['SUPPORT_LOW']:
+        if overall_risk == 'CRITICAL':
+            urgency, action = 'CRITICAL', 'Immediate crisis intervention - Critical support needed'
+        elif overall_risk == 'HIGH':
+            urgency, action = 'HIGH', 'Priority counselor contact - High risk support'
+        else:
+            urgency, action = 'MEDIUM', 'Enhanced support monitoring - Preventive care'
+        interventions.append({'type': 'Enhanced Support', 'urgency': urgency, 'action': action})
+    
+    loss_chasing = risk_result.get('loss_chasing', {})
+    if loss_chasing.get('indicator'):
+        patterns = []
+        if loss_chasing['deposit_after_depletion']:
+            patterns.append('re-deposit after depletion')
+        if loss_chasing['escalating_stakes']:
+            patterns.append('escalating stakes')
+        if loss_chasing['rapid_redeposits']:
+            patterns.append('rapid re-deposits')
+        interventions.append({'type': 'Loss Chasing Support',
+                              'urgency': 'CRITICAL' if overall_risk == 'CRITICAL' else 'HIGH',
+                              'action': f"Loss-chasing pattern detected ({', '.join(patterns)}) - Cooling-off offer"})
+    
+    urgency_order = {'CRITICAL': 0, 'HIGH': 1, 'MEDIUM': 2}
+    interventions.sort(key=lambda x: urgency_order.get(x['urgency'], 3))
+    return interventions
+
+def random_results(count, seed=7):
+    rng = np.random.default_rng(seed)
+    results = []
+    for _ in range(count):
+        depleted, escalating, rapid = (bool(flag) for flag in rng.integers(0, 2, 3))
+        results.append({
+            'factors': {'Deposit': int(rng.integers(0, 26)), 'Spending': int(rng.integers(0, 26)),
+                        'Session': int(rng.choice([8, 15, 20])), 'Location': int(rng.choice([5, 10, 15])),
+                        'Support': int(rng.integers(0, 16))},
+            'level': LEVEL_NAMES[rng.integers(0, 4)],
+            'loss_chasing': {'indicator': depleted or escalating or rapid, 'deposit_after_depletion': depleted,
+                             'escalating_stakes': escalating, 'rapid_redeposits': rapid}
+        })
+    return results
+
+def test_single_session_parity():
+    table = InterventionTable()
+    for risk_result in random_results(2000):
+        level = risk_result['level']
+        codes = table.evaluate(signal_row(risk_result['factors'], risk_result['loss_chasing']), [LEVEL_NAMES.index(level)])[0]
+        assert table.interventions(codes, level, loss_chasing_context(risk_result['loss_chasing'])) == legacy_interventions(risk_result)
+
+def test_portfolio_pass_matches_per_customer():
+    table = InterventionTable()
+    results = random_results(500, seed=11)
+    signals = np.vstack([signal_row(r['factors'], r['loss_chasing']) for r in results])
+    levels = np.array([LEVEL_NAMES.index(r['level']) for r in results])
+    
+    codes = table.evaluate(signals, levels)
+    assert codes.shape == (500, len(table.types)) and codes.dtype == np.int8
+    
+    for row, risk_result in zip(codes, results):
+        expected = {i['type']: i['urgency'] for i in legacy_interventions(risk_result)}
+        actual = {table.types[i]: URGENCY_NAMES[code] for i, code in enumerate(row) if code}
+        assert actual == expected
+
+def test_custom_rules():
+    table = InterventionTable([{'type': 'Cool Off', 'factor': 'Session', 'threshold': 20,
+                                'urgency': ['NONE', 'MEDIUM', 'HIGH', 'HIGH'],
+                                'action': ['-', 'Suggest a break', 'Force a break', 'Force a break']}])
+    signals = np.array([[0, 0, 20, 0, 0, 0], [0, 0, 15, 0, 0, 0], [0, 0, 20, 0, 0, 0]])
+    codes = table.evaluate(signals, [0, 3, 2])
+    assert codes[:, 0].tolist() == [0, 0, 2]
+    assert table.interventions(codes[2], 'HIGH') == [{'type': 'Cool Off', 'urgency': 'HIGH', 'action': 'Force a break'}]
+
+if __name__ == "__main__":
+    test_single_session_parity()
+    test_portfolio_pass_matches_per_customer()
+    test_custom_rules()
+    print("Intervention engine tests passed")
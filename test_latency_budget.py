@@ -0,0 +1,80 @@
+"""
+Test latency-budgeted scoring - the ML estimate, probes, rule-score fallback and background learning
+"""
+from fixed_ml_system import fixed_ml
+from risk_engine import LatencyBudget, calculate_risk, latency_budget
+
+PROFILE = {"age": 34, "income": 28000, "profession": "Teacher", "risk_category": "High",
+           "monthly_limit": 500, "avg_session": 180, "work_stress": "High",
+           "support_contacts": 6, "financial_stress": 8}
+
+def make_session(customer, wagered):
+    return {'customer': customer, 'balance': 0, 'wagered': wagered, 'session_time': 200,
+            'location': 'Casino', 'support_calls': 1, 'deposits': [], 'wagers': []}
+
+def test_estimate_and_probes():
+    budget = LatencyBudget(budget_ms=10, smoothing=0.5, probe_every=3)
+    assert budget.fits(1) and budget.fits(None)
+    budget.observe(8)
+    budget.observe(8)
+    assert budget.mean_ms == 6 and budget.deviation_ms == 4 and budget.estimate_ms == 14
+
+    # Skipped while the estimate is over, except every third call
+    assert [budget.fits(10) for _ in range(6)] == [False, False, True, False, False, True]
+    assert budget.stats()['probes'] == 2
+    assert budget.fits(20) and not budget.fits(10)
+
+    budget.record(12, 10, 'slow')
+    budget.record(3, 10, None)
+    stats = budget.stats()
+    assert stats['calls'] == 2 and stats['fallback_slow'] == 1 and stats['fallback_rate'] == 0.5
+    assert stats['overruns'] == 1 and stats['overrun_rate'] == 0.5
+
+def test_deferred_tasks_run_in_order_and_errors_are_counted():
+    budget = LatencyBudget(max_deferred=2)
+    done = []
+    budget.defer(lambda: done.append(1), 'learning')
+    budget.defer(lambda: 1 / 0, 'learning')
+    budget.wait()
+    budget.defer(lambda: done.append(2), 'learning')
+    budget.wait()
+    assert done == [1, 2]
+    stats = budget.stats()
+    assert stats['deferred_learning'] == 3 and stats['deferred_errors'] == 1 and stats['pending_deferred'] == 0
+    assert 'ZeroDivisionError' in stats['last_error']
+
+def test_slow_ml_falls_back_to_the_rule_score():
+    mean, deviation, skipped = latency_budget.mean_ms, latency_budget.deviation_ms, latency_budget.skipped
+    try:
+        latency_budget.mean_ms, latency_budget.deviation_ms, latency_budget.skipped = 1000.0, 0.0, 0
+        risk = calculate_risk(PROFILE, make_session('budget-slow', 300), learn=False, budget_ms=25)
+        assert risk['fallback'] == 'slow' and risk['ml_method'] == 'rule_based_fallback'
+        assert risk['score'] == risk['rule_score'] and risk['latency_ms'] < 1000
+
+        risk = calculate_risk(PROFILE, make_session('budget-slow', 300), learn=False, budget_ms=5000)
+        assert risk['fallback'] is None and risk['ml_method'] != 'rule_based_fallback'
+    finally:
+        latency_budget.mean_ms, latency_budget.deviation_ms, latency_budget.skipped = mean, deviation, skipped
+
+def test_learning_that_would_block_runs_in_the_background():
+    samples = len(fixed_ml.training_data)
+    deferred = latency_budget.stats().get('deferred_learning', 0)
+    fixed_ml.retraining = True  # As if a retrain held the model
+    try:
+        assert fixed_ml.learning_would_block()
+        session = make_session('budget-deferred', 4321)
+        risk = calculate_risk(PROFILE, session, budget_ms=5000)
+        session['wagered'] = 0  # The learner works from its own copy
+    finally:
+        fixed_ml.retraining = False
+    latency_budget.wait()
+    assert risk['fallback'] is None
+    assert latency_budget.stats()['deferred_learning'] == deferred + 1
+    assert len(fixed_ml.training_data) == samples + 1
+
+if __name__ == "__main__":
+    test_estimate_and_probes()
+    test_deferred_tasks_run_in_order_and_errors_are_counted()
+    test_slow_ml_falls_back_to_the_rule_score()
+    test_learning_that_would_block_runs_in_the_background()
+    print("Latency budget tests passed")
@@ -0,0 +1,58 @@
+"""
+Test the lock instrumentation and the concurrent session load generator
+"""
+import os
+import tempfile
+import threading
+import time
+from metrics import InstrumentedLock, latency_summary, lock_stats
+from load_test import run
+
+def test_instrumented_lock_counts_contention():
+    lock = InstrumentedLock('test_lock')
+    held = threading.Event()
+
+    def hold():
+        with lock:
+            held.set()
+            time.sleep(0.05)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    held.wait()
+    with lock:
+        with lock:  # Re-entry by the owner never waits
+            pass
+    holder.join()
+
+    stats = lock.stats()
+    assert stats['acquisitions'] == 3
+    assert stats['contended'] == 1
+    assert stats['wait_ms'] >= 30 and stats['max_wait_ms'] == stats['wait_ms']
+    assert lock_stats()['test_lock']['contended'] == 1
+
+def test_latency_summary_percentiles():
+    summary = latency_summary(list(range(1, 101)))
+    assert summary['count'] == 100 and summary['max_ms'] == 100
+    assert 50 <= summary['p50_ms'] <= 51 and 99 <= summary['p99_ms'] <= 100
+    assert latency_summary([]) == {'count': 0}
+
+def test_load_run_reports_every_request():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            summary = run(sessions=6, actions=5, threads=3, seed=1)
+        finally:
+            os.chdir(cwd)
+    assert summary['requests'] == summary['latency']['count'] == 30
+    assert sum(summary['actions'].values()) == 30
+    assert summary['ml_fallbacks'] == 0
+    assert summary['locks']['model']['acquisitions'] > 0
+    assert summary['ingest'].get('accepted', 0) >= 1
+
+if __name__ == "__main__":
+    test_instrumented_lock_counts_contention()
+    test_latency_summary_percentiles()
+    test_load_run_reports_every_request()
+    print("Load test tests passed")
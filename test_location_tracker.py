@@ -0,0 +1,34 @@
+"""
+Test location tracker running counters
+"""
+from location_tracker import LocationTracker, high_risk_visit_counts
+
+def test_counts_follow_the_ring():
+    tracker = LocationTracker(capacity=3, window_ms=1000)
+    for i, location in enumerate(['Casino', 'Home', 'Betting Shop', 'Work']):
+        tracker.append(location, timestamp_ms=i * 100)
+    
+    # First Casino visit has left the ring
+    assert list(tracker) == ['Home', 'Betting Shop', 'Work']
+    assert tracker.high_risk_visits == 1
+    assert tracker.visit_count('Casino') == 0
+    assert len(tracker) == 3
+
+def test_windowed_high_risk_rate():
+    tracker = LocationTracker(capacity=10, window_ms=60_000)
+    tracker.append('Casino', timestamp_ms=0)
+    tracker.append('Betting Shop', timestamp_ms=30_000)
+    tracker.append('Casino', timestamp_ms=70_000)
+    
+    assert tracker.high_risk_visits_in_window(now_ms=70_000) == 2
+    assert tracker.high_risk_visits_in_window(now_ms=200_000) == 0
+    assert tracker.high_risk_visits == 3
+
+def test_plain_list_history():
+    assert high_risk_visit_counts(['Casino', 'Home', 'Casino']) == (2, 0)
+
+if __name__ == "__main__":
+    test_counts_follow_the_ring()
+    test_windowed_high_risk_rate()
+    test_plain_list_history()
+    print("Location tracker tests passed")
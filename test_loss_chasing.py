@@ -0,0 +1,75 @@
+"""
+Test streaming loss-chasing detection
+"""
+from loss_chasing import LossChasingDetector, LossChasingMonitor
+
+MINUTE = 60 * 1000
+
+def test_steady_play_is_clear():
+    detector = LossChasingDetector()
+    detector.on_deposit(100, 0)
+    for i in range(5):
+        detector.on_wager(10, (i + 1) * MINUTE)
+    
+    assert detector.indicator == 0
+    assert abs(detector.spending_acceleration) < 1e-9
+
+def test_deposit_after_depletion():
+    detector = LossChasingDetector()
+    detector.on_deposit(100, 0)
+    detector.on_wager(95, MINUTE)
+    detector.on_deposit(100, 60 * MINUTE)
+    
+    assert detector.signals()['deposit_after_depletion']
+    assert detector.indicator == 1
+    
+    # Clears once the next deposit comes with money still in the account
+    detector.on_wager(10, 61 * MINUTE)
+    detector.on_deposit(100, 120 * MINUTE)
+    assert detector.indicator == 0
+    assert detector.depletion_deposits == 1
+
+def test_escalating_stakes():
+    detector = LossChasingDetector()
+    detector.on_deposit(1000, 0)
+    for stake in [10, 20, 40]:
+        detector.on_wager(stake)
+    assert not detector.escalating  # Two raises in a row is within ordinary play
+    
+    detector.on_wager(80)
+    assert detector.escalating
+    assert detector.spending_acceleration > 0
+    
+    detector.on_wager(5)
+    assert not detector.escalating
+
+def test_rapid_redeposits():
+    detector = LossChasingDetector()
+    for i in range(3):
+        detector.on_deposit(50, i * 2 * MINUTE)
+    assert detector.rapid_redepositing
+
+def test_monitor_keeps_customers_apart():
+    monitor = LossChasingMonitor()
+    monitor.process('a', 'deposit', 100, 0)
+    monitor.process('b', 'deposit', 100, 0)
+    monitor.process('a', 'wager', 100, MINUTE)
+    monitor.process('a', 'deposit', 100, 90 * MINUTE)
+    assert monitor.flagged_customers() == ['a']
+
+def test_monitor_evicts_least_recent_customers():
+    monitor = LossChasingMonitor(max_tracked=2)
+    for customer in ['a', 'b', 'a', 'c']:
+        monitor.process(customer, 'deposit', 100, 0)
+    assert list(monitor.detectors) == ['a', 'c'] and monitor.counts['evicted'] == 1
+    monitor.trim(0.5)
+    assert list(monitor.detectors) == ['c'] and monitor.nbytes() > 0
+
+if __name__ == "__main__":
+    test_steady_play_is_clear()
+    test_deposit_after_depletion()
+    test_escalating_stakes()
+    test_rapid_redeposits()
+    test_monitor_keeps_customers_apart()
+    test_monitor_evicts_least_recent_customers()
+    print("Loss chasing tests passed")
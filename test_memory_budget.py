@@ -0,0 +1,145 @@
+"""
+Test memory accounting, per-session and per-sample targets, and eviction over budget
+"""
+import tempfile
+import threading
+import time
+import tracemalloc
+import numpy as np
+from config import MEMORY_BUDGETS
+from memory_budget import MemoryBudget, deep_sizeof
+from session_actions import new_session, add_deposit, place_wager, change_location, contact_support
+from alert_suppression import AlertSuppressor
+from fixed_ml_system import FixedCustomerRiskML
+
+PROFILE = {
+    "age": 34, "income": 28000, "profession": "Teacher", "risk_category": "High",
+    "monthly_limit": 500, "avg_session": 180, "work_stress": "High",
+    "support_contacts": 6, "financial_stress": 8
+}
+
+def busy_session(actions=300):
+    session_data = new_session('sarah', 180)
+    for i in range(actions):
+        add_deposit(session_data, 50.0, now_ms=i * 1000)
+        place_wager(session_data, 40.0, now_ms=i * 1000 + 500)
+        change_location(session_data, ['Home', 'Casino', 'Work'][i % 3])
+        if i % 10 == 0:
+            contact_support(session_data)
+        session_data['executed_interventions'].append({
+            'timestamp': f"12:{i % 60:02d}:00", 'action': 'Deposit limit suggestion sent', 'risk_score': 88.0
+        })
+    return session_data
+
+def test_deep_sizeof_counts_shared_objects_once():
+    payload = list(range(1000))
+    assert deep_sizeof({'a': payload, 'b': payload}) < deep_sizeof({'a': payload, 'b': list(payload)})
+
+    array = np.zeros(10000)
+    assert deep_sizeof(array) > array.nbytes
+    assert deep_sizeof(array[:10]) < 1000  # A view holds no buffer of its own
+
+def test_session_stays_within_budget():
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        session_data = busy_session()
+        allocated = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(before, 'filename'))
+    finally:
+        tracemalloc.stop()
+
+    # Ledgers and the location ring are fixed-size and the intervention log is bounded
+    assert allocated <= MEMORY_BUDGETS['SESSION_BYTES']
+    assert deep_sizeof(session_data) <= MEMORY_BUDGETS['SESSION_BYTES']
+
+    # A budget only trimming the intervention log can meet
+    log_bytes = deep_sizeof(session_data['executed_interventions'])
+    budget = MemoryBudget(dict(MEMORY_BUDGETS, SESSION_BYTES=deep_sizeof(session_data) - log_bytes // 2))
+    size = budget.track_session(session_data)
+    assert size <= budget.budgets['SESSION_BYTES']
+    assert 0 < len(session_data['executed_interventions']) < 100
+    assert budget.counts['session_trims'] >= 1
+    assert budget.usage()['session_state']['sessions'] == size
+
+def test_training_sample_stays_within_budget():
+    with tempfile.TemporaryDirectory() as tmp:
+        model = FixedCustomerRiskML(directory=tmp)
+        model.training_data = []
+        model.sample_hashes = set()
+
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            for i in range(50):
+                session_data = new_session(f"C{i}", 100 + i)
+                add_deposit(session_data, 10.0 * (i + 1))
+                model.add_training_sample(PROFILE, session_data)
+            allocated = tracemalloc.get_traced_memory()[0] - before
+        finally:
+            tracemalloc.stop()
+
+        assert len(model.training_data) == 50
+        assert allocated / 50 <= MEMORY_BUDGETS['SAMPLE_BYTES']
+
+        budget = MemoryBudget()
+        model.register_memory(budget)
+        assert budget.usage()['training_buffer']['fixed_ml'] / 50 <= MEMORY_BUDGETS['SAMPLE_BYTES']
+        model.registry.wait()  # Segment retrains write into tmp
+
+def test_enforce_evicts_least_recently_used_over_budget():
+    suppressor = AlertSuppressor(max_tracked=10000)
+    for i in range(2000):
+        suppressor.should_emit(f"C{i}", 'deposit_limit', 'high', now=0)
+    suppressor.should_emit('C0', 'deposit_limit', 'critical', now=1)  # Most recently used
+
+    full = suppressor.nbytes()
+    budget = MemoryBudget(dict(MEMORY_BUDGETS, CACHES=full // 2))
+    budget.register('caches', 'alerts', suppressor.nbytes, suppressor.trim)
+    budget.register('caches', 'reported_only', lambda: 1000)
+    freed = budget.enforce()
+
+    assert 0 < freed['caches'] and suppressor.nbytes() + 1000 <= full // 2 * 1.1
+    assert ('C0', 'deposit_limit') in suppressor.alerts and ('C1', 'deposit_limit') not in suppressor.alerts
+    assert budget.counts['caches_evictions'] == 1
+
+def test_maybe_enforce_evicts_in_the_background():
+    release = threading.Event()
+    evicted = []
+    budget = MemoryBudget(dict(MEMORY_BUDGETS, CACHES=100, CHECK_INTERVAL_SECONDS=60))
+    budget.register('caches', 'slow', lambda: 0 if evicted else 1000, lambda ratio: (release.wait(5), evicted.append(ratio)))
+    budget.register('reference_data', 'book', lambda: 10 ** 9)  # No budget - never evicted from
+
+    start = time.perf_counter()
+    assert budget.maybe_enforce()
+    assert time.perf_counter() - start < 1 and not evicted  # The caller does not wait on the evictor
+    assert not budget.maybe_enforce()  # Already running, and within the interval
+    release.set()
+    budget.wait()
+    assert evicted == [0.1] and budget.counts['caches_evictions'] == 1
+    assert 'reference_data_evictions' not in budget.counts and budget.report()['subsystems']['reference_data']['budget'] is None
+
+def test_training_buffer_and_segment_eviction_keep_a_trainable_model():
+    with tempfile.TemporaryDirectory() as tmp:
+        model = FixedCustomerRiskML(directory=tmp)
+        newest = model.training_data[-1]['sample_hash']
+
+        model.trim_training_data(0.0)
+        assert len(model.training_data) == 10
+        assert model.training_data[-1]['sample_hash'] == newest
+        assert model.sample_hashes == {sample['sample_hash'] for sample in model.training_data}
+
+        model.registry._cache(('profession', 'Teacher'), model.model)
+        model.registry._cache(('risk_category', 'High'), model.model)
+        model.registry.evict(0.5)
+        assert list(model.registry.cache) == [('risk_category', 'High')]
+        assert model.registry.cache_bytes == model.model.nbytes
+        model.registry.wait()
+
+if __name__ == "__main__":
+    test_deep_sizeof_counts_shared_objects_once()
+    test_session_stays_within_budget()
+    test_training_sample_stays_within_budget()
+    test_enforce_evicts_least_recently_used_over_budget()
+    test_maybe_enforce_evicts_in_the_background()
+    test_training_buffer_and_segment_eviction_keep_a_trainable_model()
+    print("Memory budget tests passed")
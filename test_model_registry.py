@@ -0,0 +1,114 @@
+"""
+Test compact ridge artifacts and the lazily loaded segment model registry
+"""
+import os
+import tempfile
+import numpy as np
+from sklearn.linear_model import Ridge
+from sklearn.preprocessing import StandardScaler
+from compact_model import CompactRidge
+from model_registry import ModelRegistry
+
+FEATURES = ['deposits', 'session_time', 'support_calls']
+
+def make_data(seed, count=60, weights=(2.0, 0.5, -1.0)):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(count, len(FEATURES))) * [100, 60, 3] + [200, 120, 2]
+    y = X @ np.array(weights) / 10 + rng.normal(size=count)
+    return X, y
+
+def test_compact_ridge_matches_sklearn():
+    X, y = make_data(1)
+    scaler = StandardScaler().fit(X)
+    ridge = Ridge(alpha=0.1).fit(scaler.transform(X), y)
+    
+    compact = CompactRidge.fit(X, y, FEATURES, alpha=0.1)
+    assert np.allclose(compact.predict(X), ridge.predict(scaler.transform(X)))
+    assert np.allclose(CompactRidge.from_sklearn(scaler, ridge, FEATURES).predict(X), compact.predict(X))
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'model.npz')
+        compact.save(path)
+        loaded = CompactRidge.load(path)
+        assert loaded.feature_names == FEATURES and loaded.samples == 60
+        assert np.allclose(loaded.predict(X[:5]), compact.predict(X[:5]))
+        assert os.path.getsize(path) < 2048
+
+def test_segments_train_in_background_and_load_lazily():
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = ModelRegistry(FEATURES, directory=tmp, segment_fields=['profession'], min_samples=20, retrain_every=10)
+        teacher = {'profession': 'Teacher'}
+        
+        assert registry.model_for(teacher) == (None, None)
+        X, y = make_data(2, count=20)
+        X_shifted, y_shifted = make_data(4, count=10, weights=(-1.0, 2.0, 5.0))  # The segment's behaviour changes
+        for rows, targets in ((X, y), (X_shifted, y_shifted)):
+            for row, target in zip(rows, targets):
+                registry.record(teacher, dict(zip(FEATURES, row)), target)
+            registry.wait()
+        
+        segment, model = registry.model_for(teacher)
+        assert segment == ('profession', 'Teacher') and model.samples == 30
+        assert registry.stats()['retrains'] == 2
+        
+        # A fresh worker reads nothing until a segment is asked for
+        worker = ModelRegistry(FEATURES, directory=tmp, segment_fields=['profession'])
+        assert worker.stats()['loaded_segments'] == []
+        assert worker.model_for({'profession': 'Executive'}) == (None, None)
+        assert worker.model_for(teacher)[1].version == 2
+        assert worker.stats()['loaded_segments'] == ['profession=Teacher']
+
+def test_segment_retrain_that_does_not_beat_the_current_model_is_rejected():
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = ModelRegistry(FEATURES, directory=tmp, segment_fields=['profession'], min_samples=20, retrain_every=10)
+        teacher = {'profession': 'Teacher'}
+        X, y = make_data(5, count=40)
+        for start, end in ((0, 20), (20, 30), (30, 40)):
+            for row, target in zip(X[start:end], y[start:end]):
+                registry.record(teacher, dict(zip(FEATURES, row)), target)
+            registry.wait()
+        
+        # Same relationship, more samples - no better on the new ones, so the first model keeps serving
+        assert registry.model_for(teacher)[1].version == 1
+        stats = registry.stats()
+        assert stats['retrains'] == 1 and stats['rejected'] == 2
+        assert stats['segment_retrains'] == {'profession=Teacher': {'promoted': 1, 'rejected': 2}}
+
+def test_cache_respects_memory_budget():
+    with tempfile.TemporaryDirectory() as tmp:
+        X, y = make_data(3)
+        professions = ['Teacher', 'Executive', 'Nurse', 'Chef']
+        writer = ModelRegistry(FEATURES, directory=tmp, segment_fields=['profession'])
+        for profession in professions:
+            CompactRidge.fit(X, y, FEATURES).save(writer.artifact_path(('profession', profession)))
+        
+        model_bytes = CompactRidge.fit(X, y, FEATURES).nbytes
+        registry = ModelRegistry(FEATURES, directory=tmp, segment_fields=['profession'], memory_budget_bytes=2 * model_bytes)
+        for profession in professions:
+            assert registry.model_for({'profession': profession})[1] is not None
+        
+        stats = registry.stats()
+        assert stats['loaded_segments'] == ['profession=Nurse', 'profession=Chef']
+        assert stats['cache_bytes'] <= 2 * model_bytes and stats['evictions'] == 2
+
+def test_uncached_segment_loads_in_the_background_when_asked_not_to_wait():
+    with tempfile.TemporaryDirectory() as tmp:
+        X, y = make_data(6)
+        writer = ModelRegistry(FEATURES, directory=tmp, segment_fields=['profession'])
+        CompactRidge.fit(X, y, FEATURES).save(writer.artifact_path(('profession', 'Teacher')))
+        
+        registry = ModelRegistry(FEATURES, directory=tmp, segment_fields=['profession'])
+        teacher = {'profession': 'Teacher'}
+        assert registry.model_for(teacher, load=False) == (None, None)  # The global model answers meanwhile
+        registry.wait()
+        assert registry.model_for(teacher, load=False)[0] == ('profession', 'Teacher')
+        stats = registry.stats()
+        assert stats['deferred_loads'] == 1 and stats['loads'] == 1 and stats['hits'] == 1
+
+if __name__ == "__main__":
+    test_compact_ridge_matches_sklearn()
+    test_segments_train_in_background_and_load_lazily()
+    test_segment_retrain_that_does_not_beat_the_current_model_is_rejected()
+    test_cache_respects_memory_budget()
+    test_uncached_segment_loads_in_the_background_when_asked_not_to_wait()
+    print("Model registry tests passed")
@@ -0,0 +1,54 @@
+"""
+Test columnar profile store loading and lookups
+"""
+import os
+import tempfile
+import numpy as np
+from profile_store import ProfileStore
+
+PROFILES = {
+    "Sarah Martinez - Primary School Teacher": {
+        "age": 34, "income": 28000, "profession": "Teacher", "risk_category": "High",
+        "monthly_limit": 500, "avg_session": 180, "work_stress": "High",
+        "support_contacts": 6, "financial_stress": 8, "emotional_state": "Stressed"
+    },
+    "Michael Thompson - Marketing Executive": {
+        "age": 42, "income": 65000, "profession": "Executive", "risk_category": "Medium",
+        "monthly_limit": 1200, "avg_session": 120, "work_stress": "Medium",
+        "support_contacts": 2, "financial_stress": 4, "emotional_state": "Controlled"
+    }
+}
+
+def test_views_read_columns():
+    store = ProfileStore.from_records(PROFILES)
+    profile = store["Sarah Martinez - Primary School Teacher"]
+    
+    assert profile['income'] == 28000
+    assert profile['profession'] == 'Teacher'
+    assert profile.get('gambling_trigger') == ''
+    assert store.columns['profession'].dtype == np.int8
+    assert list(store.labels('risk_category')) == ['High', 'Medium']
+    assert len(store) == 2 and "Michael Thompson - Marketing Executive" in store
+
+def test_csv_and_memory_mapped_round_trip():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'profiles.csv')
+        with open(csv_path, 'w') as f:
+            f.write("customer_id,age,income,profession,risk_category,monthly_limit,avg_session,work_stress,support_contacts,financial_stress\n")
+            for i in range(1000):
+                f.write(f"C{i:05d},{30 + i % 30},{20000 + i * 10},{['Teacher', 'Executive'][i % 2]},Medium,500,120,High,{i % 5},{i % 10}\n")
+        
+        store = ProfileStore.load(csv_path)
+        assert store['C00999']['income'] == 29990
+        assert store['C00998']['profession'] == 'Teacher'
+        
+        store.save(os.path.join(tmp, 'store'))
+        mapped = ProfileStore.load(os.path.join(tmp, 'store'))
+        assert isinstance(mapped.columns['income'], np.memmap)
+        assert mapped['C00999']['income'] == 29990
+        assert mapped['C00001']['profession'] == 'Executive'
+
+if __name__ == "__main__":
+    test_views_read_columns()
+    test_csv_and_memory_mapped_round_trip()
+    print("Profile store tests passed")
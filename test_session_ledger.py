@@ -0,0 +1,80 @@
+"""
+Test bounded session ledger aggregates
+"""
+from session_ledger import SessionLedger, ledger_total, ledger_window_sum, new_intervention_log
+from sliding_window import BucketedWindow
+
+def test_totals_cover_evicted_events():
+    ledger = SessionLedger(capacity=4)
+    for amount in [100, 200, 300, 400, 500, 600]:
+        ledger.append(amount, timestamp_ms=amount)
+    
+    assert len(ledger) == 6
+    assert ledger.total == 2100
+    assert ledger.retained == 4
+    assert list(ledger) == [300.0, 400.0, 500.0, 600.0]
+    assert ledger.recent()[1].tolist() == [300, 400, 500, 600]
+    assert ledger.last == 600
+
+def test_memory_ceiling():
+    ledger = SessionLedger(capacity=50)
+    before = ledger.amounts.nbytes + ledger.timestamps.nbytes
+    for i in range(10000):
+        ledger.append(25.0)
+    
+    assert ledger.amounts.nbytes + ledger.timestamps.nbytes == before == 50 * (4 + 8)
+    assert ledger.total == 250000
+
+def test_plain_lists_still_supported():
+    assert ledger_total([400, 200]) == 600
+    assert ledger_total(SessionLedger()) == 0
+    assert not SessionLedger()
+
+def test_intervention_log_is_bounded():
+    log = new_intervention_log()
+    for i in range(log.maxlen + 10):
+        log.append({'type': 'Deposit Controls', 'n': i})
+    assert len(log) == log.maxlen
+    assert log[0]['n'] == 10
+
+def test_bucketed_window_expires_old_events():
+    minute = 60 * 1000
+    window = BucketedWindow(window_ms=15 * minute, bucket_count=15)
+    window.add(100, 0)
+    window.add(50, 10 * minute)
+    
+    assert window.read(now_ms=14 * minute) == (150, 2)
+    assert window.read(now_ms=16 * minute) == (50, 1)
+    assert window.read(now_ms=60 * minute) == (0, 0)
+
+def test_ledger_windows():
+    hour = 60 * 60 * 1000
+    ledger = SessionLedger()
+    ledger.append(200, timestamp_ms=0)
+    ledger.append(300, timestamp_ms=2 * hour)
+    
+    assert ledger.window_sum('1h', now_ms=2 * hour) == 300
+    assert ledger.window_sum('24h', now_ms=2 * hour) == 500
+    assert ledger.window_count('30d', now_ms=2 * hour) == 2
+    assert ledger_window_sum([200, 300], '1h') == 0
+
+def test_copy_is_independent():
+    hour = 60 * 60 * 1000
+    ledger = SessionLedger(capacity=4)
+    ledger.append(200, timestamp_ms=0)
+    copied = ledger.copy()
+    ledger.append(300, timestamp_ms=hour // 2)
+    
+    assert copied.total == 200 and len(copied) == 1 and list(copied) == [200.0]
+    assert copied.window_sum('1h', now_ms=hour // 2) == 200
+    assert ledger.window_sum('1h', now_ms=hour // 2) == 500
+
+if __name__ == "__main__":
+    test_totals_cover_evicted_events()
+    test_memory_ceiling()
+    test_plain_lists_still_supported()
+    test_intervention_log_is_bounded()
+    test_bucketed_window_expires_old_events()
+    test_ledger_windows()
+    test_copy_is_independent()
+    print("Session ledger tests passed")
@@ -0,0 +1,118 @@
+"""
+Test the similar-customer index - exact search, the unsealed delta, rebuilds and the fixed_ml hook
+"""
+import sys
+import tempfile
+import numpy as np
+from similarity_index import SimilarityIndex
+from fixed_ml_system import FixedCustomerRiskML
+from session_actions import new_session, add_deposit, place_wager, change_location
+
+FEATURES = [f"f{i}" for i in range(6)]
+
+def brute_force(rows, query, k):
+    mean, scale = rows.mean(axis=0), rows.std(axis=0)
+    distances = np.sqrt((((rows - mean) / scale - (query - mean) / scale) ** 2).sum(axis=1))
+    return list(np.argsort(distances)[:k])
+
+def filled_index(rows, **kwargs):
+    index = SimilarityIndex(FEATURES, **kwargs)
+    index.add_many(rows, np.arange(len(rows)), [f"C{i}" for i in range(len(rows))])
+    index.rebuild()
+    return index
+
+def test_exact_search_matches_brute_force():
+    rng = np.random.default_rng(0)
+    rows = rng.normal(size=(3000, len(FEATURES))).astype(np.float32) * [1, 10, 100, 1, 5, 50]
+    queries = rows[:20] + rng.normal(scale=0.1, size=(20, len(FEATURES)))
+
+    kdtree = filled_index(rows, eps=0, delta_max=10 ** 6)
+    assert kdtree.backend == 'kdtree'
+
+    # The blocked scan is what runs without scipy
+    saved = sys.modules.get('scipy.spatial')
+    sys.modules['scipy.spatial'] = None
+    try:
+        blocked = filled_index(rows, eps=0, delta_max=10 ** 6, block_rows=500)
+    finally:
+        if saved is None:
+            del sys.modules['scipy.spatial']
+        else:
+            sys.modules['scipy.spatial'] = saved
+    assert blocked.backend == 'blocked'
+
+    for query in queries:
+        expected = [f"C{row}" for row in brute_force(rows, query, 5)]
+        assert [match['customer'] for match in kdtree.query(query, 5)] == expected
+        assert [match['customer'] for match in blocked.query(query, 5)] == expected
+
+def test_delta_rows_are_found_before_and_after_a_background_rebuild():
+    rng = np.random.default_rng(1)
+    index = SimilarityIndex(FEATURES, delta_max=100)
+    index.set_scaler(np.zeros(len(FEATURES)), np.ones(len(FEATURES)))
+    index.add_many(rng.normal(size=(99, len(FEATURES))), np.zeros(99), [f"C{i}" for i in range(99)])
+    assert index.sealed == 0 and index.builder is None
+
+    target = np.full(len(FEATURES), 5.0)
+    index.add(target, 91, 'newest', labeled=True)
+    assert index.query(target, 1)[0]['customer'] == 'newest'  # Still in the delta while the tree builds
+    index.wait()
+
+    assert index.sealed == 100 and index.stats()['rebuilds'] == 1
+    nearest = index.query(target, 1)[0]
+    assert nearest['customer'] == 'newest' and nearest['distance'] == 0
+    assert nearest['score'] == 91 and nearest['outcome']
+
+def test_query_returns_one_row_per_customer_and_skips_excluded():
+    index = SimilarityIndex(FEATURES)
+    index.set_scaler(np.zeros(len(FEATURES)), np.ones(len(FEATURES)))
+    for step in range(5):
+        index.add(np.full(len(FEATURES), step * 0.01), 50, 'sarah')
+    index.add(np.full(len(FEATURES), 0.5), 60, 'david')
+    index.add(np.full(len(FEATURES), 0.6), 70, None)
+    index.add(np.full(len(FEATURES), 0.7), 80, None)
+
+    matches = index.query(np.zeros(len(FEATURES)), 3)
+    assert [match['customer'] for match in matches] == ['sarah', 'david', None]
+    assert matches[0]['distance'] == 0
+    assert [match['customer'] for match in index.query(np.zeros(len(FEATURES)), 3, exclude='sarah')] == ['david', None, None]
+
+def test_rebuild_drops_oldest_beyond_max_profiles():
+    rows = np.arange(60 * len(FEATURES), dtype=np.float32).reshape(60, len(FEATURES))
+    index = filled_index(rows, max_profiles=40, delta_max=10 ** 6)
+    assert index.count == index.sealed == 40 and index.customers[0] == 'C20'
+    assert index.query(rows[59], 1)[0]['customer'] == 'C59'
+
+    index.evict(0.5)
+    assert index.count == 20 and index.query(rows[0], 1)[0]['customer'] == 'C40'
+
+def test_fixed_ml_finds_similar_past_customers():
+    profile = {"age": 29, "income": 42000, "profession": "Business Owner", "risk_category": "Critical",
+               "monthly_limit": 2000, "avg_session": 300, "work_stress": "Very High",
+               "support_contacts": 12, "financial_stress": 10}
+    with tempfile.TemporaryDirectory() as tmp:
+        model = FixedCustomerRiskML(directory=tmp)
+        assert model.similarity.count == len(model.training_data)
+
+        sessions = {}
+        for customer, deposit in [('david', 900.0), ('dan', 880.0), ('sarah', 40.0)]:
+            session_data = new_session(customer, 300)
+            add_deposit(session_data, deposit)
+            place_wager(session_data, deposit * 0.9)
+            change_location(session_data, 'Casino')
+            model.add_training_sample(profile, session_data, actual_risk_score=90 if deposit > 500 else 30)
+            sessions[customer] = session_data
+
+        similar = model.similar_customers(profile, sessions['david'], k=3)
+        assert similar[0]['customer'] == 'dan' and similar[0]['outcome']
+        assert 'david' not in [match['customer'] for match in similar]
+        assert model.model_snapshot()['similarity']['profiles'] == model.similarity.count
+        model.registry.wait()  # Segment retrains write into tmp
+
+if __name__ == "__main__":
+    test_exact_search_matches_brute_force()
+    test_delta_rows_are_found_before_and_after_a_background_rebuild()
+    test_query_returns_one_row_per_customer_and_skips_excluded()
+    test_rebuild_drops_oldest_beyond_max_profiles()
+    test_fixed_ml_finds_similar_past_customers()
+    print("Similarity index tests passed")
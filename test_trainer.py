@@ -0,0 +1,155 @@
+"""
+Test the standalone trainer: queued samples in, versioned artifacts out, picked up by serving
+"""
+import os
+import tempfile
+from config import TRAINER, MODEL_SELECTION
+from fixed_ml_system import FixedCustomerRiskML, main
+from model_registry import read_manifest
+from trainer import Trainer
+
+PROFILE = {
+    "age": 42, "income": 65000, "profession": "Executive", "risk_category": "Medium",
+    "monthly_limit": 1200, "avg_session": 120, "work_stress": "Medium",
+    "support_contacts": 2, "financial_stress": 4
+}
+
+def make_session(wagered, session_time=120):
+    return {'customer': 'michael', 'balance': 0, 'wagered': wagered, 'session_time': session_time,
+            'location': 'Casino', 'support_calls': 0, 'deposits': [], 'wagers': []}
+
+def test_serving_queues_and_picks_up_published_versions():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            serving = FixedCustomerRiskML(training_mode='external')
+            version = serving.model_version
+            for i in range(25):
+                serving.add_labeled_sample(PROFILE, make_session(100 * i), 40 + 2 * i)
+            
+            # Serving never trains or writes model files in external mode
+            assert serving.model_version == version
+            assert not os.path.exists('fixed_risk_model.pkl')
+            
+            trainer = Trainer(FixedCustomerRiskML(training_mode='external'))
+            assert trainer.pending() == 25
+            manifest = trainer.train_once()
+            assert manifest['version'] == 1 and manifest['queued_samples'] == 25
+            # The samples' behavioural cohorts are segments too
+            profile_segments = {'profession=Executive', 'risk_category=Medium'}
+            assert profile_segments <= set(manifest['segments'])
+            assert all(name.startswith('cohort=') for name in set(manifest['segments']) - profile_segments)
+            assert os.path.exists(os.path.join('models', manifest['global']))
+            assert trainer.train_once() is None
+            
+            assert serving.refresh_published_model(force=True)
+            prediction = serving.predict_risk(PROFILE, make_session(1500))
+            assert serving.model_version == 1
+            assert prediction['segment'] == 'profession=Executive'
+            assert serving.model_snapshot()['training_mode'] == 'external'
+            
+            # A second pass publishes v2 and the command line reports nothing pending afterwards
+            for i in range(10):
+                serving.add_labeled_sample(PROFILE, make_session(50 * i, 200), 70)
+            assert main(['train', '--once']) == 0
+            assert read_manifest(os.path.join('models', 'manifest.json'))['version'] == 2
+            assert Trainer(serving).pending() == 0
+        finally:
+            os.chdir(cwd)
+
+def test_segments_are_gated_and_switched_in_through_the_manifest():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            teacher = {**PROFILE, 'profession': 'Teacher', 'risk_category': 'High'}
+            serving = FixedCustomerRiskML(training_mode='external')
+            for i in range(25):
+                serving.add_labeled_sample(PROFILE, make_session(100 * i), 40 + 2 * i)
+                serving.add_labeled_sample(teacher, make_session(100 * i, 300), 60 + i)
+            trainer = Trainer(FixedCustomerRiskML(training_mode='external'))
+            trainer.train_once()
+            executive, teachers = ('profession', 'Executive'), ('profession', 'Teacher')
+            assert os.path.exists(trainer.registry.artifact_path(executive, 1))
+            assert not os.path.exists(trainer.registry.artifact_path(executive))  # Nothing at a path serving would read unasked
+            
+            # Executives keep to their pattern, teachers change - only the teacher model is republished
+            for i in range(10):
+                serving.add_labeled_sample(PROFILE, make_session(100 * i + 50), 41 + 2 * i)
+                serving.add_labeled_sample(teacher, make_session(100 * i + 50, 300), 95)
+            manifest = trainer.train_once()
+            assert manifest['version'] == 2 and trainer.last_selection['segments_rejected'] >= 1
+            assert manifest['segments']['profession=Executive'] == 1 and manifest['segments']['profession=Teacher'] == 2
+            assert os.path.exists(trainer.registry.artifact_path(teachers, 1))  # v1 stays until pruned
+            
+            assert serving.refresh_published_model(force=True)
+            assert serving.registry.get(executive).version == 1 and serving.registry.get(teachers).version == 2
+        finally:
+            os.chdir(cwd)
+
+def test_rejected_global_model_still_consumes_the_queue_and_publishes_new_segments():
+    cwd = os.getcwd()
+    window, min_gain = TRAINER['WINDOW'], MODEL_SELECTION['MIN_RMSE_GAIN']
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            serving = FixedCustomerRiskML(training_mode='external')
+            for i in range(25):
+                serving.add_labeled_sample(PROFILE, make_session(100 * i), 40 + 2 * i)
+            trainer = Trainer(FixedCustomerRiskML(training_mode='external'))
+            first = trainer.train_once()
+            
+            # No candidate can clear this gain - only a segment with no published version gets through
+            TRAINER['WINDOW'], MODEL_SELECTION['MIN_RMSE_GAIN'] = 20, 1e9
+            nurse = {**PROFILE, 'profession': 'Nurse'}
+            for i in range(25):
+                serving.add_labeled_sample(nurse, make_session(100 * i + 50), 50 + i)
+            manifest = trainer.train_once()
+            assert not trainer.last_selection['promoted'] and trainer.last_selection['segments_rejected'] >= 1
+            assert manifest['version'] == 2 and manifest['global'] == first['global']
+            assert manifest['segments']['profession=Nurse'] == 2
+            assert manifest['segments']['profession=Executive'] == 1
+            assert trainer.pending() == 0 and trainer.queue.count_after(0) == 2 * TRAINER['WINDOW']
+            
+            assert serving.refresh_published_model(force=True)
+            assert serving.model_version == 1 and serving.registry.get(('profession', 'Nurse')).version == 2
+            
+            # Nothing promotable at all - the batch is still consumed and the queue stays bounded
+            for i in range(25):
+                serving.add_labeled_sample(nurse, make_session(100 * i + 50), 50 + i)
+            assert trainer.train_once() is None
+            assert trainer.pending() == 0 and trainer.queue.count_after(0) == 2 * TRAINER['WINDOW']
+        finally:
+            TRAINER['WINDOW'], MODEL_SELECTION['MIN_RMSE_GAIN'] = window, min_gain
+            os.chdir(cwd)
+
+def test_self_labeled_samples_wait_for_drift_flagged_by_serving():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            serving = FixedCustomerRiskML(training_mode='external')
+            for i in range(12):
+                serving.add_training_sample(PROFILE, {**make_session(100 * i), 'customer': f'c{i}'})
+            trainer = Trainer(FixedCustomerRiskML(training_mode='external'))
+            # Predictions as targets, nothing drifted - the same gate inline training applies
+            assert trainer.pending() == 12 and not trainer.ready()
+            assert trainer.train_once() is None and trainer.pending() == 12
+            
+            for i in range(60):
+                serving.predict_risk(PROFILE, make_session(50000 + 100 * i, 900))
+            assert serving.drift.drifted()
+            serving.add_training_sample(PROFILE, {**make_session(60000, 900), 'customer': 'c12'})
+            assert trainer.ready()
+            assert trainer.train_once()['version'] == 1
+            assert trainer.queue.get_state('drifted') == 0
+        finally:
+            os.chdir(cwd)
+
+if __name__ == "__main__":
+    test_serving_queues_and_picks_up_published_versions()
+    test_segments_are_gated_and_switched_in_through_the_manifest()
+    test_rejected_global_model_still_consumes_the_queue_and_publishes_new_segments()
+    test_self_labeled_samples_wait_for_drift_flagged_by_serving()
+    print("Trainer tests passed")
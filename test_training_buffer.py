@@ -0,0 +1,82 @@
+"""
+Test training-buffer deduplication, rate limiting and labeled samples
+"""
+import tempfile
+from fixed_ml_system import FixedCustomerRiskML
+
+PROFILE = {
+    "age": 34, "income": 28000, "profession": "Teacher", "risk_category": "High",
+    "monthly_limit": 500, "avg_session": 180, "work_stress": "High",
+    "support_contacts": 6, "financial_stress": 8
+}
+
+def make_session(customer, session_time=180):
+    return {'customer': customer, 'balance': 0, 'wagered': 0, 'session_time': session_time,
+            'location': 'Home', 'support_calls': 0, 'deposits': [], 'wagers': []}
+
+def make_model(tmp):
+    return FixedCustomerRiskML(directory=tmp)
+
+def test_idle_reruns_do_not_grow_buffer_or_retrain():
+    with tempfile.TemporaryDirectory() as tmp:
+        model = make_model(tmp)
+        samples, version = len(model.training_data), model.model_version
+        
+        for _ in range(50):
+            model.add_training_sample(PROFILE, make_session('sarah'))
+        
+        assert len(model.training_data) == samples + 1
+        assert model.model_version == version
+        assert model.ingest_stats['duplicates'] == 49
+        model.registry.wait()  # Segment retrains write into tmp
+
+def test_unlabeled_samples_rate_limited_per_customer():
+    with tempfile.TemporaryDirectory() as tmp:
+        model = make_model(tmp)
+        
+        assert model.add_training_sample(PROFILE, make_session('sarah', 200))
+        assert not model.add_training_sample(PROFILE, make_session('sarah', 220))
+        assert model.add_training_sample(PROFILE, make_session('david', 220))
+        assert model.ingest_stats['rate_limited'] == 1
+        
+        # Rate limiting applies to self-labeled samples only
+        assert model.add_training_sample(PROFILE, make_session('sarah', 240), actual_risk_score=70)
+        model.registry.wait()
+
+def test_outcome_labels_replace_predictions_and_trigger_retrain():
+    with tempfile.TemporaryDirectory() as tmp:
+        model = make_model(tmp)
+        version = model.model_version
+        
+        model.add_training_sample(PROFILE, make_session('sarah', 200))
+        assert model.add_labeled_sample(PROFILE, make_session('sarah', 200), 85)
+        assert not model.add_labeled_sample(PROFILE, make_session('sarah', 200), 85)
+        
+        labeled = [s for s in model.training_data if s.get('label_source') == 'outcome']
+        assert len(labeled) == 1 and labeled[0]['target_risk_score'] == 85
+        assert sum(1 for s in model.training_data if s['session_time'] == 200) == 1
+        
+        for minutes in range(300, 303):
+            model.add_labeled_sample(PROFILE, make_session('sarah', minutes), 90)
+        assert model.model_version == version + 1
+        assert model.pending_samples == 0
+        assert model.model_snapshot()['labeled_samples'] == 4
+        model.registry.wait()
+
+def test_scored_prediction_is_reused_as_the_target():
+    with tempfile.TemporaryDirectory() as tmp:
+        model = make_model(tmp)
+        prediction = model.predict_risk(PROFILE, make_session('sarah', 210))
+        predictions, observations = model.prediction_count, model.drift.count
+        
+        assert model.add_training_sample(PROFILE, make_session('sarah', 210), prediction=prediction)
+        assert model.training_data[-1]['target_risk_score'] == prediction['risk_score']
+        assert model.prediction_count == predictions and model.drift.count == observations
+        model.registry.wait()
+
+if __name__ == "__main__":
+    test_idle_reruns_do_not_grow_buffer_or_retrain()
+    test_unlabeled_samples_rate_limited_per_customer()
+    test_outcome_labels_replace_predictions_and_trigger_retrain()
+    test_scored_prediction_is_reused_as_the_target()
+    print("Training buffer tests passed")
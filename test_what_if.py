@@ -0,0 +1,79 @@
+"""
+Test the what-if sweep against scoring the changed session directly, and that it changes nothing
+"""
+import copy
+import numpy as np
+from fixed_ml_system import fixed_ml
+from history_aggregates import history
+from location_tracker import LocationTracker
+from risk_engine import calculate_risk
+from session_ledger import SessionLedger
+from session_actions import change_location, set_session_time
+from what_if import what_if, tipping_points
+
+PROFILE = {"age": 29, "income": 42000, "profession": "Business Owner", "risk_category": "Critical",
+           "monthly_limit": 2000, "avg_session": 300, "work_stress": "Very High",
+           "support_contacts": 12, "financial_stress": 10}
+
+def deposit(session, amount):
+    session['deposits'].append(amount)
+
+def wager(session, amount):
+    session['wagered'] += amount
+    session['wagers'].append(amount)
+
+def make_session():
+    # No loss-chasing detector - the sweep holds those signals fixed, so keep them clear on both sides
+    session = {'customer': 'david', 'balance': 0.0, 'wagered': 0, 'session_time': 300, 'location': 'Home',
+               'support_calls': 1, 'deposits': SessionLedger(), 'wagers': SessionLedger(),
+               'location_history': LocationTracker()}
+    deposit(session, 400)
+    wager(session, 250)
+    return session
+
+def test_grid_matches_scoring_the_changed_session():
+    session = make_session()
+    deposits, wagers, times, locations = [0, 500, 1500], [0, 200, 900], [300, 600], ['Home', 'Casino']
+    result = what_if(PROFILE, session, deposits, wagers, times, locations, ml=fixed_ml)
+    assert result['score'].shape == result['ml_score'].shape == (3, 3, 2, 2)
+
+    for (d, w, t, l) in [(0, 0, 0, 0), (1, 2, 1, 1), (2, 1, 0, 1), (2, 2, 1, 0)]:
+        changed = copy.deepcopy(session)
+        if deposits[d]:
+            deposit(changed, deposits[d])
+        if wagers[w]:
+            wager(changed, wagers[w])
+        set_session_time(changed, times[t])
+        if locations[l] != changed['location']:
+            change_location(changed, locations[l])
+        assert result['score'][d, w, t, l] == calculate_risk(PROFILE, changed, learn=False)['score']
+        assert result['ml_score'][d, w, t, l] == fixed_ml.predict_risk(PROFILE, changed)['risk_score']
+
+def test_sweep_has_no_side_effects():
+    session = make_session()
+    before = copy.deepcopy(session)
+    samples, pending, events = len(fixed_ml.training_data), fixed_ml.pending_samples, history.stats().get('events', 0)
+    observations = fixed_ml.drift.count
+
+    result = what_if(PROFILE, session, ml=fixed_ml)
+    assert result['score'].size == len(result['deposits']) * len(result['wagers']) * len(result['session_times']) * len(result['locations'])
+    assert len(fixed_ml.training_data) == samples and fixed_ml.pending_samples == pending
+    assert history.stats().get('events', 0) == events and fixed_ml.drift.count == observations
+    assert session['wagered'] == before['wagered'] and len(session['deposits']) == len(before['deposits'])
+
+def test_tipping_points_per_level():
+    scores = np.array([[10, 45, 65, 85],
+                       [50, 70, 90, 95],
+                       [10, 20, 30, 39]])[:, :, None, None]
+    result = {'deposits': np.array([0, 100, 200]), 'wagers': np.array([0, 50, 100, 150]), 'score': scores}
+    assert tipping_points(result) == [
+        {'deposit': 0.0, 'MEDIUM': 50.0, 'HIGH': 100.0, 'CRITICAL': 150.0},
+        {'deposit': 100.0, 'MEDIUM': 0.0, 'HIGH': 50.0, 'CRITICAL': 100.0},
+        {'deposit': 200.0, 'MEDIUM': None, 'HIGH': None, 'CRITICAL': None}
+    ]
+
+if __name__ == "__main__":
+    test_grid_matches_scoring_the_changed_session()
+    test_sweep_has_no_side_effects()
+    test_tipping_points_per_level()
+    print("What-if tests passed")
@@ -0,0 +1,161 @@
+"""
+Trainer - Standalone retraining loop that publishes versioned model artifacts
+"""
+import glob
+import os
+import time
+from datetime import datetime
+import numpy as np
+from config import TRAINER, TRAINING_BUFFER, MODEL_SELECTION
+from compact_model import CompactRidge
+from model_registry import ModelRegistry, read_manifest, write_manifest, segment_name
+from model_selection import ridge_loo, to_compact, beats_current
+from sample_queue import SampleQueue
+
+class Trainer:
+    """Consumes the sample queue and publishes models for serving to load.
+
+    Each run fits a global model on the seed samples plus the newest queued
+    window, and a model for every segment with enough queued samples, with
+    alpha picked by leave-one-out error. Each model, global or segment, is
+    published only if it beats its current version on the newly queued
+    samples, and each is judged on its own - a new segment version can be
+    published next to the current global model. Every artifact is written
+    under a new versioned name first and the manifest last, so a serving
+    process polling the manifest only ever sees a complete version.
+    """
+
+    def __init__(self, seed_model, queue_path=None, artifact_dir=None, manifest_path=None, segment_dir=None):
+        self.feature_names = seed_model.feature_names
+        seed = [sample for sample in seed_model.training_data if 'label_source' not in sample]
+        self.seed_X = np.array([[sample[name] for name in self.feature_names] for sample in seed], dtype=np.float64).reshape(len(seed), len(self.feature_names))
+        self.seed_y = np.array([sample['target_risk_score'] for sample in seed], dtype=np.float64)
+
+        self.queue = SampleQueue(queue_path or TRAINER['QUEUE_PATH'])
+        self.artifact_dir = artifact_dir or TRAINER['ARTIFACT_DIR']
+        self.manifest_path = manifest_path or TRAINER['MANIFEST_PATH']
+        self.registry = ModelRegistry(self.feature_names, directory=segment_dir)
+        self.last_selection = None
+
+    def pending(self):
+        return self.queue.count_after(self.queue.get_state('trained_through'))
+
+    def ready(self):
+        """Same gate as inline training - enough new samples, and outcome labels among them or drift flagged by serving"""
+        previous_through = self.queue.get_state('trained_through')
+        if self.queue.count_after(previous_through) < TRAINING_BUFFER['RETRAIN_EVERY']:
+            return False
+        return bool(self.queue.count_after(previous_through, 'outcome') or self.queue.get_state('drifted'))
+
+    def train_once(self, force=False):
+        """Publish a new version if the queue is ready (or any samples are, forced) - returns the manifest, or None"""
+        if self.pending() == 0 or not (force or self.ready()):
+            return None
+
+        previous_through = self.queue.get_state('trained_through')
+        trained_through = self.queue.last_id()
+        ids, X, y, segments = self.queue.window(TRAINER['WINDOW'], len(self.feature_names))
+        previous = read_manifest(self.manifest_path) or {}
+        version = previous.get('version', 0) + 1
+
+        selection = ridge_loo(np.vstack([self.seed_X, X]), np.concatenate([self.seed_y, y]),
+                              MODEL_SELECTION['ALPHAS'], MODEL_SELECTION['TIME_BUDGET_MS'])
+        new_count = sum(1 for sample_id in ids if sample_id > previous_through)
+        current = self._published_model(previous)
+        current_predictions = current.predict(X[len(ids) - new_count:]) if current and new_count else []
+        promote, candidate_mse, current_mse = beats_current(
+            selection, current_predictions, y[len(ids) - new_count:] if current else [], MODEL_SELECTION['MIN_RMSE_GAIN'])
+        self.last_selection = {'alpha': selection.alpha, 'loo_rmse': selection.loo_mse ** 0.5,
+                               'candidate_mse': candidate_mse, 'current_mse': current_mse, 'promoted': promote,
+                               'segments_promoted': 0, 'segments_rejected': 0}
+        if promote:
+            model = to_compact(selection, self.feature_names, version)
+            os.makedirs(self.artifact_dir, exist_ok=True)
+            artifact = os.path.join(self.artifact_dir, f"global-v{version:06d}.npz")
+            model.save(artifact)
+
+        # Segments are judged on their own - a rejected global model does not hold back a better segment model
+        segment_versions = dict(previous.get('segments', {}))
+        for segment in {segment for row_segments in segments for segment in row_segments}:
+            rows = [i for i, row_segments in enumerate(segments) if segment in row_segments]
+            if len(rows) < self.registry.min_samples:
+                continue
+            segment_selection = ridge_loo(X[rows], y[rows], MODEL_SELECTION['ALPHAS'], MODEL_SELECTION['TIME_BUDGET_MS'])
+            current_segment = self._published_segment(segment, segment_versions.get(segment_name(segment)))
+            new_rows = [i for i in rows if ids[i] > previous_through] if current_segment else []
+            if current_segment and not new_rows:
+                continue  # Nothing new for this segment - its published version stands
+            segment_promote, _, _ = beats_current(
+                segment_selection, current_segment.predict(X[new_rows]) if new_rows else [], y[new_rows], MODEL_SELECTION['MIN_RMSE_GAIN'])
+            self.last_selection['segments_promoted' if segment_promote else 'segments_rejected'] += 1
+            if segment_promote:
+                to_compact(segment_selection, self.feature_names, version).save(self.registry.artifact_path(segment, version))
+                segment_versions[segment_name(segment)] = version
+
+        # The queued samples are consumed either way; a worse model is never published
+        self.queue.set_state('trained_through', trained_through)
+        self.queue.set_state('drifted', 0)
+        self.queue.prune(2 * TRAINER['WINDOW'])
+        if not promote and not self.last_selection['segments_promoted']:
+            return None
+
+        manifest = {
+            'version': version,
+            'alpha': selection.alpha if promote else previous['alpha'],
+            'loo_rmse': selection.loo_mse ** 0.5 if promote else previous['loo_rmse'],
+            'global': os.path.relpath(artifact, os.path.dirname(self.manifest_path) or '.') if promote else previous['global'],
+            'samples': int(model.samples if promote else current.samples),
+            'queued_samples': len(ids),
+            'segments': segment_versions,
+            'trained_through': trained_through,
+            'published_at': datetime.now().isoformat()
+        }
+        write_manifest(self.manifest_path, manifest)
+        self._prune_artifacts(manifest)
+        return manifest
+
+    def run(self, interval_seconds=None, max_runs=None):
+        """Train on a fixed schedule until interrupted"""
+        interval_seconds = TRAINER['INTERVAL_SECONDS'] if interval_seconds is None else interval_seconds
+        runs = 0
+        while max_runs is None or runs < max_runs:
+            started = time.monotonic()
+            manifest = self.train_once()
+            if manifest:
+                print(f"Published v{manifest['version']}: {manifest['samples']} samples, {len(manifest['segments'])} segment models")
+            runs += 1
+            if runs == max_runs:
+                break
+            time.sleep(max(0.0, interval_seconds - (time.monotonic() - started)))
+
+    def _published_model(self, manifest):
+        if not manifest.get('global'):
+            return None
+        try:
+            model = CompactRidge.load(os.path.join(os.path.dirname(self.manifest_path) or '.', manifest['global']))
+        except OSError:
+            return None
+        return model if model.feature_names == self.feature_names else None
+
+    def _published_segment(self, segment, version):
+        if version is None:
+            return None
+        try:
+            model = CompactRidge.load(self.registry.artifact_path(segment, version))
+        except OSError:
+            return None
+        return model if model.feature_names == self.feature_names else None
+
+    def _prune_artifacts(self, manifest):
+        artifacts = sorted(glob.glob(os.path.join(self.artifact_dir, 'global-v*.npz')))
+        for path in artifacts[:-TRAINER['KEEP_VERSIONS']]:
+            os.remove(path)
+        # Older segment versions go too, but never the one the manifest names
+        for name, version in manifest['segments'].items():
+            field, _, value = name.partition('=')
+            segment = (field, value)
+            published = self.registry.artifact_path(segment, version)
+            artifacts = sorted(glob.glob(glob.escape(self.registry.artifact_path(segment)[:-len('.npz')]) + '-v*.npz'))
+            for path in artifacts[:-TRAINER['KEEP_VERSIONS']]:
+                if path != published:
+                    os.remove(path)
@@ -1,6 +1,7 @@
 """
 Utility functions for improved session management
 """
+import inspect
 import streamlit as st
 from config import VALIDATION_LIMITS
 
@@ -33,4 +34,37 @@ def limit_location_history(location_history, max_items=50):
     """Limit location history to prevent memory issues"""
     if len(location_history) > max_items:
         return location_history[-max_items:]
-    return location_history
\ No newline at end of file
+    return location_history
+
+def _supports_keyed_fragments():
+    """Keyed fragment reruns from widget callbacks need a recent Streamlit"""
+    fragment = getattr(st, 'fragment', None)
+    if fragment is None:
+        return False
+    try:
+        return 'key' in inspect.signature(fragment).parameters
+    except (TypeError, ValueError):
+        return False
+
+PARTIAL_RERUNS = _supports_keyed_fragments()
+
+def panel_fragment(key):
+    """Make a dashboard panel independently rerunnable (plain function on older Streamlit)"""
+    if PARTIAL_RERUNS:
+        return st.fragment(key=key)
+    return lambda func: func
+
+def rerun_panels(panels):
+    """Rerun only the given panels from a widget callback, or the whole app when panels is None"""
+    if not PARTIAL_RERUNS:
+        return  # Callbacks are followed by a full rerun anyway
+    if panels is None:
+        st.rerun()
+    elif panels:
+        st.rerun(sorted(panels))
+
+def rerun_fragment():
+    """Rerun the calling panel only"""
+    if PARTIAL_RERUNS:
+        st.rerun(scope="fragment")
+    st.rerun()
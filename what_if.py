@@ -0,0 +1,96 @@
+"""
+What-If - One customer's risk over a grid of further deposits and wagers, session times and locations
+"""
+import numpy as np
+from config import WHAT_IF, VALIDATION_LIMITS
+from session_ledger import ledger_total, ledger_window_sum
+from loss_chasing import loss_chasing_signals
+from location_tracker import HIGH_RISK_LOCATIONS, high_risk_visit_counts
+from rule_engine import LEVEL_NAMES, risk_level_codes
+from intervention_engine import LOSS_CHASING_PATTERNS
+
+PROFILE_FIELDS = ['age', 'income', 'financial_stress', 'avg_session', 'support_contacts', 'profession', 'work_stress', 'risk_category']
+
+def default_axes(profile, session_data):
+    """Grid values for a customer - amounts up to twice the monthly limit, session times around their average"""
+    amounts = np.linspace(0, profile['monthly_limit'] * WHAT_IF['MAX_LIMIT_MULTIPLE'], WHAT_IF['AMOUNT_STEPS'])
+    session_times = [profile['avg_session'] * multiple for multiple in WHAT_IF['SESSION_MULTIPLES']] + [session_data['session_time']]
+    return {
+        'deposits': amounts,
+        'wagers': amounts,
+        'session_times': np.unique(np.clip(np.round(session_times), 0, VALIDATION_LIMITS['MAX_SESSION_TIME'])),
+        'locations': list(WHAT_IF['LOCATIONS'])
+    }
+
+def what_if(profile, session_data, deposits=None, wagers=None, session_times=None, locations=None, ml=None):
+    """Rule and ML scores if the customer deposited and wagered a further amount, at a given session time and location.
+
+    Every grid point is scored in one score_batch pass, with the same segment
+    models and cohorts as calculate_risk, and nothing is written back - no
+    training sample, drift observation or history event. Further amounts land
+    now, so they also count toward the 15-minute and hourly velocity windows;
+    moving to a high-risk venue adds a visit. Loss-chasing signals stay as the
+    session has them. Scores are (deposits, wagers, session_times, locations)
+    arrays.
+    """
+    from fixed_ml_system import get_fixed_ml
+    from risk_engine import score_batch
+
+    ml = get_fixed_ml() if ml is None else ml
+    axes = default_axes(profile, session_data)
+    axes.update({name: values for name, values in [('deposits', deposits), ('wagers', wagers),
+                 ('session_times', session_times), ('locations', locations)] if values is not None})
+    deposit_values, wager_values, time_values = (np.asarray(axes[name], dtype=np.float64) for name in ['deposits', 'wagers', 'session_times'])
+    location_values = np.asarray(axes['locations']).astype(str)
+    shape = (len(deposit_values), len(wager_values), len(time_values), len(location_values))
+    d, w, t, l = (index.ravel() for index in np.indices(shape))
+    n = d.size
+
+    deposit, wager = deposit_values[d], wager_values[w]
+    deposit_ledger, wager_ledger = session_data.get('deposits', []), session_data.get('wagers', [])
+    visits, visits_last_hour = high_risk_visit_counts(session_data.get('location_history', []))
+    location = location_values[l]
+    moved_to_venue = (location != session_data['location']) & np.isin(location, HIGH_RISK_LOCATIONS)
+    loss_chasing = loss_chasing_signals(session_data)
+
+    columns = {field: np.full(n, profile[field], dtype=object if isinstance(profile[field], str) else np.float64)
+               for field in PROFILE_FIELDS}
+    columns.update({
+        'total_deposits': ledger_total(deposit_ledger) + deposit,
+        'deposit_count': len(deposit_ledger) + (deposit > 0),
+        'deposits_15m': ledger_window_sum(deposit_ledger, '15m') + deposit,
+        'deposits_1h': ledger_window_sum(deposit_ledger, '1h') + deposit,
+        'wagered': session_data['wagered'] + wager,
+        'wager_count': len(wager_ledger) + (wager > 0),
+        'wagers_15m': ledger_window_sum(wager_ledger, '15m') + wager,
+        'wagers_1h': ledger_window_sum(wager_ledger, '1h') + wager,
+        'session_time': time_values[t],
+        'location': location,
+        'support_calls': np.full(n, session_data['support_calls'], dtype=np.float64),
+        'high_risk_visits': visits + moved_to_venue,
+        'high_risk_visits_last_hour': visits_last_hour + moved_to_venue,
+        'loss_chasing_indicator': np.full(n, loss_chasing['indicator'], dtype=np.float64),
+        'spending_acceleration': np.full(n, loss_chasing['spending_acceleration'], dtype=np.float64),
+        **{key: np.full(n, bool(loss_chasing[key])) for key, _ in LOSS_CHASING_PATTERNS}
+    })
+
+    model = (ml.published_model or ml.model) if ml.is_trained else None
+    scored = score_batch(columns, model, ml.registry, ml.cohorts)
+    return {
+        **axes,
+        'score': scored['score'].reshape(shape),
+        'ml_score': scored['ml_score'].reshape(shape),
+        'level': risk_level_codes(scored['score']).reshape(shape)
+    }
+
+def tipping_points(result, session_time_index=0, location_index=0, score='score'):
+    """For each further deposit, the smallest further wager that takes the score to each risk level - None if none does"""
+    levels = risk_level_codes(result[score][:, :, session_time_index, location_index])
+    rows = []
+    for deposit, row in zip(result['deposits'], levels):
+        points = {}
+        for code, name in enumerate(LEVEL_NAMES[1:], start=1):
+            reached = np.flatnonzero(row >= code)
+            points[name] = float(result['wagers'][reached[0]]) if len(reached) else None
+        rows.append({'deposit': float(deposit), **points})
+    return rows